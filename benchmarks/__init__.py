@@ -0,0 +1 @@
+"""Бенчмарки vin_parser: сквозной прогон на локальных стендах (e2e)"""
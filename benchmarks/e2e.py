@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Сквозной бенчмарк пропускной способности vin_parser
+
+Запускает локальные стенды ГИБДД, Drom.ru и Drive2.ru (standins.py),
+обрабатывает синтетический пакет VIN через main() или parse_multiple_vins
+в отдельном процессе и выводит VIN/час, p50/p95 времени VIN и пиковый RSS
+процесса парсера. Сеть и реальные сайты не нужны (кроме запасного пути
+через браузер при ошибках листингов, см. --site-error-rate).
+
+    python -m benchmarks.e2e --vins 200 --workers 1,4 --site-latency 0.2
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.standins import Behaviour, GIBDD_FIXTURE, FIXTURES_DIR, ROOT, start_standins, standin_env, stop_standins
+
+sys.path.insert(0, ROOT)
+import vin_parser  # noqa: E402
+
+VIN_PARSER = os.path.join(ROOT, "vin_parser.py")
+
+# Лимиты, при которых время определяют задержки стендов, а не SCHEDULER
+BENCH_RATES = ["drom.ru=1000:100", "drive2.ru=1000:100", "gibdd=1000:100"]
+
+
+def synthetic_vins(count: int, seed: int = 0) -> List[str]:
+    """Уникальные VIN с верной контрольной цифрой (WMI Mitsubishi, 2013 год)"""
+    rng = random.Random(seed)
+    serials = rng.sample(range(10 ** 6), count)
+    vins = []
+    for serial in serials:
+        # Вес 9-й позиции нулевой, поэтому заглушка не влияет на сумму
+        vin = f"JMBXTGF20DZ{serial:06d}"
+        vins.append(vin[:8] + vin_parser.VinDecoder.check_digit(vin) + vin[9:])
+    return vins
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Перцентиль методом ближайшего ранга"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def _library_main(argv: List[str]) -> None:
+    """Дочерний процесс для --entry library: parse_multiple_vins на стендах"""
+    arg_parser = argparse.ArgumentParser(prog="benchmarks.e2e _library")
+    arg_parser.add_argument("vin_file")
+    arg_parser.add_argument("--workers", type=int, default=1)
+    arg_parser.add_argument("--rate", action="append", default=[])
+    arg_parser.add_argument("--metrics", default=None)
+    arg_parser.add_argument("--skip-additional-info", action="store_true")
+    args = arg_parser.parse_args(argv)
+
+    vin_parser.setup_logging("error")
+    for spec in args.rate:
+        vin_parser.SCHEDULER.configure(*vin_parser.parse_rate_spec(spec))
+    vin_parser.parse_multiple_vins(
+        vin_parser.iter_vins(args.vin_file),
+        output_format="jsonl",
+        workers=args.workers,
+        keep_results=False,
+        html_report=None,
+        metrics_path=args.metrics,
+        use_mock_data=False,
+        get_additional=not args.skip_additional_info
+    )
+
+
+def run_scenario(args, workers: int, extra: List[str]) -> Dict:
+    """Один прогон: свежие стенды, рабочий каталог и кэш"""
+    workdir = tempfile.mkdtemp(prefix="vin_bench_")
+    servers = start_standins(
+        Behaviour(args.gibdd_latency, args.jitter, args.gibdd_error_rate, seed=args.seed),
+        Behaviour(args.site_latency, args.jitter, args.site_error_rate, seed=args.seed + 1),
+        Behaviour(args.site_latency, args.jitter, args.site_error_rate, seed=args.seed + 2),
+        fixtures_dir=args.fixtures,
+        gibdd_fixture=args.gibdd_fixture,
+        models=args.models
+    )
+    try:
+        vin_file = os.path.join(workdir, "vins.txt")
+        with open(vin_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(synthetic_vins(args.vins, args.seed)) + "\n")
+
+        rates = [] if args.production_rates else BENCH_RATES
+        metrics_path = os.path.join(workdir, "metrics.json")
+        if args.entry == "cli":
+            command = [
+                sys.executable, VIN_PARSER, vin_file,
+                "--workers", str(workers),
+                "--gibdd-live",
+                "--output", "jsonl",
+                "--store", os.path.join(workdir, "results.sqlite3"),
+                "--metrics", metrics_path,
+                "--log-level", "error",
+                *[arg for rate in rates for arg in ("--rate", rate)],
+                *extra
+            ]
+        else:
+            command = [
+                sys.executable, "-m", "benchmarks.e2e", "_library", vin_file,
+                "--workers", str(workers),
+                "--metrics", metrics_path,
+                *[arg for rate in rates for arg in ("--rate", rate)],
+                *extra
+            ]
+        if not args.with_additional_info:
+            command.append("--skip-additional-info")
+
+        env = {**os.environ, **standin_env(servers)}
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+
+        log_path = os.path.join(workdir, "run.log")
+        started = time.perf_counter()
+        with open(log_path, "w", encoding="utf-8") as log_file:
+            process = subprocess.Popen(command, cwd=workdir, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+            peak_rss_mb = None
+            if hasattr(os, "wait4"):
+                _, status, usage = os.wait4(process.pid, 0)
+                returncode = os.waitstatus_to_exitcode(status)
+                # ru_maxrss: КБ в Linux, байты в macOS
+                peak_rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+            else:
+                returncode = process.wait()
+        wall = time.perf_counter() - started
+
+        if returncode != 0:
+            with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+                tail = f.read()[-3000:]
+            raise RuntimeError(f"vin_parser exited with {returncode} (workers={workers}):\n{tail}")
+
+        latencies = []
+        processed = 0
+        errors = 0
+        for path in glob.glob(os.path.join(workdir, "output", "vin_batch_results_*.jsonl")):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    result = json.loads(line)
+                    processed += 1
+                    if result.get("error"):
+                        errors += 1
+                    total = result.get("timings", {}).get("total")
+                    if total is not None:
+                        latencies.append(total)
+
+        stages = {}
+        if os.path.exists(metrics_path):
+            with open(metrics_path, "r", encoding="utf-8") as f:
+                for timer in json.load(f)["timers"]:
+                    if timer["name"] == "stage":
+                        stages[timer["labels"]["stage"]] = timer["avg"]
+
+        return {
+            "entry": args.entry,
+            "workers": workers,
+            "vins": args.vins,
+            "processed": processed,
+            "errors": errors,
+            "wall_seconds": round(wall, 2),
+            "vins_per_hour": round(processed / wall * 3600) if wall else None,
+            "p50_seconds": percentile(latencies, 50),
+            "p95_seconds": percentile(latencies, 95),
+            "peak_rss_mb": round(peak_rss_mb, 1) if peak_rss_mb is not None else None,
+            "stage_avg_seconds": stages,
+            "requests": {name: server.behaviour.stats() for name, server in servers.items()}
+        }
+    finally:
+        stop_standins(servers)
+        if args.keep:
+            print(f"Working directory kept: {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def format_report(rows: List[Dict]) -> str:
+    header = f"{'entry':<8} {'workers':>7} {'VINs':>6} {'errors':>6} {'wall, s':>8} {'VIN/h':>8} {'p50, s':>7} {'p95, s':>7} {'RSS, MB':>8}"
+    lines = [header, "-" * len(header)]
+
+    def number(value, digits=2):
+        return "-" if value is None else f"{value:.{digits}f}"
+
+    for row in rows:
+        lines.append(
+            f"{row['entry']:<8} {row['workers']:>7} {row['processed']:>6} {row['errors']:>6} "
+            f"{number(row['wall_seconds']):>8} {row['vins_per_hour'] or '-':>8} "
+            f"{number(row['p50_seconds']):>7} {number(row['p95_seconds']):>7} {number(row['peak_rss_mb'], 1):>8}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> None:
+    """Запуск сквозного бенчмарка на локальных стендах"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["_library"]:
+        _library_main(argv[1:])
+        return
+
+    arg_parser = argparse.ArgumentParser(
+        description="End-to-end VIN throughput benchmark against local GIBDD/Drom/Drive2 stand-ins. "
+                    "With --entry cli, unrecognised arguments are passed to vin_parser (e.g. --speculative, --browser-pool 2)."
+    )
+    arg_parser.add_argument("--vins", type=int, default=100, help="Number of synthetic VINs per run")
+    arg_parser.add_argument("--workers", default="1", help="Comma-separated worker counts, one run each (e.g. 1,4,8)")
+    arg_parser.add_argument("--entry", choices=["cli", "library"], default="cli", help="Run vin_parser.py main() or parse_multiple_vins()")
+    arg_parser.add_argument("--models", type=int, default=None, help="Distinct models the GIBDD stand-in returns (fewer models - more review cache hits)")
+    arg_parser.add_argument("--gibdd-latency", type=float, default=0.05, help="Mean GIBDD response latency, seconds")
+    arg_parser.add_argument("--site-latency", type=float, default=0.1, help="Mean Drom/Drive2 page latency, seconds")
+    arg_parser.add_argument("--jitter", type=float, default=0.5, help="Latency spread as a fraction of the mean")
+    arg_parser.add_argument("--gibdd-error-rate", type=float, default=0.0, help="Share of GIBDD requests answered with 503")
+    arg_parser.add_argument("--site-error-rate", type=float, default=0.0, help="Share of listing requests answered with 503 (falls back to the browser, which needs Chrome)")
+    arg_parser.add_argument("--with-additional-info", action="store_true", help="Run the additional info stage (launches a browser per worker)")
+    arg_parser.add_argument("--production-rates", action="store_true", help="Keep the built-in per-domain rate limits instead of lifting them")
+    arg_parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory with recorded listing pages (drom_reviews.html, drive2_reviews.html, drom_journals.html, drive2_journals.html)")
+    arg_parser.add_argument("--gibdd-fixture", default=GIBDD_FIXTURE, help="Recorded GIBDD response used as the template")
+    arg_parser.add_argument("--seed", type=int, default=0, help="Seed for VINs, latency and errors")
+    arg_parser.add_argument("--json", default=None, metavar="PATH", help="Also write the results as JSON")
+    arg_parser.add_argument("--keep", action="store_true", help="Keep each run's working directory (output/, cache/, run.log)")
+    args, extra = arg_parser.parse_known_args(argv)
+
+    rows = []
+    for workers in [int(value) for value in args.workers.split(",") if value.strip()]:
+        rows.append(run_scenario(args, workers, extra))
+        print(format_report(rows[-1:]).splitlines()[-1] if len(rows) > 1 else format_report(rows), flush=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
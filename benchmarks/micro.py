@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарки CPU-части обработки VIN
+
+Замеряет без сети и браузера то, что выполняется для каждого VIN после
+загрузки данных: разбор ответа ГИБДД, VehicleInfo.to_dict, оценку
+релевантности отзывов, HTML-отчет и экспорт в JSON Lines/CSV/XLSX.
+Данные - синтетический парк из записанного ответа ГИБДД и листингов
+benchmarks/fixtures. Результат сравнивается с baselines.json; замедление
+больше порога считается регрессией (код выхода 1).
+
+    python -m benchmarks.micro --sizes 1000,100000
+    python -m benchmarks.micro --save-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.e2e import synthetic_vins
+from benchmarks.standins import FIXTURES_DIR, GIBDD_FIXTURE, ROOT, make_gibdd_response
+
+sys.path.insert(0, ROOT)
+import vin_parser  # noqa: E402
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+
+class Fleet:
+    """Синтетический парк: ответы ГИБДД, VehicleInfo, карточки и готовые результаты"""
+
+    def __init__(self, size: int, seed: int = 0):
+        with open(GIBDD_FIXTURE, "r", encoding="utf-8") as f:
+            template = json.load(f)
+        self.size = size
+        self.vins = synthetic_vins(size, seed)
+        self.responses = [make_gibdd_response(template, vin) for vin in self.vins]
+        self.vehicles = [vin_parser.parse_gibdd_response(response) for response in self.responses]
+        self.cards = self._listing_cards()
+        self.model_keys = [vin_parser.build_model_key(vehicle) for vehicle in self.vehicles]
+        self.results = self._results()
+
+    @staticmethod
+    def _listing_cards() -> List[Dict]:
+        """Карточки отзывов из листингов fixtures, как после разбора страницы"""
+        def soup(name: str):
+            with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+                page = f.read().replace("$brand", "mitsubishi").replace("$model", "outlander").replace("$year", "2013")
+            return vin_parser.soupify(page)
+
+        return (
+            vin_parser.parse_drom_review_cards(soup("drom_reviews.html"), 10)
+            + vin_parser.parse_drive2_review_cards(soup("drive2_reviews.html"), 10)
+        )
+
+    def _results(self) -> List[Dict]:
+        parser = vin_parser.VINParser()
+        results = []
+        for vin, response, vehicle in zip(self.vins, self.responses, self.vehicles):
+            result = parser.new_result(vin)
+            parser.apply_gibdd(result, response)
+            result["additional_info"] = {"accidents": "Нет данных", "mileage": "Нет данных", "restrictions": "Нет данных"}
+            result["reviews"] = vin_parser._attach_vehicle_fields(self.cards, vehicle)
+            parser.build_summary(result, vehicle)
+            result["timings"] = {"gibdd": 0.5, "reviews": 3.2, "total": 4.1}
+            results.append(result)
+        return results
+
+
+def _export(sink_class: Callable, fleet: Fleet, directory: str) -> None:
+    with sink_class(os.path.join(directory, f"export.{sink_class.extension}")) as sink:
+        for result in fleet.results:
+            sink.write(result)
+
+
+def _json_export(fleet: Fleet, directory: str) -> None:
+    with open(os.path.join(directory, "export.json"), "w", encoding="utf-8") as f:
+        json.dump([vin_parser.result_to_dict(result) for result in fleet.results], f, ensure_ascii=False, default=str)
+
+
+def _score_relevance(fleet: Fleet) -> None:
+    for vehicle, key in zip(fleet.vehicles, fleet.model_keys):
+        vin_parser.score_relevance(vin_parser._attach_vehicle_fields(fleet.cards, vehicle), key["year"], key["engine_volume"])
+
+
+# Имя -> функция (fleet, каталог для файлов), обрабатывающая весь парк
+BENCHMARKS = {
+    "parse_gibdd_response": lambda fleet, directory: [vin_parser.parse_gibdd_response(r) for r in fleet.responses],
+    "vehicle_info_to_dict": lambda fleet, directory: [vehicle.to_dict() for vehicle in fleet.vehicles],
+    "score_relevance": lambda fleet, directory: _score_relevance(fleet),
+    "html_report": lambda fleet, directory: [vin_parser.HTML_RENDERER.render(result) for result in fleet.results],
+    "export_json": _json_export,
+    "export_jsonl": lambda fleet, directory: _export(vin_parser.JsonlSink, fleet, directory),
+    "export_csv": lambda fleet, directory: _export(vin_parser.CsvSink, fleet, directory),
+    "export_xlsx": lambda fleet, directory: _export(vin_parser.XlsxSink, fleet, directory)
+}
+
+
+def measure(func: Callable, fleet: Fleet, repeat: int) -> float:
+    """Лучшее из repeat время обработки парка, в микросекундах на VIN"""
+    best = None
+    for _ in range(repeat):
+        directory = tempfile.mkdtemp(prefix="vin_micro_")
+        try:
+            started = time.perf_counter()
+            func(fleet, directory)
+            elapsed = time.perf_counter() - started
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        best = elapsed if best is None else min(best, elapsed)
+    return best / fleet.size * 1e6
+
+
+def machine() -> Dict:
+    return {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.processor()}
+
+
+def load_baselines(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv: List[str] = None) -> None:
+    """Запуск микробенчмарков и сравнение с сохраненными базовыми значениями"""
+    arg_parser = argparse.ArgumentParser(description="Micro-benchmarks for per-VIN CPU work (no network, no browser)")
+    arg_parser.add_argument("--sizes", default="1000", help="Comma-separated fleet sizes, e.g. 1000,100000")
+    arg_parser.add_argument("--only", action="append", default=[], choices=sorted(BENCHMARKS), help="Run only this benchmark (repeatable)")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the fastest is reported")
+    arg_parser.add_argument("--baseline", default=BASELINES_PATH, help="Baseline file")
+    arg_parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline (merged with existing entries)")
+    arg_parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown against the baseline reported as a regression (0.2 = 20%%)")
+    arg_parser.add_argument("--seed", type=int, default=0, help="Seed for synthetic VINs")
+    args = arg_parser.parse_args(argv)
+
+    vin_parser.log.setLevel("ERROR")
+    names = args.only or list(BENCHMARKS)
+    stored = load_baselines(args.baseline)
+    baseline = stored.get("results", {})
+    if baseline and stored.get("machine") != machine():
+        print(f"⚠️ Baseline was recorded on another machine: {stored.get('machine')}", file=sys.stderr)
+
+    current = {}
+    regressions = []
+    print(f"{'benchmark':<22} {'size':>7} {'µs/VIN':>10} {'baseline':>10} {'change':>8}")
+    for size in [int(value) for value in args.sizes.split(",") if value.strip()]:
+        fleet = Fleet(size, args.seed)
+        for name in names:
+            key = f"{name}@{size}"
+            value = measure(BENCHMARKS[name], fleet, args.repeat)
+            current[key] = round(value, 2)
+
+            reference = baseline.get(key)
+            change = ""
+            if reference:
+                ratio = value / reference - 1
+                change = f"{ratio:+.0%}"
+                if ratio > args.threshold:
+                    change += " ✗"
+                    regressions.append(key)
+            print(f"{name:<22} {size:>7} {value:>10.2f} {reference or '-':>10} {change:>8}", flush=True)
+
+    if args.save_baseline:
+        results = {**baseline, **current}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"machine": machine(), "results": dict(sorted(results.items()))}, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"\n✅ Baseline saved to {args.baseline}")
+    elif regressions:
+        print(f"\n✗ Slower than baseline by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
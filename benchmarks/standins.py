@@ -0,0 +1,268 @@
+"""
+Локальные стенды ГИБДД, Drom.ru и Drive2.ru для бенчмарков
+
+Серверы отдают записанные ответы (gibdd_response.json, HTML листингов из
+fixtures/) с заданной задержкой и долей ошибок. Парсер направляется на них
+через --gibdd-url/--site-url или переменные окружения VIN_PARSER_*_URL.
+"""
+
+import copy
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+GIBDD_FIXTURE = os.path.join(ROOT, "gibdd_response.json")
+
+# Модели, которые стенд ГИБДД выдает по VIN (строка модели ГИБДД, год)
+FLEET = [
+    ("МИЦУБИСИ АУТЛЕНДЕР 2.0", "2013"),
+    ("ТОЙОТА КАМРИ 2.5", "2016"),
+    ("КИА РИО 1.6", "2018"),
+    ("ХЕНДАЙ СОЛЯРИС 1.6", "2017"),
+    ("ФОЛЬКСВАГЕН ПОЛО 1.6", "2015"),
+    ("ШКОДА ОКТАВИЯ 1.8", "2014"),
+    ("РЕНО ДАСТЕР 2.0", "2019"),
+    ("НИССАН КАШКАЙ 2.0", "2012")
+]
+
+# Префикс пути -> файл листинга
+DROM_ROUTES = [
+    ("/reviews/", "drom_reviews.html"),
+    ("/bjournal/", "drom_journals.html")
+]
+DRIVE2_ROUTES = [
+    ("/experience/", "drive2_reviews.html"),
+    ("/search/", "drive2_reviews.html"),
+    ("/board/", "drive2_journals.html")
+]
+
+NOT_FOUND_PAGE = {
+    "drom.ru": '<html><body><div class="error-page">Страница не найдена</div></body></html>',
+    "drive2.ru": '<html><body><div class="c-error">Страница не найдена</div></body></html>'
+}
+
+YEAR_IN_PATH = re.compile(r"/((?:19|20)\d\d)/")
+
+
+def make_gibdd_response(template: Dict, vin: str, fleet: List[Tuple[str, str]] = FLEET) -> Dict:
+    """Записанный ответ ГИБДД с подставленным VIN и моделью из fleet (по хешу VIN)"""
+    response = copy.deepcopy(template)
+    model, year = fleet[zlib.crc32(vin.encode()) % len(fleet)]
+    vehicle = response["response"]["vehicle"]
+    vehicle.update({"vin": vin, "bodyNumber": vin, "model": model, "year": year})
+    return response
+
+
+class Behaviour:
+    """
+    Задержка и ошибки стенда
+
+    Args:
+        latency: Средняя задержка ответа в секундах
+        jitter: Разброс задержки (доля от latency, 0.5 - от 0.5x до 1.5x)
+        error_rate: Доля ответов 503
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.5, error_rate: float = 0.0, seed: int = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def apply(self) -> bool:
+        """Пауза перед ответом; False - ответить ошибкой"""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency * self._random.uniform(1 - self.jitter, 1 + self.jitter) if self.latency else 0.0
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if delay > 0:
+            time.sleep(delay)
+        return not failed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "StandInServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: str, content_type: str) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_GET(self):
+        self._read_body()
+        if not self.server.behaviour.apply():
+            self._send(503, "Service Unavailable", "text/plain")
+            return
+        status, body, content_type = self.server.respond_get(self.path)
+        self._send(status, body, content_type)
+
+    def do_POST(self):
+        payload = self._read_body()
+        if not self.server.behaviour.apply():
+            self._send(503, "Service Unavailable", "text/plain")
+            return
+        status, body, content_type = self.server.respond_post(self.path, payload)
+        self._send(status, body, content_type)
+
+
+class StandInServer(ThreadingHTTPServer):
+    """HTTP-сервер стенда в фоновом потоке (порт выбирается свободный)"""
+
+    daemon_threads = True
+
+    def __init__(self, behaviour: Behaviour = None, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.behaviour = behaviour or Behaviour()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self.serve_forever, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def respond_get(self, path: str) -> Tuple[int, str, str]:
+        return 405, "Method Not Allowed", "text/plain"
+
+    def respond_post(self, path: str, payload: bytes) -> Tuple[int, str, str]:
+        return 405, "Method Not Allowed", "text/plain"
+
+
+class GibddStandIn(StandInServer):
+    """
+    Стенд API ГИБДД
+
+    Отвечает записанным ответом, в котором VIN заменен на запрошенный, а
+    модель выбирается из FLEET по хешу VIN (models ограничивает число
+    разных моделей и тем самым долю попаданий в кэш отзывов).
+    """
+
+    def __init__(self, behaviour: Behaviour = None, fixture: str = GIBDD_FIXTURE, models: int = None, **kwargs):
+        super().__init__(behaviour, **kwargs)
+        with open(fixture, "r", encoding="utf-8") as f:
+            self.template = json.load(f)
+        self.fleet = FLEET[:models] if models else FLEET
+
+    def response_for(self, vin: str) -> Dict:
+        return make_gibdd_response(self.template, vin, self.fleet)
+
+    def respond_post(self, path: str, payload: bytes) -> Tuple[int, str, str]:
+        try:
+            body = json.loads(payload or b"{}")
+        except ValueError:
+            return 400, "Bad Request", "text/plain"
+        if "vins" in body:
+            # Пакетный запрос AsyncGibddClient: список ответов в порядке VIN
+            responses = [self.response_for(vin) for vin in body["vins"]]
+            return 200, json.dumps(responses, ensure_ascii=False), "application/json"
+        return 200, json.dumps(self.response_for(body.get("vin", "")), ensure_ascii=False), "application/json"
+
+
+class SiteStandIn(StandInServer):
+    """
+    Стенд сайта отзывов
+
+    Листинги берутся из fixtures (записанные страницы или шаблоны с
+    $brand, $model и $year); неизвестный путь - страница 404 сайта.
+    """
+
+    def __init__(
+        self,
+        domain: str,
+        routes: List[Tuple[str, str]],
+        behaviour: Behaviour = None,
+        fixtures_dir: str = FIXTURES_DIR,
+        **kwargs
+    ):
+        super().__init__(behaviour, **kwargs)
+        self.domain = domain
+        self.routes = []
+        for prefix, filename in routes:
+            with open(os.path.join(fixtures_dir, filename), "r", encoding="utf-8") as f:
+                self.routes.append((prefix, Template(f.read())))
+
+    def respond_get(self, path: str) -> Tuple[int, str, str]:
+        for prefix, template in self.routes:
+            if path.startswith(prefix):
+                parts = [part for part in path[len(prefix):].split("?")[0].split("/") if part]
+                year = YEAR_IN_PATH.search(path)
+                page = template.safe_substitute(
+                    brand=parts[0] if parts else "",
+                    model=parts[1] if len(parts) > 1 else "",
+                    year=year.group(1) if year else "2015"
+                )
+                return 200, page, "text/html"
+        return 404, NOT_FOUND_PAGE[self.domain], "text/html"
+
+
+def start_standins(
+    gibdd: Behaviour,
+    drom: Behaviour,
+    drive2: Behaviour,
+    fixtures_dir: str = FIXTURES_DIR,
+    gibdd_fixture: str = GIBDD_FIXTURE,
+    models: int = None
+) -> Dict[str, StandInServer]:
+    """Запуск стендов gibdd, drom.ru и drive2.ru"""
+    return {
+        "gibdd": GibddStandIn(gibdd, gibdd_fixture, models).start(),
+        "drom.ru": SiteStandIn("drom.ru", DROM_ROUTES, drom, fixtures_dir).start(),
+        "drive2.ru": SiteStandIn("drive2.ru", DRIVE2_ROUTES, drive2, fixtures_dir).start()
+    }
+
+
+def stop_standins(servers: Dict[str, StandInServer]) -> None:
+    for server in servers.values():
+        server.stop()
+
+
+def standin_env(servers: Dict[str, StandInServer]) -> Dict[str, str]:
+    """Переменные окружения, направляющие vin_parser на стенды"""
+    return {
+        "VIN_PARSER_GIBDD_URL": servers["gibdd"].url + "/gibdd",
+        "VIN_PARSER_DROM_URL": servers["drom.ru"].url,
+        "VIN_PARSER_DRIVE2_URL": servers["drive2.ru"].url
+    }
@@ -177,6 +177,25 @@ def test_error_handling():
     else:
         print("  ✗ Не обработаны пустые данные ГИБДД")
 
+def test_model_urls():
+    """Тест имен моделей в URL"""
+    print("\n🧪 Тест 7: Имена моделей в URL...")
+
+    from vin_parser import RESOLVER
+
+    cases = [
+        ("МИЦУБИСИ АУТЛЕНДЕР 2.0", "outlander"),
+        ("ТОЙОТА ЛЕНД КРУЗЕР 200", "land-cruiser"),
+        ("ТОЙОТА ЛЕНД КРУЗЕР ПРАДО 150", "land-cruiser-prado"),
+        ("ТОЙОТА ПРАДО 120", "land-cruiser-prado"),
+        ("ЛАДА 219010 ЛАДА ГРАНТА", "granta"),
+    ]
+    for full_model, expected in cases:
+        _, model = RESOLVER.split_model(full_model)
+        slug = RESOLVER.model_for_url(model)
+        assert slug == expected, f"{full_model}: {slug} вместо {expected}"
+        print(f"  ✓ {full_model} -> {slug}")
+
 def run_all_tests():
     """Запуск всех тестов"""
     print("🚀 Запуск тестов исправленного VIN-парсера\n")
@@ -196,6 +215,9 @@ def run_all_tests():
     
     # Тест 6: Обработка ошибок
     test_error_handling()
+
+    # Тест 7: Имена моделей в URL
+    test_model_urls()
     
     print("\n" + "=" * 60)
     print("🏁 Тестирование завершено")
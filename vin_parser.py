@@ -2,14 +2,34 @@ from botasaurus.browser import browser, Driver
 from botasaurus.request import request, Request
 from botasaurus.soupify import soupify
 from botasaurus import bt
-from botasaurus.cache import Cache
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import re
+import string
 import time
+import random
+import asyncio
+import threading
+import queue
 import json
+import logging
+import hashlib
 import argparse
+import contextvars
+import csv
+import itertools
+import os
+import sys
+import sqlite3
+import zlib
+import requests
 from datetime import datetime
+from html import escape
+from urllib.parse import urlsplit
 from dataclasses import dataclass, asdict
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache, wraps
 
 # ==================== МОДЕЛЬ ДАННЫХ ====================
 
@@ -74,7 +94,7 @@ def validate_required_keys(data: Dict, required_keys: List[str], func_name: str)
 def validate_vehicle_info(vehicle_info, func_name: str) -> bool:
     """Проверка корректности объекта VehicleInfo"""
     if vehicle_info is None:
-        print(f"  ⚠️ {func_name}: vehicle_info is None")
+        log.warning("⚠️ %s: vehicle_info is None", func_name)
         return False
     
     # Поддержка как объектов VehicleInfo, так и словарей
@@ -85,11 +105,11 @@ def validate_vehicle_info(vehicle_info, func_name: str) -> bool:
         brand = vehicle_info.brand
         model = vehicle_info.model
     else:
-        print(f"  ⚠️ {func_name}: vehicle_info missing required attributes")
+        log.warning("⚠️ %s: vehicle_info missing required attributes", func_name)
         return False
     
     if not brand or not model:
-        print(f"  ⚠️ {func_name}: brand or model is empty")
+        log.warning("⚠️ %s: brand or model is empty", func_name)
         return False
     
     return True
@@ -124,639 +144,3813 @@ def load_vins(path: str) -> List[str]:
 
     return vin_list
 
+
+JSON_ARRAY_START = re.compile(r'^\s*\[|"vins"\s*:\s*\[')
+# Пробелы и запятые между элементами массива
+JSON_ARRAY_SEPARATORS = re.compile(r'[\s,]*')
+
+
+def _iter_json_array(f, chunk_size: int = 64 * 1024) -> Iterator:
+    """
+    Потоковый разбор JSON-массива VIN без загрузки файла целиком
+
+    Поддерживает массив верхнего уровня и объект с ключом ``vins``.
+    Разбор идет по индексу внутри блока; прочитанная часть буфера
+    отрезается только при дочитывании следующего блока.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    # Поиск начала массива
+    while True:
+        match = JSON_ARRAY_START.search(buffer)
+        if match:
+            pos = match.end()
+            break
+        if not fill():
+            raise ValueError("VIN data must be a list or under the 'vins' key")
+
+    while True:
+        pos = JSON_ARRAY_SEPARATORS.match(buffer, pos).end()
+        if pos == len(buffer):
+            if not fill():
+                raise ValueError("Unexpected end of VIN JSON array")
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            # Элемент разрезан границей блока - дочитываем
+            if not fill():
+                raise
+            continue
+        # Число или литерал на границе блока мог быть прочитан не полностью
+        if end == len(buffer) and not eof and fill():
+            continue
+        pos = end
+        yield value
+
+
+def _vin_from_record(record, column: str) -> Optional[str]:
+    """VIN из строки JSON/JSONL: строка или объект с ключом column"""
+    if isinstance(record, str):
+        return record
+    if isinstance(record, dict):
+        value = record.get(column) or record.get(column.upper())
+        return value if isinstance(value, str) else None
+    return None
+
+
+def iter_vins(source: str, column: str = "vin", input_format: str = None, skip_invalid: bool = True) -> Iterator[str]:
+    """
+    Потоковое чтение VIN-кодов
+
+    VIN читаются по одному, поэтому обработка первого VIN начинается сразу,
+    а память не зависит от размера файла. Формат определяется по
+    расширению: ``.json`` (массив или ``{"vins": [...]}``, разбирается
+    инкрементально), ``.jsonl``/``.ndjson``, ``.csv`` (колонка ``column``,
+    иначе первая колонка), остальное - текст с одним VIN на строку.
+    ``-`` означает stdin (текст или JSONL).
+
+    Args:
+        source: Путь к файлу или ``-``
+        column: Колонка CSV / ключ объекта JSONL с VIN
+        input_format: json, jsonl, csv или txt (по умолчанию по расширению)
+        skip_invalid: Пропускать VIN, не прошедшие VINParser.validate_vin
+
+    Yields:
+        Нормализованные VIN-коды
+    """
+    if input_format is None:
+        extension = os.path.splitext(source)[1].lower()
+        input_format = {
+            ".json": "json",
+            ".jsonl": "jsonl",
+            ".ndjson": "jsonl",
+            ".csv": "csv"
+        }.get(extension, "jsonl" if source == "-" else "txt")
+
+    f = sys.stdin if source == "-" else open(source, "r", encoding="utf-8", newline="")
+    try:
+        if input_format == "json":
+            records = (_vin_from_record(record, column) for record in _iter_json_array(f))
+        elif input_format == "csv":
+            reader = csv.reader(f)
+            header = next(reader, [])
+            columns = [name.strip().lower() for name in header]
+            if column.lower() in columns:
+                col_idx = columns.index(column.lower())
+            else:
+                # Нет заголовка с VIN - первая строка тоже данные
+                col_idx = 0
+                reader = itertools.chain([header], reader)
+            records = (row[col_idx] if len(row) > col_idx else None for row in reader)
+        elif input_format == "jsonl":
+            records = (
+                _vin_from_record(json.loads(line), column) if line.lstrip().startswith(("{", '"')) else line
+                for line in f if line.strip()
+            )
+        else:
+            records = (line for line in f if line.strip())
+
+        skipped = 0
+        for record in records:
+            vin = (record or "").strip().upper()
+            if skip_invalid and not VINParser.validate_vin(vin):
+                skipped += 1
+                log.warning("⚠️ Пропущен неверный VIN: %r", vin or record)
+                continue
+            yield vin
+
+        if skipped:
+            log.warning("⚠️ Всего пропущено неверных VIN: %s", skipped)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+# ==================== ЛОГИРОВАНИЕ ====================
+
+log = logging.getLogger("vin_parser")
+log.addHandler(logging.NullHandler())
+
+# Поля контекста (vin, stage), добавляемые ко всем записям текущего потока
+_LOG_CONTEXT: contextvars.ContextVar = contextvars.ContextVar("vin_parser_log_context", default={})
+
+# Стандартные атрибуты LogRecord, которые не выводятся как поля extra
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "context"}
+
+
+@contextmanager
+def log_context(**fields):
+    """Поля, добавляемые к записям журнала внутри блока (например, vin)"""
+    token = _LOG_CONTEXT.set({**_LOG_CONTEXT.get(), **fields})
+    try:
+        yield
+    finally:
+        _LOG_CONTEXT.reset(token)
+
+
+class _ContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.context = _LOG_CONTEXT.get()
+        return True
+
+
+class JsonLogFormatter(logging.Formatter):
+    """Одна JSON-строка на запись: время, уровень, сообщение, контекст и extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "msg": record.getMessage(),
+            **getattr(record, "context", {})
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextLogFormatter(logging.Formatter):
+    """Читаемый вывод; при параллельной обработке строка начинается с VIN"""
+
+    def __init__(self, prefix_vin: bool = False):
+        super().__init__("%(message)s")
+        self.prefix_vin = prefix_vin
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        vin = getattr(record, "context", {}).get("vin")
+        return f"[{vin}] {message}" if vin and self.prefix_vin else message
+
+
+def setup_logging(level: str = "info", fmt: str = "text", stream=None, prefix_vin: bool = False) -> None:
+    """
+    Настройка журнала vin_parser
+
+    Args:
+        level: debug, info, warning или error
+        fmt: text - читаемые строки, json - JSON Lines
+        stream: Поток вывода (по умолчанию stderr)
+        prefix_vin: Начинать текстовые строки с VIN (для параллельной обработки)
+    """
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonLogFormatter() if fmt == "json" else TextLogFormatter(prefix_vin))
+    handler.addFilter(_ContextFilter())
+
+    for existing in list(log.handlers):
+        log.removeHandler(existing)
+    log.addHandler(handler)
+    log.setLevel(level.upper())
+    log.propagate = False
+
+
+def ensure_logging(level: str = "info") -> None:
+    """Настройка журнала, если приложение не настроило его само"""
+    if not any(not isinstance(handler, logging.NullHandler) for handler in log.handlers):
+        setup_logging(level)
+
+
+class Progress:
+    """
+    Общий счетчик прогресса пакета
+
+    В терминале - одна обновляемая строка, иначе строка не чаще раза в
+    ``interval`` секунд. Вывод идет в stderr и не смешивается с журналом
+    по каждому VIN.
+    """
+
+    def __init__(self, total=None, stream=None, interval: float = None):
+        self.total = total
+        self.stream = stream or sys.stderr
+        self.tty = hasattr(self.stream, "isatty") and self.stream.isatty()
+        self.interval = interval if interval is not None else (0.2 if self.tty else 10.0)
+        self.done = 0
+        self.errors = 0
+        self._started = time.monotonic()
+        self._shown = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, ok: bool = True) -> None:
+        with self._lock:
+            self.done += 1
+            if not ok:
+                self.errors += 1
+            now = time.monotonic()
+            if now - self._shown >= self.interval:
+                self._shown = now
+                self._render(now)
+
+    def _render(self, now: float) -> None:
+        elapsed = max(now - self._started, 1e-6)
+        total = f"/{self.total}" if self.total else ""
+        line = f"VIN {self.done}{total}, ошибок {self.errors}, {self.done / elapsed:.2f} VIN/с, {elapsed:.0f} с"
+        if self.tty:
+            self.stream.write(f"\r{line}\033[K")
+        else:
+            self.stream.write(line + "\n")
+        self.stream.flush()
+
+    def finish(self) -> None:
+        with self._lock:
+            self._render(time.monotonic())
+            if self.tty:
+                self.stream.write("\n")
+                self.stream.flush()
+
+
+# ==================== МЕТРИКИ ====================
+
+class TimerStat:
+    """Количество, сумма, минимум и максимум наблюдений таймера"""
+
+    __slots__ = ("count", "total", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "total": round(self.total, 4),
+            "avg": round(self.total / self.count, 4) if self.count else 0.0,
+            "min": round(self.min or 0.0, 4),
+            "max": round(self.max, 4)
+        }
+
+
+class Metrics:
+    """
+    Таймеры и счетчики с метками
+
+    Таймеры: этапы обработки VIN (stage), источники (source x kind x
+    path), переходы браузера (navigation), запросы ГИБДД; счетчики:
+    попадания и промахи кэша, исходы переходов. Сохраняется в текстовый
+    формат Prometheus (``.prom``) или в JSON.
+    """
+
+    PREFIX = "vin_parser"
+
+    def __init__(self):
+        self._timers: Dict[Tuple[str, Tuple], TimerStat] = {}
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: Dict) -> Tuple[str, Tuple]:
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            stat = self._timers.get(key)
+            if stat is None:
+                stat = self._timers[key] = TimerStat()
+            stat.observe(seconds)
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Замер времени блока (учитывается и при исключении)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> Dict:
+        """Все метрики в виде словаря для JSON"""
+        with self._lock:
+            timers = [
+                {"name": name, "labels": dict(labels), **stat.to_dict()}
+                for (name, labels), stat in sorted(self._timers.items())
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+        return {"timers": timers, "counters": counters}
+
+    @staticmethod
+    def _labels_text(labels: Dict) -> str:
+        if not labels:
+            return ""
+        pairs = ",".join(
+            '{}="{}"'.format(key, value.replace("\\", "\\\\").replace('"', '\\"'))
+            for key, value in labels.items()
+        )
+        return "{" + pairs + "}"
+
+    def to_prometheus(self) -> str:
+        """Текстовый формат Prometheus (таймеры - summary в секундах)"""
+        snapshot = self.snapshot()
+        lines = []
+        declared = set()
+        for timer in snapshot["timers"]:
+            metric = f"{self.PREFIX}_{timer['name']}_seconds"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} summary")
+            labels = self._labels_text(timer["labels"])
+            lines.append(f"{metric}_count{labels} {timer['count']}")
+            lines.append(f"{metric}_sum{labels} {timer['total']}")
+        for counter in snapshot["counters"]:
+            metric = f"{self.PREFIX}_{counter['name']}_total"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{self._labels_text(counter['labels'])} {counter['value']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Сохранение: ``.prom`` - формат Prometheus, иначе JSON"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if path.endswith(".prom"):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+
+METRICS = Metrics()
+
+
+@contextmanager
+def stage_timer(result: Dict, stage: str):
+    """Замер этапа обработки VIN: в METRICS и в result["timings"]"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        METRICS.observe("stage", elapsed, stage=stage)
+        if result is not None:
+            result.setdefault("timings", {})[stage] = round(elapsed, 3)
+
+
+def record_total(result: Dict, started: float) -> None:
+    """Полное время обработки VIN (от начала этапа ГИБДД)"""
+    elapsed = time.perf_counter() - started
+    METRICS.observe("vin", elapsed)
+    result.setdefault("timings", {})["total"] = round(elapsed, 3)
+
+
+def timed_stage(stage: str) -> Callable:
+    """Декоратор метода этапа VINParser вида method(self, result, ...)"""
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self, result: Dict, *args, **kwargs):
+            with stage_timer(result, stage):
+                return method(self, result, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ==================== КЭШ ====================
+
+@dataclass
+class PartialResult:
+    """
+    Неполный результат compute() для ResultCache.cached
+
+    Значение возвращается вызывающему, но не кэшируется, чтобы источник,
+    который не ответил, был запрошен снова при следующем обращении.
+    """
+    value: object
+
+
+class ResultCache:
+    """
+    Файловый кэш результатов с TTL, политикой пустых ответов и LRU
+
+    Записи хранятся как ``cache/<функция>/<md5 ключа>.json`` (та же
+    раскладка, что у botasaurus). Время записи - mtime файла, время
+    последнего чтения - atime (обновляется явно при попадании). Пустые
+    результаты и ошибки не кэшируются, чтобы временный сбой сайта не
+    сохранялся навсегда.
+    """
+
+    # функция -> срок жизни записи в секундах
+    DEFAULT_TTLS = {
+        "get_gibdd_data": 24 * 3600,
+        "get_additional_info": 7 * 24 * 3600,
+        "scrape_model_reviews": 30 * 24 * 3600,
+        "scrape_model_journals": 30 * 24 * 3600
+    }
+    DEFAULT_TTL = 7 * 24 * 3600
+    # Проверка размера кэша выполняется раз в EVICT_EVERY записей
+    EVICT_EVERY = 100
+
+    def __init__(self, root: str = "cache", ttls: Dict[str, float] = None, max_bytes: int = 500 * 1024 * 1024):
+        """
+        Args:
+            root: Каталог кэша
+            ttls: Сроки жизни по функциям (дополняют DEFAULT_TTLS)
+            max_bytes: Предельный размер кэша; лишнее вытесняется по LRU
+        """
+        self.root = root
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        # False - кэш не читается и не пополняется (запись и воспроизведение архива)
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._puts = 0
+
+    def ttl(self, func_name: str) -> float:
+        return self.ttls.get(func_name, self.DEFAULT_TTL)
+
+    def path(self, func_name: str, key) -> str:
+        digest = hashlib.md5(json.dumps(key, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+        return os.path.join(self.root, func_name, f"{digest}.json")
+
+    @staticmethod
+    def is_cacheable(value) -> bool:
+        """Пустые результаты и ошибки не кэшируются"""
+        if not value:
+            return False
+        if isinstance(value, dict) and (value.get("error") or value.get("success") is False):
+            return False
+        return True
+
+    def get(self, func_name: str, key) -> Tuple[bool, object]:
+        """
+        Чтение записи
+
+        Returns:
+            (попадание, значение); просроченная запись удаляется
+        """
+        if not self.enabled:
+            return False, None
+        path = self.path(func_name, key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False, None
+
+        if time.time() - stat.st_mtime > self.ttl(func_name):
+            self._remove(path)
+            return False, None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self._remove(path)
+            return False, None
+
+        # Отмечаем использование для LRU, сохраняя время записи
+        try:
+            os.utime(path, (time.time(), stat.st_mtime))
+        except OSError:
+            pass
+        return True, value
+
+    def put(self, func_name: str, key, value) -> bool:
+        """
+        Запись значения (если оно кэшируемое)
+
+        Returns:
+            True, если значение записано
+        """
+        if not self.enabled or not self.is_cacheable(value):
+            return False
+
+        path = self.path(func_name, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._puts += 1
+            evict = self._puts % self.EVICT_EVERY == 0
+        if evict:
+            self.prune(expired=False)
+        return True
+
+    def cached(self, func_name: str, key, compute: Callable):
+        """
+        Значение из кэша или результат compute() с записью в кэш
+
+        Одновременные промахи с одним ключом объединяются (SINGLE_FLIGHT):
+        compute() выполняется один раз, остальные вызовы ждут его результат.
+        """
+        hit, value = self.get(func_name, key)
+        METRICS.inc("cache_requests", function=func_name, result="hit" if hit else "miss")
+        if hit:
+            return value
+
+        def load():
+            # Повторная проверка: значение могло появиться, пока мы ждали
+            hit, value = self.get(func_name, key)
+            if hit:
+                return value
+            value = compute()
+            if isinstance(value, PartialResult):
+                return value.value
+            self.put(func_name, key, value)
+            return value
+
+        return SINGLE_FLIGHT.do(func_name, self.path(func_name, key), load)
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _entries(self) -> List[Tuple[str, str, os.stat_result]]:
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for func_name in sorted(os.listdir(self.root)):
+            func_dir = os.path.join(self.root, func_name)
+            if not os.path.isdir(func_dir):
+                continue
+            for name in os.listdir(func_dir):
+                if name.endswith(".json"):
+                    path = os.path.join(func_dir, name)
+                    try:
+                        entries.append((func_name, path, os.stat(path)))
+                    except FileNotFoundError:
+                        pass
+        return entries
+
+    def _is_empty(self, path: str) -> bool:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return not self.is_cacheable(json.load(f))
+        except (OSError, ValueError):
+            return True
+
+    def stats(self) -> Dict[str, Dict]:
+        """Статистика по функциям: записи, размер, просроченные, пустые"""
+        now = time.time()
+        stats = {}
+        for func_name, path, stat in self._entries():
+            item = stats.setdefault(func_name, {"entries": 0, "bytes": 0, "expired": 0, "empty": 0, "ttl": self.ttl(func_name)})
+            item["entries"] += 1
+            item["bytes"] += stat.st_size
+            if now - stat.st_mtime > self.ttl(func_name):
+                item["expired"] += 1
+            elif self._is_empty(path):
+                item["empty"] += 1
+        return stats
+
+    def prune(self, expired: bool = True, max_bytes: int = None) -> Dict[str, int]:
+        """
+        Очистка кэша
+
+        Args:
+            expired: Удалить просроченные и пустые записи
+            max_bytes: Предельный размер (по умолчанию self.max_bytes);
+                самые давно читавшиеся записи вытесняются
+
+        Returns:
+            Количество удаленных записей по причинам
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        removed = {"expired": 0, "empty": 0, "evicted": 0}
+        now = time.time()
+
+        entries = []
+        for func_name, path, stat in self._entries():
+            if expired and now - stat.st_mtime > self.ttl(func_name):
+                self._remove(path)
+                removed["expired"] += 1
+            elif expired and self._is_empty(path):
+                self._remove(path)
+                removed["empty"] += 1
+            else:
+                entries.append((path, stat))
+
+        total = sum(stat.st_size for _, stat in entries)
+        if max_bytes is not None and total > max_bytes:
+            for path, stat in sorted(entries, key=lambda entry: entry[1].st_atime):
+                if total <= max_bytes:
+                    break
+                self._remove(path)
+                total -= stat.st_size
+                removed["evicted"] += 1
+
+        return removed
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых одновременных вызовов (single-flight)
+
+    Пока вызов с ключом выполняется, остальные вызовы с тем же ключом не
+    запускают работу повторно, а ждут и получают тот же результат (или то
+    же исключение). Счетчики по имени показывают, сколько вызовов было
+    объединено.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._calls: Dict[str, int] = {}
+        self._shared: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def do(self, name: str, key: str, compute: Callable):
+        """
+        Результат compute() для ключа, общий для одновременных вызовов
+
+        Args:
+            name: Имя операции для счетчиков
+            key: Ключ, по которому вызовы считаются одинаковыми
+        """
+        with self._lock:
+            self._calls[name] = self._calls.get(name, 0) + 1
+            future = self._inflight.get((name, key))
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[(name, key)] = future
+            else:
+                self._shared[name] = self._shared.get(name, 0) + 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop((name, key), None)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Имя операции -> количество вызовов и объединенных вызовов"""
+        with self._lock:
+            return {
+                name: {"calls": calls, "shared": self._shared.get(name, 0)}
+                for name, calls in sorted(self._calls.items())
+            }
+
+
+SINGLE_FLIGHT = SingleFlight()
+
+
+def print_dedup_stats() -> None:
+    """Вывод счетчиков объединенных запросов"""
+    shared = {name: item for name, item in SINGLE_FLIGHT.stats().items() if item["shared"]}
+    if not shared:
+        return
+    print("\n🔗 Объединено одинаковых запросов:")
+    for name, item in shared.items():
+        print(f"  {name}: {item['shared']} из {item['calls']}")
+
+
+RESULT_CACHE = ResultCache()
+
+
+def cache_main(argv: List[str]) -> None:
+    """Команды обслуживания кэша: ``cache stats`` и ``cache prune``"""
+    arg_parser = argparse.ArgumentParser(prog="vin_parser.py cache", description="Cache maintenance")
+    arg_parser.add_argument("command", choices=["stats", "prune"])
+    arg_parser.add_argument("--max-size-mb", type=float, default=None, help="Evict least recently used entries above this size (prune)")
+    args = arg_parser.parse_args(argv)
+
+    if args.command == "prune":
+        max_bytes = int(args.max_size_mb * 1024 * 1024) if args.max_size_mb is not None else None
+        removed = RESULT_CACHE.prune(expired=True, max_bytes=max_bytes)
+        print(f"🧹 Удалено: просроченных {removed['expired']}, пустых {removed['empty']}, вытеснено {removed['evicted']}")
+
+    stats = RESULT_CACHE.stats()
+    print(f"\n📦 Кэш ({RESULT_CACHE.root}):")
+    for func_name, item in stats.items():
+        print(
+            f"  {func_name}: {item['entries']} записей, {item['bytes'] / 1024:.1f} КБ, "
+            f"просрочено {item['expired']}, пустых {item['empty']}, TTL {item['ttl'] / 3600:.0f} ч"
+        )
+    total = sum(item["bytes"] for item in stats.values())
+    print(f"  Всего: {sum(item['entries'] for item in stats.values())} записей, {total / 1024 / 1024:.1f} МБ")
+
+# ==================== АРХИВ ЗАПРОСОВ (ЗАПИСЬ И ВОСПРОИЗВЕДЕНИЕ) ====================
+
+class NetworkArchive:
+    """
+    Архив ответов ГИБДД и страниц Drom/Drive2 для воспроизведения без сети
+
+    Содержимое хранится по sha256 в ``objects/ab/<sha256>`` (сжатое zlib),
+    поэтому одинаковые страницы разных VIN занимают место один раз.
+    ``index.jsonl`` связывает ключ запроса с объектом; при повторной записи
+    ключа действует последняя строка. Ключи не зависят от базовых адресов:
+    ``gibdd:<VIN>``, ``page:<домен><путь>``, ``additional:<VIN>``.
+
+    В режиме record ответы сохраняются по мере загрузки, в режиме replay
+    отдаются из архива без сети и браузера (отсутствующие - как пустые).
+    """
+
+    MODES = ("record", "replay")
+
+    def __init__(self, root: str, mode: str = "record"):
+        if mode not in self.MODES:
+            raise ValueError(f"mode must be one of {self.MODES}")
+        self.root = root
+        self.mode = mode
+        self.index_path = os.path.join(root, "index.jsonl")
+        self._index: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.replayed = 0
+        self.missing = 0
+
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._index[entry["key"]] = entry
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def put(self, key: str, content: bytes, **meta) -> None:
+        """Запись содержимого под ключом (объект пишется, только если его еще нет)"""
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(zlib.compress(content, 6))
+            os.replace(tmp_path, path)
+
+        entry = {"key": key, "sha256": digest, "ts": datetime.now().isoformat(timespec="seconds"), **meta}
+        with self._lock:
+            self._index[key] = entry
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.recorded += 1
+
+    def get(self, key: str) -> Optional[Tuple[Dict, bytes]]:
+        """Запись и содержимое по ключу (None, если ключа нет в архиве)"""
+        with self._lock:
+            entry = self._index.get(key)
+        if entry is None:
+            with self._lock:
+                self.missing += 1
+            log.warning("⚠️ Нет в архиве: %s", key)
+            return None
+        with open(self._object_path(entry["sha256"]), "rb") as f:
+            content = zlib.decompress(f.read())
+        with self._lock:
+            self.replayed += 1
+        return entry, content
+
+    def put_json(self, key: str, value) -> None:
+        self.put(key, json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+
+    def get_json(self, key: str):
+        found = self.get(key)
+        return json.loads(found[1]) if found else None
+
+    @staticmethod
+    def page_key(domain: str, url: str) -> str:
+        """Ключ страницы: домен и путь с параметрами, без хоста"""
+        parts = urlsplit(url)
+        return f"page:{domain}{parts.path or '/'}" + (f"?{parts.query}" if parts.query else "")
+
+    def put_page(self, domain: str, url: str, status: int, html: str) -> None:
+        self.put(self.page_key(domain, url), (html or "").encode("utf-8"), status=status)
+
+    def get_page(self, domain: str, url: str) -> Optional[Dict]:
+        """Страница в формате fetch_listing (None, если ее нет в архиве)"""
+        found = self.get(self.page_key(domain, url))
+        if found is None:
+            return None
+        entry, content = found
+        return {"status": entry.get("status", 200), "html": content.decode("utf-8"), "challenge": False}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "recorded": self.recorded,
+                "replayed": self.replayed,
+                "missing": self.missing
+            }
+
+
+# Активный архив (None - обычная работа с сетью); см. set_archive
+ARCHIVE: Optional[NetworkArchive] = None
+
+
+def set_archive(archive: Optional[NetworkArchive]) -> None:
+    """
+    Включение записи или воспроизведения
+
+    Пока архив активен, RESULT_CACHE отключен: при записи каждый ответ
+    загружается из сети, при воспроизведении разбор и ранжирование
+    выполняются заново по сохраненным страницам.
+    """
+    global ARCHIVE
+    ARCHIVE = archive
+    RESULT_CACHE.enabled = archive is None
+
+
+def replaying() -> bool:
+    return ARCHIVE is not None and ARCHIVE.replaying
+
+
+def recording() -> bool:
+    return ARCHIVE is not None and not ARCHIVE.replaying
+
+
+def print_archive_stats() -> None:
+    """Вывод счетчиков архива (если он включен)"""
+    if ARCHIVE is None:
+        return
+    stats = ARCHIVE.stats()
+    print(f"\n🗄️ Архив ({ARCHIVE.root}): записей {stats['entries']}, записано {stats['recorded']}, "
+          f"воспроизведено {stats['replayed']}, нет в архиве {stats['missing']}")
+
+
+def archived_json(key: str, compute: Callable):
+    """
+    compute() с сохранением результата в архив
+
+    При воспроизведении compute() не вызывается: значение берется из
+    архива (None, если его там нет). Без архива - просто compute().
+    """
+    if replaying():
+        return ARCHIVE.get_json(key)
+    value = compute()
+    if recording() and value is not None:
+        ARCHIVE.put_json(key, value)
+    return value
+
+# ==================== ОГРАНИЧЕНИЕ ЧАСТОТЫ ЗАПРОСОВ ====================
+
+class TokenBucket:
+    """
+    Token bucket с адаптивным замедлением
+
+    Токены пополняются со скоростью ``rate`` в секунду до ``burst``. При
+    сигнале блокировки (HTTP 429, страница Cloudflare) скорость снижается
+    вдвое и включается пауза с экспоненциальным ростом; успешные запросы
+    постепенно возвращают исходную скорость.
+    """
+
+    MIN_RATE_FACTOR = 0.1
+    INITIAL_BACKOFF = 5.0
+    MAX_BACKOFF = 300.0
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        if burst < 1:
+            raise ValueError("burst must be >= 1")
+
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._rate_factor = 1.0
+        self._backoff = 0.0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def effective_rate(self) -> float:
+        """Текущая скорость с учетом адаптивного замедления"""
+        return self.rate * self._rate_factor
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.burst, self._tokens + elapsed * self.effective_rate)
+
+    def acquire(self) -> float:
+        """
+        Получение токена с ожиданием
+
+        Returns:
+            Время ожидания в секундах
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.effective_rate)
+            time.sleep(wait)
+            waited += wait
+
+    def report_success(self) -> None:
+        """Успешный запрос: постепенное восстановление скорости"""
+        with self._lock:
+            self._backoff = 0.0
+            self._rate_factor = min(1.0, self._rate_factor + 0.1)
+
+    def report_throttled(self, retry_after: float = None) -> float:
+        """
+        Сайт ограничил запросы: замедление и пауза
+
+        Args:
+            retry_after: Пауза из заголовка Retry-After (если есть)
+
+        Returns:
+            Длительность назначенной паузы в секундах
+        """
+        with self._lock:
+            self._rate_factor = max(self.MIN_RATE_FACTOR, self._rate_factor / 2)
+            self._backoff = min(self.MAX_BACKOFF, max(self.INITIAL_BACKOFF, self._backoff * 2))
+            pause = max(self._backoff, retry_after or 0.0)
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            self._tokens = 0.0
+            return pause
+
+
+class DomainScheduler:
+    """Общий планировщик запросов с отдельным token bucket для каждого домена"""
+
+    # домен -> (запросов в секунду, размер пачки)
+    DEFAULT_LIMITS = {
+        "drom.ru": (0.5, 2),
+        "drive2.ru": (0.5, 2),
+        "gibdd": (2.0, 5)
+    }
+
+    def __init__(self, limits: Dict[str, Tuple[float, int]] = None):
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        for domain, (rate, burst) in {**self.DEFAULT_LIMITS, **(limits or {})}.items():
+            self.configure(domain, rate, burst)
+
+    def configure(self, domain: str, rate: float, burst: int = 1) -> None:
+        """Установка лимита для домена"""
+        with self._lock:
+            self._buckets[domain] = TokenBucket(rate, burst)
+
+    def bucket(self, domain: str) -> TokenBucket:
+        """Token bucket домена (неизвестные домены получают 1 запрос/с)"""
+        with self._lock:
+            if domain not in self._buckets:
+                self._buckets[domain] = TokenBucket(1.0, 1)
+            return self._buckets[domain]
+
+    def acquire(self, domain: str) -> float:
+        """Ожидание разрешения на запрос к домену"""
+        return self.bucket(domain).acquire()
+
+    def report_success(self, domain: str) -> None:
+        self.bucket(domain).report_success()
+
+    def report_throttled(self, domain: str, retry_after: float = None) -> float:
+        pause = self.bucket(domain).report_throttled(retry_after)
+        log.warning("⏳ %s: ограничение запросов, пауза %.0f с", domain, pause)
+        return pause
+
+
+def parse_rate_spec(spec: str) -> Tuple[str, float, int]:
+    """Разбор лимита вида ``drom.ru=0.5:2`` (ДОМЕН=СКОРОСТЬ[:ПАЧКА])"""
+    try:
+        domain, value = spec.split("=", 1)
+        rate, _, burst = value.partition(":")
+        return domain.strip(), float(rate), int(burst) if burst else 1
+    except ValueError:
+        raise ValueError(f"Invalid rate spec '{spec}', expected DOMAIN=RATE[:BURST]")
+
+
+SCHEDULER = DomainScheduler()
+
+# ==================== СПРАВОЧНИК МАРОК И МОДЕЛЕЙ ====================
+
+VEHICLE_MAPPINGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vehicle_mappings.json")
+
+# Объем двигателя в названии модели ГИБДД ("МИЦУБИСИ АУТЛЕНДЕР 2.0")
+ENGINE_VOLUME_PART = re.compile(r'^\d+[.,]\d+$')
+URL_SEPARATORS = re.compile(r'[\s_]+')
+
+
+class VehicleResolver:
+    """
+    Нормализация марок и моделей ГИБДД и построение их имен в URL
+
+    Таблицы загружаются один раз из JSON-файла (``vehicle_mappings.json``):
+
+    - ``brands``: марка из ГИБДД (верхний регистр) -> название марки;
+    - ``models``: модель из ГИБДД (верхний регистр) -> имя модели в URL;
+    - ``brand_url`` / ``model_url``: исключения для имен в URL drom.ru;
+    - ``drive2_brand_url``: марки, у которых имя в URL drive2.ru другое;
+    - ``wmi``: код производителя (первые 3 символа VIN) -> марка;
+    - ``transliteration``: транслитерация кириллицы для слов вне справочника.
+
+    Результаты поиска мемоизируются, поэтому повторяющиеся модели в
+    большом пакете не пересчитываются.
+    """
+
+    CACHE_SIZE = 4096
+
+    def __init__(self, path: str = VEHICLE_MAPPINGS_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        self.brands: Dict[str, str] = {key.upper(): value for key, value in data.get("brands", {}).items()}
+        self.models: Dict[str, str] = {key.upper(): value for key, value in data.get("models", {}).items()}
+        self.brand_url: Dict[str, str] = data.get("brand_url", {})
+        self.model_url: Dict[str, str] = data.get("model_url", {})
+        self.drive2_brand_url: Dict[str, str] = data.get("drive2_brand_url", {})
+        self.wmi: Dict[str, str] = data.get("wmi", {})
+        self._transliteration = str.maketrans(data.get("transliteration", {}))
+        # Самая длинная марка в словах: "ЛЕНД РОВЕР", "ГРЕЙТ ВОЛЛ"
+        self._max_brand_words = max((len(key.split()) for key in self.brands), default=1)
+        self._max_model_words = max((len(key.split()) for key in self.models), default=1)
+
+        self.split_model = lru_cache(maxsize=self.CACHE_SIZE)(self._split_model)
+        self.brand_for_url = lru_cache(maxsize=self.CACHE_SIZE)(self._brand_for_url)
+        self.model_for_url = lru_cache(maxsize=self.CACHE_SIZE)(self._model_for_url)
+
+    def transliterate(self, text: str) -> str:
+        """Транслитерация кириллицы в нижнем регистре"""
+        return text.lower().translate(self._transliteration)
+
+    def _slug(self, text: str) -> str:
+        return URL_SEPARATORS.sub('-', self.transliterate(text.strip()))
+
+    def _split_model(self, full_model: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Разбор названия модели ГИБДД на марку и модель
+
+        Объем двигателя отбрасывается: "МИЦУБИСИ АУТЛЕНДЕР 2.0" ->
+        ("Mitsubishi", "Аутлендер").
+        """
+        parts = full_model.strip().split()
+        if not parts:
+            return None, None
+
+        brand = None
+        brand_words = 1
+        for words in range(min(self._max_brand_words, len(parts)), 0, -1):
+            brand = self.brands.get(' '.join(parts[:words]).upper())
+            if brand:
+                brand_words = words
+                break
+        if brand is None:
+            brand = self.transliterate(parts[0]).capitalize()
+
+        # Модель - все остальное кроме марки и объема двигателя
+        model_parts = [part.capitalize() for part in parts[brand_words:] if not ENGINE_VOLUME_PART.match(part)]
+        if model_parts:
+            model = ' '.join(model_parts)
+        else:
+            model = parts[brand_words] if len(parts) > brand_words else None
+        return brand, model
+
+    def _brand_for_url(self, brand: str) -> str:
+        """Имя марки в URL drom.ru"""
+        slug = self._slug(brand)
+        return self.brand_url.get(slug, slug)
+
+    def _model_for_url(self, model: str) -> str:
+        """
+        Имя модели в URL
+
+        Ищется самая длинная известная справочнику последовательность слов
+        в любом месте названия (при равной длине - самая левая), и берется
+        только ее имя: индексы, поколения и комплектации вокруг нее
+        отбрасываются ("Ленд Крузер Прадо 150" -> land-cruiser-prado,
+        "219010 Лада Гранта" -> granta). Если известного имени нет, слова
+        транслитерируются.
+        """
+        words = model.upper().split()
+        slug = None
+        for length in range(min(self._max_model_words, len(words)), 0, -1):
+            for start in range(len(words) - length + 1):
+                slug = self.models.get(' '.join(words[start:start + length]))
+                if slug:
+                    break
+            if slug:
+                break
+        if slug is None:
+            slug = '-'.join(self._slug(word) for word in words)
+        return self.model_url.get(slug, slug)
+
+    def drive2_brand_for_url(self, brand_for_url: str) -> str:
+        """Имя марки в URL drive2.ru по имени в URL drom.ru"""
+        return self.drive2_brand_url.get(brand_for_url, brand_for_url)
+
+
+RESOLVER = VehicleResolver()
+
+# ==================== ДЕКОДЕР VIN ====================
+
+VIN_PATTERN = re.compile(r'^[A-HJ-NPR-Z0-9]{17}$')
+
+# Значения символов и веса позиций для контрольной цифры (ISO 3779 / 49 CFR 565)
+VIN_CHAR_VALUES = {
+    **{str(digit): digit for digit in range(10)},
+    "A": 1, "B": 2, "C": 3, "D": 4, "E": 5, "F": 6, "G": 7, "H": 8,
+    "J": 1, "K": 2, "L": 3, "M": 4, "N": 5, "P": 7, "R": 9,
+    "S": 2, "T": 3, "U": 4, "V": 5, "W": 6, "X": 7, "Y": 8, "Z": 9
+}
+VIN_WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+# Коды модельного года (10-й символ), цикл 30 лет начиная с 1980
+VIN_YEAR_CODES = "ABCDEFGHJKLMNPRSTVWXY123456789"
+
+
+@dataclass
+class DecodedVin:
+    """Данные, извлеченные из VIN без внешних запросов"""
+    vin: str
+    valid: bool
+    error: Optional[str] = None
+    wmi: Optional[str] = None
+    region: Optional[str] = None
+    brand: Optional[str] = None
+    model_year: Optional[int] = None
+    check_digit_ok: Optional[bool] = None
+
+
+class VinDecoder:
+    """
+    Офлайн-декодер VIN: производитель по WMI, контрольная цифра, модельный год
+
+    Контрольная цифра обязательна только для Северной Америки и Китая,
+    для остальных VIN она проверяется, но ошибка не делает VIN неверным.
+    Модельный год там же однозначен (7-й символ различает циклы), в
+    остальных случаях берется последний год цикла, не превышающий
+    следующий календарный год.
+    """
+
+    REGIONS = (
+        ("ABCDEFGH", "Африка"),
+        ("JKLMNPR", "Азия"),
+        ("STUVWXYZ", "Европа"),
+        ("12345", "Северная Америка"),
+        ("67", "Океания"),
+        ("89", "Южная Америка")
+    )
+
+    def __init__(self, wmi: Dict[str, str], strict_wmi: bool = False):
+        """
+        Args:
+            wmi: Таблица WMI (первые 3 символа VIN) -> марка
+            strict_wmi: Считать неверными VIN с производителем вне таблицы
+        """
+        self.wmi = wmi
+        self.strict_wmi = strict_wmi
+
+    @staticmethod
+    def check_digit(vin: str) -> str:
+        """Ожидаемая контрольная цифра (9-й символ) VIN"""
+        total = sum(VIN_CHAR_VALUES[char] * weight for char, weight in zip(vin, VIN_WEIGHTS))
+        remainder = total % 11
+        return "X" if remainder == 10 else str(remainder)
+
+    def region(self, vin: str) -> Optional[str]:
+        for chars, name in self.REGIONS:
+            if vin[0] in chars:
+                return name
+        return None
+
+    @staticmethod
+    def model_year(vin: str, north_american: bool) -> Optional[int]:
+        """Модельный год по 10-му символу"""
+        code = vin[9]
+        if code not in VIN_YEAR_CODES:
+            return None
+        year = 1980 + VIN_YEAR_CODES.index(code)
+        if north_american:
+            # Буква в 7-й позиции означает цикл 2010-2039
+            return year + 30 if vin[6].isalpha() else year
+        while year + 30 <= datetime.now().year + 1:
+            year += 30
+        return year
+
+    def decode(self, vin: str) -> DecodedVin:
+        """Разбор VIN; valid=False означает, что запрашивать ГИБДД не нужно"""
+        vin = vin.upper().strip()
+        if not VIN_PATTERN.match(vin):
+            return DecodedVin(vin=vin, valid=False, error="Неверный формат VIN-кода")
+
+        wmi = vin[:3]
+        brand = self.wmi.get(wmi)
+        region = self.region(vin)
+        north_american = region == "Северная Америка"
+        check_digit_ok = vin[8] == self.check_digit(vin)
+
+        decoded = DecodedVin(
+            vin=vin,
+            valid=True,
+            wmi=wmi,
+            region=region,
+            brand=brand,
+            model_year=self.model_year(vin, north_american),
+            check_digit_ok=check_digit_ok
+        )
+        if not check_digit_ok and (north_american or vin[0] == "L"):
+            decoded.valid = False
+            decoded.error = "Неверная контрольная цифра VIN"
+        elif brand is None and self.strict_wmi:
+            decoded.valid = False
+            decoded.error = f"Неизвестный производитель (WMI {wmi})"
+        return decoded
+
+
+VIN_DECODER = VinDecoder(RESOLVER.wmi)
+
 # ==================== API ГИБДД ====================
 
-@request(
-    cache=True,
-    max_retry=5
+# Здесь должен быть ваш реальный endpoint API
+# Это пример структуры запроса (VIN_PARSER_GIBDD_URL или --gibdd-url
+# переопределяют адрес, например для локального стенда benchmarks/)
+GIBDD_API_URL = os.environ.get("VIN_PARSER_GIBDD_URL") or "https://api.your-service.ru/gibdd"  # Замените на реальный URL
+
+
+def gibdd_headers(api_key: str = None) -> Dict:
+    """Заголовки запроса к API ГИБДД"""
+    headers = {
+        "Content-Type": "application/json",
+        "Accept": "application/json"
+    }
+
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+
+    return headers
+
+
+def gibdd_payload(vin: str) -> Dict:
+    """Тело запроса к API ГИБДД для одного VIN"""
+    return {
+        "vin": vin.upper(),
+        "method": "gibdd"
+    }
+
+
+def retry_after_seconds(response) -> Optional[float]:
+    """Значение заголовка Retry-After в секундах (если задано числом)"""
+    retry_after = response.headers.get("Retry-After")
+    return float(retry_after) if retry_after and retry_after.isdigit() else None
+
+
+# Ответы, после которых запрос к ГИБДД повторяется
+GIBDD_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GibddTemporaryError(Exception):
+    """Временная ошибка API ГИБДД (429, 5xx или ответ не в JSON), запрос повторяется"""
+
+
+@request(
+    max_retry=5,
+    raise_exception=True,
+    close_on_crash=True
+)
+def request_gibdd_data(request: Request, vin: str, api_key: str = None) -> Optional[Dict]:
+    """
+    Запрос к API ГИБДД с повторами декоратора
+
+    Временные ошибки (сеть, 429, 5xx, HTML вместо JSON) выбрасываются,
+    чтобы декоратор повторил запрос; после последней попытки исключение
+    пробрасывается без ожидания ввода.
+
+    Returns:
+        JSON ответа или None при неустранимой ошибке API (4xx)
+    """
+    SCHEDULER.acquire("gibdd")
+    with METRICS.timer("gibdd_request", client="sync"):
+        response = request.post(
+            GIBDD_API_URL,
+            json=gibdd_payload(vin),
+            headers=gibdd_headers(api_key),
+            timeout=30
+        )
+    METRICS.inc("gibdd_responses", status=response.status_code)
+
+    if response.status_code == 429:
+        SCHEDULER.report_throttled("gibdd", retry_after_seconds(response))
+    if response.status_code in GIBDD_RETRY_STATUSES:
+        raise GibddTemporaryError(f"Ошибка API: {response.status_code}")
+    if response.status_code != 200:
+        log.warning("Ошибка API: %s", response.status_code)
+        return None
+
+    try:
+        data = response.json()
+    except ValueError:
+        # Капча или HTML-страница ошибки вместо JSON
+        raise GibddTemporaryError("Ответ API ГИБДД не в формате JSON")
+    SCHEDULER.report_success("gibdd")
+    return data
+
+
+def get_gibdd_data(vin: str, api_key: str = None) -> Optional[Dict]:
+    """
+    Получение данных из API ГИБДД
+
+    Args:
+        vin: VIN-код автомобиля
+        api_key: API ключ для доступа к сервису (если требуется)
+
+    Returns:
+        JSON ответа или None, если данные не получены после повторов
+    """
+    try:
+        return request_gibdd_data(vin, api_key)
+    except Exception as e:
+        log.warning("Ошибка при запросе к API ГИБДД: %s", e)
+        return None
+
+def parse_gibdd_response(gibdd_data: Dict) -> Optional[VehicleInfo]:
+    """
+    Парсинг ответа от API ГИБДД в структуру VehicleInfo
+    """
+    
+    if not gibdd_data or not gibdd_data.get('success'):
+        log.warning("✗ Нет данных ГИБДД или запрос неуспешен")
+        return None
+    
+    response = gibdd_data.get('response', {})
+    if not response.get('found', False):
+        log.warning("✗ Автомобиль не найден в базе ГИБДД")
+        return None
+        
+    vehicle = response.get('vehicle', {})
+    passport = response.get('vehiclePassport', {})
+    ownership = response.get('ownershipPeriod', [])
+    
+    # Проверяем обязательные поля
+    if not vehicle.get('vin'):
+        log.warning("✗ Отсутствует VIN в ответе ГИБДД")
+        return None
+    
+    # Извлекаем марку и модель из полного названия (например: "МИЦУБИСИ АУТЛЕНДЕР 2.0")
+    brand, model = RESOLVER.split_model(vehicle.get('model') or '')
+    
+    # Преобразуем историю владения
+    ownership_history = []
+    for period in ownership:
+        ownership_entry = {
+            'type': period.get('simplePersonTypeInfo', ''),
+            'from': period.get('from', ''),
+            'to': period.get('to', ''),
+            'period': period.get('period', ''),
+            'operation': period.get('lastOperationInfo', '')
+        }
+        ownership_history.append(ownership_entry)
+    
+    # Создаем объект VehicleInfo
+    try:
+        vehicle_info = VehicleInfo(
+            vin=vehicle.get('vin', ''),
+            brand=brand,
+            model=model,
+            year=int(vehicle.get('year', 0)) if vehicle.get('year') else None,
+            engine_volume=vehicle.get('engineVolume', ''),
+            power_hp=vehicle.get('powerHp', ''),
+            power_kwt=vehicle.get('powerKwt', ''),
+            color=vehicle.get('color', ''),
+            body_number=vehicle.get('bodyNumber', ''),
+            engine_number=vehicle.get('engineNumber', ''),
+            category=vehicle.get('category', ''),
+            type_info=vehicle.get('typeinfo', ''),
+            pts_number=passport.get('number', ''),
+            pts_issue=passport.get('issue', ''),
+            ownership_history=ownership_history,
+            technical_specs={
+                'engine_volume': vehicle.get('engineVolume', ''),
+                'power_hp': vehicle.get('powerHp', ''),
+                'power_kwt': vehicle.get('powerKwt', ''),
+                'category': vehicle.get('category', ''),
+                'type': vehicle.get('typeinfo', '')
+            }
+        )
+        
+        return vehicle_info
+        
+    except Exception as e:
+        log.warning("✗ Ошибка при создании VehicleInfo: %s", e)
+        return None
+
+# ==================== АСИНХРОННЫЙ КЛИЕНТ ГИБДД ====================
+
+class AsyncGibddClient:
+    """
+    Асинхронный клиент API ГИБДД для пакетных запросов
+
+    Корутины управляют очередью VIN и паузами, а сами HTTP-запросы
+    выполняются блокирующим requests.Session в потоках через
+    asyncio.to_thread: одновременно идет не больше ``concurrency``
+    запросов. Session держит пул keep-alive соединений. Временные ошибки
+    (сеть, 429, 5xx, ответ не в JSON) повторяются с экспоненциальной
+    паузой и случайным разбросом. Частоту запросов задает SCHEDULER
+    (домен "gibdd").
+
+    Если провайдер поддерживает пакетные запросы, ``batch_size > 1``
+    отправляет несколько VIN одним запросом ``{"vins": [...]}``; ответ
+    должен быть списком ответов в порядке VIN или словарем VIN -> ответ.
+    """
+
+    RETRY_STATUSES = GIBDD_RETRY_STATUSES
+
+    def __init__(
+        self,
+        api_key: str = None,
+        concurrency: int = 10,
+        batch_size: int = 1,
+        max_attempts: int = 5,
+        timeout: float = 30,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        api_url: str = None
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+
+        self.api_key = api_key
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.api_url = api_url or GIBDD_API_URL
+        self._session = None
+
+    def __enter__(self) -> 'AsyncGibddClient':
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._session.headers.update(gibdd_headers(self.api_key))
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _backoff(self, attempt: int) -> float:
+        """Пауза перед повтором: экспонента с полным случайным разбросом"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _post(self, payload: Dict) -> 'requests.Response':
+        SCHEDULER.acquire("gibdd")
+        with METRICS.timer("gibdd_request", client="async"):
+            response = self._session.post(self.api_url, json=payload, timeout=self.timeout)
+        METRICS.inc("gibdd_responses", status=response.status_code)
+        return response
+
+    async def _request(self, payload: Dict):
+        """POST с повторами; возвращает JSON ответа или None"""
+        for attempt in range(self.max_attempts):
+            try:
+                response = await asyncio.to_thread(self._post, payload)
+            except requests.RequestException as e:
+                log.warning("Ошибка при запросе к API ГИБДД: %s", e)
+            else:
+                if response.status_code == 200:
+                    try:
+                        data = response.json()
+                    except ValueError:
+                        # Капча или HTML-страница ошибки: повторяем как временную ошибку
+                        log.warning("Ответ API ГИБДД не в формате JSON")
+                    else:
+                        SCHEDULER.report_success("gibdd")
+                        return data
+                elif response.status_code not in self.RETRY_STATUSES:
+                    log.warning("Ошибка API: %s", response.status_code)
+                    return None
+                elif response.status_code == 429:
+                    SCHEDULER.report_throttled("gibdd", retry_after_seconds(response))
+
+            if attempt + 1 < self.max_attempts:
+                await asyncio.sleep(self._backoff(attempt))
+
+        return None
+
+    async def _fetch_chunk(self, vins: List[str]) -> Dict[str, Optional[Dict]]:
+        if len(vins) == 1:
+            return {vins[0]: await self._request(gibdd_payload(vins[0]))}
+
+        data = await self._request({"vins": vins, "method": "gibdd"})
+        if isinstance(data, list):
+            if len(data) != len(vins):
+                log.warning("⚠️ Пакетный ответ ГИБДД: %s ответов на %s VIN", len(data), len(vins))
+            # VIN без ответа получает None, а не теряется
+            return {vin: (data[i] if i < len(data) else None) for i, vin in enumerate(vins)}
+        if isinstance(data, dict):
+            return {vin: data.get(vin) for vin in vins}
+        return {vin: None for vin in vins}
+
+    async def fetch_many(self, vins, on_result=None) -> Dict[str, Optional[Dict]]:
+        """
+        Запрос ГИБДД для набора VIN
+
+        Args:
+            vins: Итерируемый набор VIN-кодов
+            on_result: Необязательный callback(vin, response) для каждого VIN
+
+        Returns:
+            Словарь VIN -> ответ ГИБДД (None при ошибке)
+        """
+        if self._session is None:
+            raise RuntimeError("AsyncGibddClient must be used as a context manager")
+
+        results = {}
+        vin_iter = iter(vins)
+        seen = set()
+
+        def next_chunk() -> List[str]:
+            chunk = []
+            for vin in vin_iter:
+                vin = vin.upper().strip()
+                if vin in seen:
+                    continue
+                seen.add(vin)
+                chunk.append(vin)
+                if len(chunk) >= self.batch_size:
+                    break
+            return chunk
+
+        async def worker() -> None:
+            while True:
+                chunk = next_chunk()
+                if not chunk:
+                    return
+                for vin, response in (await self._fetch_chunk(chunk)).items():
+                    results[vin] = response
+                    RESULT_CACHE.put("get_gibdd_data", {"vin": vin}, response)
+                    if recording() and response is not None:
+                        ARCHIVE.put_json(f"gibdd:{vin}", response)
+                    if on_result:
+                        on_result(vin, response)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        return results
+
+
+def fetch_gibdd_batch(vins, api_key: str = None, concurrency: int = 10, batch_size: int = 1, on_result=None) -> Dict[str, Optional[Dict]]:
+    """
+    Синхронная обертка над AsyncGibddClient для пакета VIN без парсинга сайтов
+
+    Args:
+        vins: Итерируемый набор VIN-кодов
+        api_key: API ключ для ГИБДД
+        concurrency: Количество одновременных запросов
+        batch_size: Количество VIN в одном запросе (если поддерживается API)
+        on_result: Необязательный callback(vin, response)
+    """
+    if replaying():
+        results = {}
+        for vin in vins:
+            vin = vin.upper().strip()
+            if vin not in results:
+                results[vin] = ARCHIVE.get_json(f"gibdd:{vin}")
+                if on_result:
+                    on_result(vin, results[vin])
+        return results
+
+    async def run() -> Dict[str, Optional[Dict]]:
+        with AsyncGibddClient(api_key=api_key, concurrency=concurrency, batch_size=batch_size) as client:
+            return await client.fetch_many(vins, on_result=on_result)
+
+    return asyncio.run(run())
+
+# ==================== ДОПОЛНИТЕЛЬНЫЕ ИСТОЧНИКИ ДАННЫХ ====================
+
+@browser(
+    block_images=True,
+    reuse_driver=True,
+    max_retry=3
 )
-def get_gibdd_data(request: Request, vin: str, api_key: str = None) -> Dict:
+def get_additional_info(driver: Driver, data: Dict) -> Dict:
     """
-    Получение данных из API ГИБДД
+    Получение дополнительной информации об автомобиле
     
     Args:
-        vin: VIN-код автомобиля
-        api_key: API ключ для доступа к сервису (если требуется)
+        data: Dict содержащий vehicle_info (словарь или объект VehicleInfo)
     """
+    # Валидация входных данных
+    validate_required_keys(data, ["vehicle_info"], "get_additional_info")
+    
+    vehicle_info = data["vehicle_info"]
+    
+    # Проверяем что vehicle_info корректен
+    if not validate_vehicle_info(vehicle_info, "get_additional_info"):
+        return {}
+    
+    # Получаем данные в зависимости от типа vehicle_info
+    if isinstance(vehicle_info, dict):
+        brand = vehicle_info.get('brand')
+        model = vehicle_info.get('model')
+    else:
+        brand = vehicle_info.brand
+        model = vehicle_info.model
+    
+    log.info("🔍 Поиск дополнительной информации для %s %s", brand, model)
+    
+    # Здесь может быть логика получения дополнительных данных
+    # Например, проверка на ДТП, угоны, ограничения и т.д.
+    
+    additional_info = {
+        "accidents": "Нет данных",
+        "mileage": "Нет данных", 
+        "restrictions": "Нет данных",
+        "theft_history": "Нет данных"
+    }
+    
+    # Placeholder для реальной логики поиска дополнительной информации
+    # В будущем здесь можно добавить запросы к различным базам данных
     
+    return additional_info
+
+# ==================== КЛЮЧ МОДЕЛИ ====================
+
+def normalize_engine_volume(engine_volume) -> Optional[str]:
+    """Нормализация объема двигателя ("1998.0" -> "1998", "2,0" -> "2")"""
+    if engine_volume in (None, ''):
+        return None
+    value = str(engine_volume).strip().replace(',', '.')
+    if value.endswith('.0'):
+        value = value[:-2]
+    return value or None
+
+
+def build_model_key(vehicle_info) -> Dict:
+    """Построение ключа модели для поиска отзывов и бортжурналов.
+
+    Ключ содержит только нормализованные ``(brand_for_url, model_for_url,
+    year, engine_volume)``, поэтому все VIN одной модели попадают в одну
+    запись кэша botasaurus, а VIN, номер ПТС и история владения в хэш не
+    входят.
+
+    Args:
+        vehicle_info: Словарь или объект VehicleInfo.
+
+    Returns:
+        Словарь с ключом модели.
+    """
+    if isinstance(vehicle_info, dict):
+        brand = vehicle_info.get('brand')
+        model = vehicle_info.get('model')
+        year = vehicle_info.get('year')
+        engine_volume = vehicle_info.get('engine_volume')
+    else:
+        brand = vehicle_info.brand
+        model = vehicle_info.model
+        year = vehicle_info.year
+        engine_volume = vehicle_info.engine_volume
+
+    return {
+        "brand_for_url": RESOLVER.brand_for_url(brand),
+        "model_for_url": RESOLVER.model_for_url(model),
+        "year": int(year) if year else None,
+        "engine_volume": normalize_engine_volume(engine_volume)
+    }
+
+
+def drive2_brand_for_url(brand_for_url: str) -> str:
+    """Название марки в URL Drive2 (отличается от Drom, например для Mercedes-Benz)"""
+    return RESOLVER.drive2_brand_for_url(brand_for_url)
+
+
+def score_relevance(items: List[Dict], year: Optional[int], engine_volume: Optional[str]) -> List[Dict]:
+    """Оценка релевантности отзывов для конкретного автомобиля.
+
+    Выполняется после получения общих для модели результатов, поэтому
+    кэшированные карточки не зависят от конкретного VIN.
+
+    Args:
+        items: Карточки отзывов с полями ``car_info``/``specs``.
+        year: Год выпуска автомобиля.
+        engine_volume: Нормализованный объем двигателя.
+
+    Returns:
+        Карточки, отсортированные по убыванию ``relevance_score``.
+    """
+    for item in items:
+        info_text = item.get('car_info') or item.get('specs') or ''
+        relevance_score = 0
+
+        if year and str(year) in info_text:
+            item['year_match'] = True
+            relevance_score += 2
+        if engine_volume and engine_volume in info_text:
+            item['engine_match'] = True
+            relevance_score += 1
+
+        item['relevance_score'] = relevance_score
+
+    # Приоритет отзывам с совпадающим годом и двигателем
+    items.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
+    return items
+
+
+def _attach_vehicle_fields(items: List[Dict], vehicle_info) -> List[Dict]:
+    """Копирование карточек модели с подстановкой данных конкретного автомобиля"""
+    if isinstance(vehicle_info, dict):
+        brand = vehicle_info.get('brand')
+        model = vehicle_info.get('model')
+        year = vehicle_info.get('year')
+    else:
+        brand = vehicle_info.brand
+        model = vehicle_info.model
+        year = vehicle_info.year
+
+    attached = []
+    for item in items:
+        item = dict(item)
+        item.update({"brand": brand, "model": model, "year": year})
+        attached.append(item)
+    return attached
+
+# Адреса сайтов; переменные окружения VIN_PARSER_DROM_URL и
+# VIN_PARSER_DRIVE2_URL (или --site-url) направляют запросы на другой хост
+DEFAULT_SITE_URLS = {
+    "drom.ru": "https://www.drom.ru",
+    "drive2.ru": "https://www.drive2.ru"
+}
+SITE_URLS = {
+    "drom.ru": os.environ.get("VIN_PARSER_DROM_URL") or DEFAULT_SITE_URLS["drom.ru"],
+    "drive2.ru": os.environ.get("VIN_PARSER_DRIVE2_URL") or DEFAULT_SITE_URLS["drive2.ru"]
+}
+
+
+def site_url(domain: str, path: str = "") -> str:
+    """Адрес страницы сайта с учетом SITE_URLS"""
+    return SITE_URLS[domain].rstrip("/") + path
+
+# Селекторы готовности страниц и страниц ошибки
+DROM_REVIEW_READY = ('.css-1ksh4lf',)
+DRIVE2_REVIEW_READY = ('.c-car-card',)
+DROM_JOURNAL_READY = ('article',)
+DRIVE2_JOURNAL_READY = ('.c-post-card',)
+DROM_ERROR = ('.error-page',)
+DRIVE2_ERROR = ('.c-error',)
+
+class WaitStats:
+    """Статистика ожидания готовности страниц
+
+    Сравнивает фактическое ожидание с прежней фиксированной паузой
+    ``FIXED_WAIT`` после каждой загрузки.
+    """
+
+    FIXED_WAIT = 2.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.waited = 0.0
+        self.timeouts = 0
+        self.error_pages = 0
+
+    def record(self, elapsed: float, state: Optional[str]) -> None:
+        with self._lock:
+            self.waits += 1
+            self.waited += elapsed
+            if state is None:
+                self.timeouts += 1
+            elif state == "error":
+                self.error_pages += 1
+
+    def summary(self) -> Dict:
+        """Сводка: количество ожиданий, затраченное и сэкономленное время"""
+        with self._lock:
+            baseline = self.waits * self.FIXED_WAIT
+            return {
+                "waits": self.waits,
+                "waited_seconds": round(self.waited, 2),
+                "fixed_wait_seconds": round(baseline, 2),
+                "saved_seconds": round(baseline - self.waited, 2),
+                "timeouts": self.timeouts,
+                "error_pages": self.error_pages
+            }
+
+
+WAIT_STATS = WaitStats()
+
+READY_TIMEOUT = 10.0
+READY_POLL_INTERVAL = 0.1
+
+
+def wait_for_selectors(
+    driver: Driver,
+    ready_selectors: Tuple[str, ...],
+    error_selectors: Tuple[str, ...] = (),
+    timeout: float = None
+) -> Optional[str]:
+    """
+    Ожидание готовности страницы вместо фиксированной паузы
+
+    Один вызов JS за итерацию проверяет все селекторы сразу. Селекторы
+    ошибки проверяются первыми, чтобы сразу выйти со страницы 404.
+
+    Args:
+        ready_selectors: Селекторы карточек, появление которых означает готовность
+        error_selectors: Селекторы страницы ошибки (.error-page, .c-error)
+        timeout: Максимальное ожидание (по умолчанию READY_TIMEOUT)
+
+    Returns:
+        "ready", "error" или None при истечении таймаута
+    """
+    timeout = READY_TIMEOUT if timeout is None else timeout
+    script = f"""
+        const ready = {json.dumps(list(ready_selectors))};
+        const errors = {json.dumps(list(error_selectors))};
+        if (errors.some(s => document.querySelector(s))) return "error";
+        if (ready.some(s => document.querySelector(s))) return "ready";
+        return null;
+    """
+
+    started = time.monotonic()
+    state = None
+    while True:
+        try:
+            state = driver.run_js(script)
+        except Exception:
+            state = None
+        if state or time.monotonic() - started >= timeout:
+            break
+        time.sleep(READY_POLL_INTERVAL)
+
+    WAIT_STATS.record(time.monotonic() - started, state)
+    return state
+
+
+def print_wait_stats() -> None:
+    """Вывод статистики ожидания готовности страниц"""
+    stats = WAIT_STATS.summary()
+    if not stats["waits"]:
+        return
+    print(f"\n⏱️ Ожидание загрузки страниц:")
+    print(f"  Загрузок: {stats['waits']}, ожидание: {stats['waited_seconds']} с")
+    print(f"  Сэкономлено относительно паузы {WaitStats.FIXED_WAIT:.0f} с: {stats['saved_seconds']} с")
+    print(f"  Таймаутов: {stats['timeouts']}, страниц ошибки: {stats['error_pages']}")
+
+
+def is_challenge_page(driver: Driver) -> bool:
+    """Проверка, что вместо страницы показана проверка Cloudflare"""
     try:
-        # Здесь должен быть ваш реальный endpoint API
-        # Это пример структуры запроса
-        api_url = "https://api.your-service.ru/gibdd"  # Замените на реальный URL
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-        
-        if api_key:
-            headers["Authorization"] = f"Bearer {api_key}"
-        
-        payload = {
-            "vin": vin.upper(),
-            "method": "gibdd"
-        }
-        
-        response = request.post(
-            api_url,
-            json=payload,
-            headers=headers,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            return response.json()
+        title = (driver.title or "").lower()
+    except Exception:
+        return False
+    return "just a moment" in title or "attention required" in title
+
+
+def navigate(
+    driver: Driver,
+    url: str,
+    domain: str,
+    ready_selectors: Tuple[str, ...],
+    error_selectors: Tuple[str, ...] = (),
+    via_google: bool = False
+) -> Optional[str]:
+    """
+    Переход на страницу с учетом лимита домена
+
+    Ожидание перед запросом определяет SCHEDULER, после загрузки -
+    появление карточек или страницы ошибки (см. wait_for_selectors).
+    Страница проверки Cloudflare замедляет домен.
+
+    Args:
+        url: Адрес страницы
+        domain: Домен для планировщика (drom.ru, drive2.ru)
+        ready_selectors: Селекторы карточек
+        error_selectors: Селекторы страницы ошибки
+        via_google: Открыть через google_get с обходом Cloudflare
+
+    Returns:
+        Состояние страницы из wait_for_selectors
+    """
+    # Переход через Google нужен только настоящим сайтам, не локальным стендам
+    via_google = via_google and SITE_URLS.get(domain) == DEFAULT_SITE_URLS.get(domain)
+    method = "google" if via_google else "direct"
+    with METRICS.timer("rate_limit_wait", domain=domain):
+        SCHEDULER.acquire(domain)
+
+    with METRICS.timer("navigation", domain=domain, method=method):
+        if via_google:
+            driver.google_get(url, bypass_cloudflare=True)
         else:
-            print(f"Ошибка API: {response.status_code}")
-            return None
-            
-    except Exception as e:
-        print(f"Ошибка при запросе к API ГИБДД: {e}")
+            driver.get_via_this_page(url)
+
+    count_page_load(driver)
+    with METRICS.timer("ready_wait", domain=domain):
+        state = wait_for_selectors(driver, ready_selectors, error_selectors)
+
+    if state is None and is_challenge_page(driver):
+        SCHEDULER.report_throttled(domain)
+        outcome = "challenge"
+    else:
+        SCHEDULER.report_success(domain)
+        outcome = state or "timeout"
+    METRICS.inc("navigations", domain=domain, method=method, outcome=outcome)
+
+    return state
+
+
+def page_snapshot(driver: Driver) -> str:
+    """
+    HTML текущей страницы одним запросом к браузеру
+
+    Карточки разбираются локально теми же функциями, что и в быстром пути
+    (parse_*_cards), вместо отдельного запроса DevTools на каждое поле
+    каждой карточки; тот же снимок записывается в архив.
+    """
+    with METRICS.timer("page_snapshot"):
+        return driver.page_html
+
+
+# Статус страницы в архиве: карточки не появились за READY_TIMEOUT
+PAGE_TIMEOUT_STATUS = 408
+
+
+# Повторы загрузки одного листинга в браузере (вместо повтора всей функции)
+LISTING_RETRIES = 2
+RETRY_BACKOFF = 2.0
+
+
+class ListingUnavailable(Exception):
+    """Листинг не загрузился (проверка Cloudflare) после всех попыток"""
+
+
+def open_listing(
+    driver: Driver,
+    url: str,
+    domain: str,
+    ready_selectors: Tuple[str, ...],
+    error_selectors: Tuple[str, ...] = (),
+    via_google: bool = False
+) -> Tuple[Optional[str], object]:
+    """
+    Переход на листинг и снимок страницы с повторами только этой страницы
+
+    Повторяется при исключении браузера или странице проверки Cloudflare;
+    паузу после проверки задает SCHEDULER, после исключения - RETRY_BACKOFF.
+
+    Снимок страницы берется один раз и идет и в разбор, и в архив при
+    записи (страница без карточек - со статусом PAGE_TIMEOUT_STATUS).
+
+    Returns:
+        (состояние из navigate, soup страницы)
+
+    Raises:
+        Последнее исключение, если все LISTING_RETRIES + 1 попыток не удались
+    """
+    for attempt in range(LISTING_RETRIES + 1):
+        try:
+            state = navigate(driver, url, domain, ready_selectors, error_selectors, via_google)
+            if state is None and is_challenge_page(driver):
+                raise ListingUnavailable(f"проверка Cloudflare на {url}")
+            html = page_snapshot(driver)
+            if recording():
+                status = {"ready": 200, "error": 404}.get(state, PAGE_TIMEOUT_STATUS)
+                ARCHIVE.put_page(domain, url, status, html)
+            return state, soupify(html)
+        except Exception as e:
+            if attempt == LISTING_RETRIES:
+                raise
+            METRICS.inc("listing_retries", domain=domain)
+            log.warning("⚠️ %s: попытка %d не удалась (%s), повтор", domain, attempt + 1, e)
+            if not isinstance(e, ListingUnavailable):
+                time.sleep(RETRY_BACKOFF * (attempt + 1))
+
+
+def scrape_sources(driver: Driver, data: Dict, scrapers: Dict[str, Callable], kind: str) -> List[Dict]:
+    """
+    Сбор источников по очереди с изоляцией ошибок
+
+    Ошибка одного источника не отменяет карточки остальных: источник
+    попадает в ``data["failed_sources"]`` (run_model_scraper тогда не
+    кэширует неполный результат), остальные собираются как обычно.
+    """
+    items = []
+    for source in data.get("sources", list(scrapers)):
+        with METRICS.timer("source", source=source, kind=kind, path="browser"):
+            try:
+                items.extend(scrapers[source](driver, data))
+            except Exception as e:
+                METRICS.inc("source_failures", source=source, kind=kind)
+                log.warning("✗ %s: не удалось получить данные (%s)", source, e)
+                data.setdefault("failed_sources", []).append(source)
+    return items
+
+# ==================== ПУЛ БРАУЗЕРОВ ====================
+
+_PAGE_LOADS: Dict[int, int] = {}
+PAGE_SIZE_KB = (os.sysconf("SC_PAGE_SIZE") // 1024) if hasattr(os, "sysconf") else 4
+_PAGE_LOADS_LOCK = threading.Lock()
+
+
+def count_page_load(driver: Driver) -> None:
+    """Учет загрузок страниц драйвером (для перезапуска браузеров пула)"""
+    with _PAGE_LOADS_LOCK:
+        _PAGE_LOADS[id(driver)] = _PAGE_LOADS.get(id(driver), 0) + 1
+
+
+def browser_pid(driver: Driver) -> Optional[int]:
+    """PID процесса Chrome, запущенного botasaurus (None - неизвестен)"""
+    browser = getattr(driver, "_browser", None)
+    pid = getattr(browser, "_process_pid", None)
+    if pid is None:
+        pid = getattr(getattr(browser, "_process", None), "pid", None)
+    return pid
+
+
+def process_tree_rss_mb(pid: int) -> Optional[float]:
+    """Суммарный RSS процесса и всех его потомков в МБ по /proc (None - недоступно)"""
+    parents = {}
+    rss_kb = {}
+    try:
+        entries = [entry for entry in os.listdir("/proc") if entry.isdigit()]
+    except OSError:
+        return None
+    for entry in entries:
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # Имя процесса в скобках может содержать пробелы
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{entry}/statm", "r") as f:
+                resident_pages = int(f.read().split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        parents[int(entry)] = int(fields[1])
+        rss_kb[int(entry)] = resident_pages * PAGE_SIZE_KB
+    if pid not in rss_kb:
         return None
 
-def parse_gibdd_response(gibdd_data: Dict) -> Optional[VehicleInfo]:
+    tree = {pid}
+    changed = True
+    while changed:
+        changed = False
+        for child, parent in parents.items():
+            if parent in tree and child not in tree:
+                tree.add(child)
+                changed = True
+    return sum(rss_kb[member] for member in tree) / 1024
+
+
+class BrowserPool:
+    """
+    Пул заранее запущенных браузеров для поиска отзывов и бортжурналов
+
+    Все экземпляры Chrome запускаются в start(), поэтому обработка VIN не
+    ждет запуска браузера. После использования вкладка сбрасывается на
+    about:blank. Браузер перезапускается после ``max_pages`` загрузок или
+    при превышении ``max_memory_mb`` (RSS Chrome вместе с процессами
+    вкладок). Если замена не запустилась, место в пуле сохраняется, и
+    браузер запускается при следующей выдаче.
+    """
+
+    def __init__(self, size: int = 2, max_pages: int = 200, max_memory_mb: float = None, **driver_options):
+        """
+        Args:
+            size: Количество браузеров
+            max_pages: Количество загрузок страниц до перезапуска браузера
+            max_memory_mb: Предел RSS браузера в МБ до перезапуска (None - без проверки)
+            **driver_options: Аргументы для Driver (например, headless=True)
+        """
+        if size < 1:
+            raise ValueError("size must be >= 1")
+
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.driver_options = {"block_images": False, **driver_options}
+        self._idle: queue.Queue = queue.Queue()
+        self._drivers: List[Driver] = []
+        self._lock = threading.Lock()
+        self.recycled = 0
+
+    def _launch(self) -> Driver:
+        driver = Driver(**self.driver_options)
+        with self._lock:
+            self._drivers.append(driver)
+        return driver
+
+    def _close(self, driver: Driver) -> None:
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        with _PAGE_LOADS_LOCK:
+            _PAGE_LOADS.pop(id(driver), None)
+        try:
+            driver.close()
+        except Exception as e:
+            log.warning("⚠️ Ошибка при закрытии браузера: %s", e)
+
+    def start(self) -> 'BrowserPool':
+        """Параллельный запуск всех браузеров пула"""
+        with ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="browser-start") as pool:
+            for driver in pool.map(lambda _: self._launch(), range(self.size)):
+                self._idle.put(driver)
+        log.info("🌐 Запущено браузеров: %s", self.size)
+        return self
+
+    def _memory_mb(self, driver: Driver) -> float:
+        """RSS процесса Chrome и его дочерних процессов (без /proc - JS heap страницы)"""
+        pid = browser_pid(driver)
+        rss = process_tree_rss_mb(pid) if pid else None
+        if rss is not None:
+            return rss
+        try:
+            used = driver.run_js("return performance.memory ? performance.memory.usedJSHeapSize : 0")
+            return (used or 0) / (1024 * 1024)
+        except Exception:
+            return 0.0
+
+    def _needs_recycle(self, driver: Driver) -> bool:
+        with _PAGE_LOADS_LOCK:
+            pages = _PAGE_LOADS.get(id(driver), 0)
+        if pages >= self.max_pages:
+            return True
+        return bool(self.max_memory_mb) and self._memory_mb(driver) > self.max_memory_mb
+
+    def _relaunch(self) -> Optional[Driver]:
+        """Запуск замены; None - место в пуле, браузер для которого запустит driver()"""
+        try:
+            return self._launch()
+        except Exception as e:
+            log.warning("⚠️ Не удалось перезапустить браузер пула: %s", e)
+            return None
+
+    def _release(self, driver: Driver) -> None:
+        if self._needs_recycle(driver):
+            self._close(driver)
+            self.recycled += 1
+            driver = self._relaunch()
+        else:
+            try:
+                driver.get("about:blank")
+            except Exception:
+                # Браузер не отвечает - заменяем
+                self._close(driver)
+                self.recycled += 1
+                driver = self._relaunch()
+        self._idle.put(driver)
+
+    @contextmanager
+    def driver(self):
+        """Выдача браузера из пула на время работы блока with"""
+        driver = self._idle.get()
+        if driver is None:
+            try:
+                driver = self._launch()
+            except Exception:
+                # Место остается в пуле для следующей попытки
+                self._idle.put(None)
+                raise
+        try:
+            yield driver
+        finally:
+            self._release(driver)
+
+    def close(self) -> None:
+        """Закрытие всех браузеров пула"""
+        with self._lock:
+            drivers = list(self._drivers)
+        for driver in drivers:
+            self._close(driver)
+
+
+BROWSER_POOL: Optional[BrowserPool] = None
+
+
+def set_browser_pool(pool: Optional[BrowserPool]) -> None:
+    """Включение пула браузеров для поиска отзывов и бортжурналов (None - отключить)"""
+    global BROWSER_POOL
+    BROWSER_POOL = pool
+
+# ==================== БЫСТРЫЙ ПУТЬ БЕЗ БРАУЗЕРА ====================
+
+# Загружать листинги отзывов и бортжурналов HTTP-запросом, а браузер
+# использовать только при проверке Cloudflare или пустом результате
+HTTP_FAST_PATH = True
+
+
+def is_challenge_html(html: str) -> bool:
+    """Проверка, что HTML - страница проверки Cloudflare"""
+    head = (html or "")[:5000].lower()
+    return "just a moment" in head or "challenge-platform" in head or "cf-browser-verification" in head
+
+
+def absolute_url(href: Optional[str], base: str) -> Optional[str]:
+    """Абсолютный адрес ссылки карточки"""
+    if href and not href.startswith('http'):
+        href = f"{base}{href}"
+    return href
+
+
+def parse_drom_review_cards(soup, limit: int) -> List[Dict]:
+    """Карточки отзывов Drom.ru из HTML листинга"""
+    reviews = []
+    for card in soup.select('.css-1ksh4lf')[:limit]:
+        review_data = {
+            "source": "drom.ru",
+            "type": "review",
+            "vin_checked": True
+        }
+
+        # Заголовок
+        title_elem = card.select_one('h3')
+        if title_elem:
+            review_data['title'] = title_elem.get_text(strip=True)
+
+        # Ссылка
+        link_elem = card.select_one('a')
+        if link_elem:
+            review_data['url'] = absolute_url(link_elem.get('href'), SITE_URLS["drom.ru"])
+
+        # Рейтинг
+        rating_elem = card.select_one('.css-kxziuu')
+        if rating_elem:
+            review_data['rating'] = rating_elem.get_text(strip=True)
+
+        # Информация об авто в отзыве (для оценки релевантности)
+        specs_elem = card.select_one('.css-1x4jntm')
+        if specs_elem:
+            review_data['specs'] = specs_elem.get_text(strip=True)
+
+        # Краткое описание
+        desc_elem = card.select_one('.css-1wdvlz0')
+        if desc_elem:
+            review_data['preview'] = desc_elem.get_text(strip=True)[:200]
+
+        reviews.append(review_data)
+    return reviews
+
+
+def parse_drive2_review_cards(soup, limit: int) -> List[Dict]:
+    """Карточки отзывов Drive2.ru из HTML листинга"""
+    reviews = []
+    for card in soup.select('.c-car-card')[:limit]:
+        review_data = {
+            "source": "drive2.ru",
+            "type": "review",
+            "vin_checked": True
+        }
+
+        # Заголовок и ссылка
+        title_elem = card.select_one('.c-car-card__caption a')
+        if title_elem:
+            review_data['title'] = title_elem.get_text(strip=True)
+            review_data['url'] = absolute_url(title_elem.get('href'), SITE_URLS["drive2.ru"])
+
+        # Информация об авто (для оценки релевантности)
+        info_elem = card.select_one('.c-car-card__info')
+        if info_elem:
+            review_data['car_info'] = info_elem.get_text(strip=True)
+
+        # Автор
+        author_elem = card.select_one('.c-username__link')
+        if author_elem:
+            review_data['author'] = author_elem.get_text(strip=True)
+
+        # Пробег
+        mileage_elem = card.select_one('.c-car-card__param_mileage')
+        if mileage_elem:
+            review_data['mileage'] = mileage_elem.get_text(strip=True)
+
+        reviews.append(review_data)
+    return reviews
+
+
+def parse_journal_cards(soup, selector: str, source: str, limit: int) -> List[Dict]:
+    """Карточки бортжурналов из HTML листинга (article на Drom.ru, .c-post-card на Drive2.ru)"""
+    entries = []
+    for card in soup.select(selector)[:limit]:
+        entry = {
+            "source": source,
+            "type": "board_journal"
+        }
+
+        title_elem = card.select_one('a')
+        if title_elem:
+            entry['title'] = title_elem.get_text(strip=True)
+            entry['url'] = absolute_url(title_elem.get('href'), SITE_URLS[source])
+
+        preview_elem = card.select_one('p')
+        if preview_elem:
+            entry['preview'] = preview_elem.get_text(strip=True)[:200]
+
+        entries.append(entry)
+    return entries
+
+
+@request(
+    output=None,
+    create_error_logs=False,
+    max_retry=2,
+    raise_exception=True,
+    close_on_crash=True
+)
+def fetch_listing(request: Request, data: Dict) -> Dict:
+    """
+    Загрузка страницы листинга без браузера
+
+    Args:
+        data: Dict с url и domain (для SCHEDULER)
+
+    Returns:
+        Dict со status, html (None при проверке Cloudflare) и challenge
+
+    Ошибка после повторов пробрасывается (raise_exception) без ожидания
+    ввода, и http_listing переходит на браузер.
     """
-    Парсинг ответа от API ГИБДД в структуру VehicleInfo
+    domain = data["domain"]
+    SCHEDULER.acquire(domain)
+    response = request.get(data["url"], timeout=20)
+    html = response.text or ""
+
+    if response.status_code == 429 or is_challenge_html(html):
+        SCHEDULER.report_throttled(domain, retry_after_seconds(response))
+        return {"status": response.status_code, "html": None, "challenge": True}
+
+    SCHEDULER.report_success(domain)
+    return {"status": response.status_code, "html": html, "challenge": False}
+
+
+def http_listing(url: str, domain: str, error_selectors: Tuple[str, ...]):
     """
-    
-    if not gibdd_data or not gibdd_data.get('success'):
-        print("  ✗ Нет данных ГИБДД или запрос неуспешен")
+    HTML листинга, разобранный soupify
+
+    Returns:
+        (soup, is_error_page) или None, если нужен браузер
+    """
+    if replaying():
+        page = ARCHIVE.get_page(domain, url)
+        # Страница, не загрузившаяся при записи, воспроизводится как недоступная
+        if page is None or page["status"] == PAGE_TIMEOUT_STATUS:
+            return None
+    else:
+        try:
+            page = fetch_listing({"url": url, "domain": domain})
+        except Exception as e:
+            log.warning("⚠️ %s: ошибка HTTP-запроса (%s), используем браузер", domain, e)
+            return None
+
+        if not page or page["challenge"]:
+            return None
+        if recording():
+            ARCHIVE.put_page(domain, url, page["status"], page["html"])
+
+    soup = soupify(page["html"])
+    is_error = page["status"] == 404 or any(soup.select_one(s) for s in error_selectors)
+    return soup, is_error
+
+
+def _http_drom_reviews(data: Dict) -> Optional[List[Dict]]:
+    """Отзывы Drom.ru без браузера (None - нужен браузер)"""
+    brand_for_url = data["brand_for_url"]
+    model_for_url = data["model_for_url"]
+    year = data.get("year")
+
+    page = http_listing(site_url("drom.ru", f"/reviews/{brand_for_url}/{model_for_url}/"), "drom.ru", DROM_ERROR)
+    if page and page[1]:
+        # Если страница не найдена, пробуем поиск
+        page = http_listing(site_url("drom.ru", f"/reviews/search/?text={brand_for_url}+{model_for_url}"), "drom.ru", DROM_ERROR)
+    if not page:
         return None
-    
-    response = gibdd_data.get('response', {})
-    if not response.get('found', False):
-        print("  ✗ Автомобиль не найден в базе ГИБДД")
+
+    soup = page[0]
+
+    # Фильтр по году если возможно
+    if year:
+        year_link = soup.select_one(f'a[href*="{year}"]')
+        if year_link and year_link.get('href'):
+            year_page = http_listing(absolute_url(year_link['href'], SITE_URLS["drom.ru"]), "drom.ru", DROM_ERROR)
+            if not year_page:
+                return None
+            soup = year_page[0]
+
+    return parse_drom_review_cards(soup, data.get("max_reviews", 20)//2) or None
+
+
+def _http_drive2_reviews(data: Dict) -> Optional[List[Dict]]:
+    """Отзывы Drive2.ru без браузера (None - нужен браузер)"""
+    brand_for_url = data["brand_for_url"]
+    model_for_url = data["model_for_url"]
+
+    page = http_listing(site_url("drive2.ru", f"/experience/{drive2_brand_for_url(brand_for_url)}/{model_for_url}/"), "drive2.ru", DRIVE2_ERROR)
+    if page and page[1]:
+        # Если не найдено, используем поиск
+        page = http_listing(site_url("drive2.ru", f"/search/?q={brand_for_url}+{model_for_url}+{data.get('year')}"), "drive2.ru", DRIVE2_ERROR)
+    if not page:
         return None
-        
-    vehicle = response.get('vehicle', {})
-    passport = response.get('vehiclePassport', {})
-    ownership = response.get('ownershipPeriod', [])
-    
-    # Проверяем обязательные поля
-    if not vehicle.get('vin'):
-        print("  ✗ Отсутствует VIN в ответе ГИБДД")
+
+    return parse_drive2_review_cards(page[0], data.get("max_reviews", 20)//2) or None
+
+
+def _http_drom_journals(data: Dict) -> Optional[List[Dict]]:
+    """Бортжурналы Drom.ru без браузера (None - нужен браузер)"""
+    page = http_listing(site_url("drom.ru", f"/bjournal/{data['brand_for_url']}/{data['model_for_url']}/"), "drom.ru", DROM_ERROR)
+    if not page:
         return None
-    
-    # Извлекаем марку и модель из полного названия
-    full_model = vehicle.get('model', '')
-    brand = None
-    model = None
-    
-    # Парсим название модели (например: "МИЦУБИСИ АУТЛЕНДЕР 2.0")
-    model_parts = full_model.strip().split()
-    if model_parts:
-        # Преобразуем марки в нормальный вид
-        brand_mapping = {
-            'МИЦУБИСИ': 'Mitsubishi',
-            'МИТСУБИСИ': 'Mitsubishi',
-            'ТОЙОТА': 'Toyota',
-            'НИССАН': 'Nissan',
-            'МАЗДА': 'Mazda',
-            'ХОНДА': 'Honda',
-            'ФОЛЬКСВАГЕН': 'Volkswagen',
-            'БМВ': 'BMW',
-            'МЕРСЕДЕС': 'Mercedes-Benz',
-            'АУДИ': 'Audi',
-            'ШКОДА': 'Skoda',
-            'РЕНО': 'Renault',
-            'ПЕЖО': 'Peugeot',
-            'СИТРОЕН': 'Citroen',
-            'ФОРД': 'Ford',
-            'ШЕВРОЛЕ': 'Chevrolet',
-            'КИА': 'Kia',
-            'ХЕНДАЙ': 'Hyundai',
-            'ХУНДАЙ': 'Hyundai',
-            'ЛАДА': 'Lada',
-            'ВАЗ': 'VAZ'
-        }
-        
-        brand_raw = model_parts[0].upper()
-        brand = brand_mapping.get(brand_raw, model_parts[0].capitalize())
-        
-        # Модель - все остальное кроме марки и объема двигателя
-        model_parts_clean = []
-        for part in model_parts[1:]:
-            # Пропускаем числа с точкой (объем двигателя)
-            if not re.match(r'^\d+\.\d+$', part):
-                model_parts_clean.append(part.capitalize())
-        model = ' '.join(model_parts_clean) if model_parts_clean else (model_parts[1] if len(model_parts) > 1 else None)
-    
-    # Преобразуем историю владения
-    ownership_history = []
-    for period in ownership:
-        ownership_entry = {
-            'type': period.get('simplePersonTypeInfo', ''),
-            'from': period.get('from', ''),
-            'to': period.get('to', ''),
-            'period': period.get('period', ''),
-            'operation': period.get('lastOperationInfo', '')
-        }
-        ownership_history.append(ownership_entry)
-    
-    # Создаем объект VehicleInfo
-    try:
-        vehicle_info = VehicleInfo(
-            vin=vehicle.get('vin', ''),
-            brand=brand,
-            model=model,
-            year=int(vehicle.get('year', 0)) if vehicle.get('year') else None,
-            engine_volume=vehicle.get('engineVolume', ''),
-            power_hp=vehicle.get('powerHp', ''),
-            power_kwt=vehicle.get('powerKwt', ''),
-            color=vehicle.get('color', ''),
-            body_number=vehicle.get('bodyNumber', ''),
-            engine_number=vehicle.get('engineNumber', ''),
-            category=vehicle.get('category', ''),
-            type_info=vehicle.get('typeinfo', ''),
-            pts_number=passport.get('number', ''),
-            pts_issue=passport.get('issue', ''),
-            ownership_history=ownership_history,
-            technical_specs={
-                'engine_volume': vehicle.get('engineVolume', ''),
-                'power_hp': vehicle.get('powerHp', ''),
-                'power_kwt': vehicle.get('powerKwt', ''),
-                'category': vehicle.get('category', ''),
-                'type': vehicle.get('typeinfo', '')
-            }
-        )
-        
-        return vehicle_info
-        
-    except Exception as e:
-        print(f"  ✗ Ошибка при создании VehicleInfo: {e}")
+    return parse_journal_cards(page[0], 'article', "drom.ru", data.get("max_entries", 20)//2) or None
+
+
+def _http_drive2_journals(data: Dict) -> Optional[List[Dict]]:
+    """Бортжурналы Drive2.ru без браузера (None - нужен браузер)"""
+    page = http_listing(site_url("drive2.ru", f"/board/{drive2_brand_for_url(data['brand_for_url'])}/{data['model_for_url']}/"), "drive2.ru", DRIVE2_ERROR)
+    if not page:
         return None
+    return parse_journal_cards(page[0], '.c-post-card', "drive2.ru", data.get("max_entries", 20)//2) or None
 
-# ==================== ДОПОЛНИТЕЛЬНЫЕ ИСТОЧНИКИ ДАННЫХ ====================
 
-@browser(
-    block_images=True,
-    cache=True,
-    reuse_driver=True,
-    max_retry=3
-)
-def get_additional_info(driver: Driver, data: Dict) -> Dict:
+def run_model_scraper(scraper: Callable, scrape: Callable, http_sources: Dict[str, Callable], data: Dict) -> List[Dict]:
     """
-    Получение дополнительной информации об автомобиле
-    
+    Сбор данных модели: HTTP-запросы, затем браузер для оставшихся источников
+
+    Источник, для которого HTTP-запрос вернул проверку Cloudflare или
+    пустой результат, собирается в браузере (из пула, если он включен,
+    иначе через декоратор @browser). Общий результат кэшируется под
+    именем декорированной функции; если источник в браузере не ответил
+    после повторов или сам браузер не запустился (декоратор вернул None),
+    собранное возвращается без кэширования.
+
     Args:
-        data: Dict содержащий vehicle_info (словарь или объект VehicleInfo)
+        scraper: Функция с декоратором @browser
+        scrape: Та же логика без декоратора, принимает (driver, data)
+        http_sources: Источник -> функция быстрого пути (None - нужен браузер)
+        data: Ключ модели
     """
-    # Валидация входных данных
-    validate_required_keys(data, ["vehicle_info"], "get_additional_info")
-    
-    vehicle_info = data["vehicle_info"]
-    
-    # Проверяем что vehicle_info корректен
-    if not validate_vehicle_info(vehicle_info, "get_additional_info"):
-        return {}
-    
-    # Получаем данные в зависимости от типа vehicle_info
-    if isinstance(vehicle_info, dict):
-        brand = vehicle_info.get('brand')
-        model = vehicle_info.get('model')
-    else:
-        brand = vehicle_info.brand
-        model = vehicle_info.model
-    
-    print(f"  🔍 Поиск дополнительной информации для {brand} {model}")
-    
-    # Здесь может быть логика получения дополнительных данных
-    # Например, проверка на ДТП, угоны, ограничения и т.д.
-    
-    additional_info = {
-        "accidents": "Нет данных",
-        "mileage": "Нет данных", 
-        "restrictions": "Нет данных",
-        "theft_history": "Нет данных"
-    }
-    
-    # Placeholder для реальной логики поиска дополнительной информации
-    # В будущем здесь можно добавить запросы к различным базам данных
-    
-    return additional_info
+    kind = scraper.__name__.rsplit("_", 1)[-1]
+
+    def compute() -> List[Dict]:
+        by_source = {}
+        fallback = []
+        for source, http_scrape in http_sources.items():
+            if not HTTP_FAST_PATH and not replaying():
+                items = None
+            else:
+                with METRICS.timer("source", source=source, kind=kind, path="http"):
+                    items = http_scrape(data)
+            if items is None and replaying():
+                # При воспроизведении браузер не запускается
+                items = []
+            if items is None:
+                fallback.append(source)
+            else:
+                log.debug("⚡ %s: %s без браузера", source, len(items))
+                by_source[source] = items
+
+        failed_sources = []
+        if fallback:
+            browser_data = {**data, "sources": fallback, "failed_sources": failed_sources}
+            pool = BROWSER_POOL
+            if pool is None:
+                browser_items = scraper(browser_data)
+                if browser_items is None:
+                    # Декоратор @browser вернул None: браузер не запустился
+                    # или упал, ни один источник не собран
+                    for source in fallback:
+                        METRICS.inc("source_failures", source=source, kind=kind)
+                    log.warning("✗ Браузер не вернул результат: %s", ", ".join(fallback))
+                    failed_sources.extend(source for source in fallback if source not in failed_sources)
+                    browser_items = []
+            else:
+                with pool.driver() as driver:
+                    browser_items = scrape(driver, browser_data)
+            for item in browser_items:
+                by_source.setdefault(item["source"], []).append(item)
+
+        items = [item for source in http_sources for item in by_source.get(source, [])]
+        if failed_sources:
+            # Собранное возвращается, но не кэшируется: отказавший источник
+            # будет запрошен снова
+            return PartialResult(items)
+        return items
+
+    # Одновременные запросы одной модели из разных потоков собираются один раз
+    return RESULT_CACHE.cached(scraper.__name__, data, compute)
 
 # ==================== ПОИСК ОТЗЫВОВ ====================
 
+REVIEW_SOURCES = ("drom.ru", "drive2.ru")
+
+
+def _scrape_drom_reviews(driver: Driver, data: Dict) -> List[Dict]:
+    """Отзывы Drom.ru в браузере"""
+    brand_for_url = data["brand_for_url"]
+    model_for_url = data["model_for_url"]
+    year = data.get("year")
+    max_reviews = data.get("max_reviews", 20)
+
+    log.debug("📋 Поиск на Drom.ru...")
+    drom_url = site_url("drom.ru", f"/reviews/{brand_for_url}/{model_for_url}/")
+
+    state, soup = open_listing(driver, drom_url, "drom.ru", DROM_REVIEW_READY, DROM_ERROR, via_google=True)
+
+    # Если страница не найдена, пробуем альтернативный URL
+    if state == "error":
+        # Пробуем поиск
+        search_url = site_url("drom.ru", f"/reviews/search/?text={brand_for_url}+{model_for_url}")
+        state, soup = open_listing(driver, search_url, "drom.ru", DROM_REVIEW_READY, DROM_ERROR)
+
+    # Фильтр по году если возможно
+    if year:
+        year_link = soup.select_one(f'a[href*="{year}"]')
+        if year_link and year_link.get('href'):
+            try:
+                _, soup = open_listing(driver, absolute_url(year_link['href'], SITE_URLS["drom.ru"]), "drom.ru", DROM_REVIEW_READY, DROM_ERROR)
+            except Exception as e:
+                # Оставляем общий листинг модели, но не кэшируем его под ключом с годом
+                log.warning("⚠️ Drom.ru: страница %s года недоступна (%s), используем общий листинг", year, e)
+                data.setdefault("failed_sources", []).append("drom.ru")
+
+    # Собираем карточки отзывов
+    reviews = parse_drom_review_cards(soup, max_reviews//2)
+
+    log.info("✓ Найдено %s отзывов на Drom.ru", len(reviews))
+    return reviews
+
+
+def _scrape_drive2_reviews(driver: Driver, data: Dict) -> List[Dict]:
+    """Отзывы Drive2.ru в браузере"""
+    brand_for_url = data["brand_for_url"]
+    model_for_url = data["model_for_url"]
+    year = data.get("year")
+    max_reviews = data.get("max_reviews", 20)
+
+    log.debug("🚗 Поиск на Drive2.ru...")
+
+    drive2_url = site_url("drive2.ru", f"/experience/{drive2_brand_for_url(brand_for_url)}/{model_for_url}/")
+
+    state, soup = open_listing(driver, drive2_url, "drive2.ru", DRIVE2_REVIEW_READY, DRIVE2_ERROR)
+
+    # Если не найдено, используем поиск
+    if state == "error":
+        search_url = site_url("drive2.ru", f"/search/?q={brand_for_url}+{model_for_url}+{year}")
+        state, soup = open_listing(driver, search_url, "drive2.ru", DRIVE2_REVIEW_READY, DRIVE2_ERROR)
+
+    # Собираем карточки
+    reviews = parse_drive2_review_cards(soup, max_reviews//2)
+
+    log.info("✓ Найдено %s отзывов на Drive2.ru", len(reviews))
+    return reviews
+
+
+def _scrape_model_reviews(driver: Driver, data: Dict) -> List[Dict]:
+    """
+    Сбор отзывов по модели на Drom.ru и Drive2.ru в браузере
+
+    Args:
+        data: Ключ модели из build_model_key, max_reviews и
+            необязательный список источников sources
+    """
+    scrapers = {"drom.ru": _scrape_drom_reviews, "drive2.ru": _scrape_drive2_reviews}
+    return scrape_sources(driver, data, scrapers, "reviews")
+
+
+# Повторы выполняются для каждого листинга (open_listing), а не для всей
+# функции: сбой Drive2 не перезапускает уже собранный Drom
 @browser(
     block_images=False,
-    cache=True,
-    reuse_driver=True,
-    max_retry=3
+    reuse_driver=True
 )
-def search_reviews_enhanced(driver: Driver, data: Dict) -> List[Dict]:
-    """Улучшенный поиск отзывов с учетом данных из ГИБДД"""
-    
+def scrape_model_reviews(driver: Driver, data: Dict) -> List[Dict]:
+    """Сбор отзывов по модели в браузере botasaurus (см. _scrape_model_reviews)"""
+    return _scrape_model_reviews(driver, data)
+
+
+def search_reviews_enhanced(data: Dict) -> List[Dict]:
+    """Улучшенный поиск отзывов с учетом данных из ГИБДД
+
+    Отзывы собираются один раз на модель (см. build_model_key), а оценка
+    релевантности выполняется для каждого VIN отдельно.
+    """
+
     # Валидация входных данных
     validate_required_keys(data, ["vehicle_info"], "search_reviews_enhanced")
-    
+
     vehicle_info = data["vehicle_info"]
-    max_reviews = data.get("max_reviews", 20)
-    
-    reviews = []
-    
-    # Проверяем корректность vehicle_info
-    if not validate_vehicle_info(vehicle_info, "search_reviews_enhanced"):
-        return reviews
-    
-    # Получаем данные в зависимости от типа vehicle_info
-    if isinstance(vehicle_info, dict):
-        brand = vehicle_info.get('brand')
-        model = vehicle_info.get('model')
-        year = vehicle_info.get('year')
-        engine_volume = vehicle_info.get('engine_volume')
-    else:
-        brand = vehicle_info.brand
-        model = vehicle_info.model
-        year = vehicle_info.year
-        engine_volume = vehicle_info.engine_volume
-    
-    print(f"  🔍 Поиск отзывов для {brand} {model} {year}")
-    
-    # Нормализуем названия для URL
-    brand_normalized = brand.lower().replace(' ', '-').replace('_', '-')
-    model_normalized = model.lower().replace(' ', '-').replace('_', '-')
-    
-    # Специальная обработка для некоторых брендов
-    brand_url_mapping = {
-        'mitsubishi': 'mitsubishi',
-        'volkswagen': 'volkswagen',
-        'mercedes-benz': 'mercedes',
-        'bmw': 'bmw',
-        'toyota': 'toyota',
-        'nissan': 'nissan',
-        'mazda': 'mazda',
-        'honda': 'honda',
-        'hyundai': 'hyundai',
-        'kia': 'kia',
-        'ford': 'ford',
-        'chevrolet': 'chevrolet',
-        'lada': 'lada',
-        'vaz': 'vaz'
-    }
-    
-    brand_for_url = brand_url_mapping.get(brand_normalized, brand_normalized)
-    
-    # Специальная обработка моделей
-    model_url_mapping = {
-        'outlander': 'outlander',
-        'аутлендер': 'outlander',
-        'asx': 'asx',
-        'pajero': 'pajero',
-        'lancer': 'lancer',
-        'eclipse cross': 'eclipse-cross',
-        'l200': 'l200'
-    }
-    
-    model_for_url = model_url_mapping.get(model_normalized, model_normalized)
-    
-    # === DROM.RU ===
-    try:
-        print("    📋 Поиск на Drom.ru...")
-        drom_url = f"https://www.drom.ru/reviews/{brand_for_url}/{model_for_url}/"
-        
-        driver.google_get(drom_url, bypass_cloudflare=True)
-        driver.sleep(2)
-        
-        # Если страница не найдена, пробуем альтернативный URL
-        if driver.select('.error-page'):
-            # Пробуем поиск
-            search_url = f"https://www.drom.ru/reviews/search/?text={brand}+{model}"
-            driver.get_via_this_page(search_url)
-            driver.sleep(2)
-        
-        # Фильтр по году если возможно
-        if year:
-            year_links = driver.select_all(f'a[href*="{year}"]')
-            if year_links:
-                year_links[0].click()
-                driver.sleep(2)
-        
-        # Собираем карточки отзывов
-        review_cards = driver.select_all('.css-1ksh4lf')[:max_reviews//2]
-        
-        for card in review_cards:
-            review_data = {
-                "source": "drom.ru",
-                "type": "review",
-                "brand": brand,
-                "model": model,
-                "year": year,
-                "vin_checked": True
-            }
-            
-            # Заголовок
-            title_elem = card.select('h3')
-            if title_elem:
-                review_data['title'] = title_elem.get_text(strip=True)
-            
-            # Ссылка
-            link_elem = card.select('a')
-            if link_elem:
-                href = link_elem.get_attribute('href')
-                if href and not href.startswith('http'):
-                    href = f"https://www.drom.ru{href}"
-                review_data['url'] = href
-            
-            # Рейтинг
-            rating_elem = card.select('.css-kxziuu')
-            if rating_elem:
-                review_data['rating'] = rating_elem.get_text(strip=True)
-            
-            # Информация об авто в отзыве
-            specs_elem = card.select('.css-1x4jntm')
-            if specs_elem:
-                specs_text = specs_elem.get_text(strip=True)
-                # Проверяем соответствие характеристикам
-                if engine_volume:
-                    engine_vol_clean = engine_volume.replace('.0', '').replace(',', '.')
-                    if engine_vol_clean in specs_text:
-                        review_data['engine_match'] = True
-            
-            # Краткое описание
-            desc_elem = card.select('.css-1wdvlz0')
-            if desc_elem:
-                review_data['preview'] = desc_elem.get_text(strip=True)[:200]
-            
-            reviews.append(review_data)
-        
-        print(f"      ✓ Найдено {len([r for r in reviews if r['source'] == 'drom.ru'])} отзывов на Drom.ru")
-        
-    except Exception as e:
-        print(f"      ✗ Ошибка при поиске на Drom.ru: {e}")
-    
-    # === DRIVE2.RU ===
-    try:
-        print("    🚗 Поиск на Drive2.ru...")
-        
-        # Специальные URL для Drive2
-        drive2_brand_mapping = {
-            'mitsubishi': 'mitsubishi',
-            'volkswagen': 'volkswagen',
-            'mercedes-benz': 'mercedes-benz',
-            'toyota': 'toyota',
-            'nissan': 'nissan',
-            'mazda': 'mazda',
-            'honda': 'honda'
-        }
-        
-        drive2_brand = drive2_brand_mapping.get(brand_normalized, brand_for_url)
-        drive2_url = f"https://www.drive2.ru/experience/{drive2_brand}/{model_for_url}/"
-        
-        driver.get_via_this_page(drive2_url)
-        driver.sleep(2)
-        
-        # Если не найдено, используем поиск
-        if driver.select('.c-error'):
-            search_url = f"https://www.drive2.ru/search/?q={brand}+{model}+{year}"
-            driver.get_via_this_page(search_url)
-            driver.sleep(2)
-        
-        # Собираем карточки
-        drive2_cards = driver.select_all('.c-car-card')[:max_reviews//2]
-        
-        for card in drive2_cards:
-            review_data = {
-                "source": "drive2.ru",
-                "type": "review",
-                "brand": brand,
-                "model": model,
-                "year": year,
-                "vin_checked": True
-            }
-            
-            # Заголовок и ссылка
-            title_elem = card.select('.c-car-card__caption a')
-            if title_elem:
-                review_data['title'] = title_elem.get_text(strip=True)
-                href = title_elem.get_attribute('href')
-                if href and not href.startswith('http'):
-                    href = f"https://www.drive2.ru{href}"
-                review_data['url'] = href
-            
-            # Информация об авто
-            info_elem = card.select('.c-car-card__info')
-            if info_elem:
-                info_text = info_elem.get_text(strip=True)
-                review_data['car_info'] = info_text
-                
-                # Проверяем год
-                if year and str(year) in info_text:
-                    review_data['year_match'] = True
-                
-                # Проверяем двигатель
-                if engine_volume:
-                    engine_vol_clean = engine_volume.replace('.0', '').replace(',', '.')
-                    if engine_vol_clean in info_text:
-                        review_data['engine_match'] = True
-            
-            # Автор
-            author_elem = card.select('.c-username__link')
-            if author_elem:
-                review_data['author'] = author_elem.get_text(strip=True)
-            
-            # Пробег
-            mileage_elem = card.select('.c-car-card__param_mileage')
-            if mileage_elem:
-                review_data['mileage'] = mileage_elem.get_text(strip=True)
-            
-            reviews.append(review_data)
-        
-        print(f"      ✓ Найдено {len([r for r in reviews if r['source'] == 'drive2.ru'])} отзывов на Drive2.ru")
-        
-    except Exception as e:
-        print(f"      ✗ Ошибка при поиске на Drive2.ru: {e}")
-    
-    # Сортируем отзывы по релевантности
-    # Приоритет отзывам с совпадающим годом и двигателем
-    for review in reviews:
-        relevance_score = 0
-        if review.get('year_match'):
-            relevance_score += 2
-        if review.get('engine_match'):
-            relevance_score += 1
-        review['relevance_score'] = relevance_score
-    
-    reviews.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
+    max_reviews = data.get("max_reviews", 20)
+
+    # Проверяем корректность vehicle_info
+    if not validate_vehicle_info(vehicle_info, "search_reviews_enhanced"):
+        return []
+
+    model_key = build_model_key(vehicle_info)
+    log.info("🔍 Поиск отзывов для %s %s %s", model_key['brand_for_url'], model_key['model_for_url'], model_key['year'])
+
+    model_reviews = run_model_scraper(
+        scrape_model_reviews,
+        _scrape_model_reviews,
+        {"drom.ru": _http_drom_reviews, "drive2.ru": _http_drive2_reviews},
+        {**model_key, "max_reviews": max_reviews}
+    )
+    reviews = _attach_vehicle_fields(model_reviews or [], vehicle_info)
+    score_relevance(reviews, model_key["year"], model_key["engine_volume"])
 
     return reviews[:max_reviews]
 
 
 # ==================== ПОИСК БОРТЖУРНАЛОВ ====================
 
+def _scrape_drom_journals(driver: Driver, data: Dict) -> List[Dict]:
+    """Бортжурналы Drom.ru в браузере"""
+    max_entries = data.get("max_entries", 20)
+
+    log.debug("📔 Бортжурналы на Drom.ru...")
+    drom_url = site_url("drom.ru", f"/bjournal/{data['brand_for_url']}/{data['model_for_url']}/")
+    _, soup = open_listing(driver, drom_url, "drom.ru", DROM_JOURNAL_READY, DROM_ERROR, via_google=True)
+
+    entries = parse_journal_cards(soup, 'article', "drom.ru", max_entries//2)
+
+    log.info("✓ Найдено %s бортжурналов на Drom.ru", len(entries))
+    return entries
+
+
+def _scrape_drive2_journals(driver: Driver, data: Dict) -> List[Dict]:
+    """Бортжурналы Drive2.ru в браузере"""
+    max_entries = data.get("max_entries", 20)
+
+    log.debug("📔 Бортжурналы на Drive2.ru...")
+
+    drive2_url = site_url("drive2.ru", f"/board/{drive2_brand_for_url(data['brand_for_url'])}/{data['model_for_url']}/")
+
+    _, soup = open_listing(driver, drive2_url, "drive2.ru", DRIVE2_JOURNAL_READY, DRIVE2_ERROR)
+
+    entries = parse_journal_cards(soup, '.c-post-card', "drive2.ru", max_entries//2)
+
+    log.info("✓ Найдено %s бортжурналов на Drive2.ru", len(entries))
+    return entries
+
+
+def _scrape_model_journals(driver: Driver, data: Dict) -> List[Dict]:
+    """
+    Сбор записей бортжурналов по модели на Drom.ru и Drive2.ru в браузере
+
+    Args:
+        data: Ключ модели из build_model_key, max_entries и
+            необязательный список источников sources
+    """
+    scrapers = {"drom.ru": _scrape_drom_journals, "drive2.ru": _scrape_drive2_journals}
+    return scrape_sources(driver, data, scrapers, "journals")
+
+
+# Повторы выполняются для каждого листинга (open_listing), а не для всей
+# функции: сбой Drive2 не перезапускает уже собранный Drom
 @browser(
     block_images=False,
-    cache=True,
-    reuse_driver=True,
-    max_retry=3
+    reuse_driver=True
 )
-def search_board_journals(driver: Driver, data: Dict) -> List[Dict]:
-    """Поиск записей бортжурналов на Drom.ru и Drive2.ru"""
+def scrape_model_journals(driver: Driver, data: Dict) -> List[Dict]:
+    """Сбор бортжурналов по модели в браузере botasaurus (см. _scrape_model_journals)"""
+    return _scrape_model_journals(driver, data)
+
+
+def search_board_journals(data: Dict) -> List[Dict]:
+    """Поиск записей бортжурналов на Drom.ru и Drive2.ru
+
+    Записи собираются один раз на модель (см. build_model_key).
+    """
 
     # Валидация входных данных
     validate_required_keys(data, ["vehicle_info"], "search_board_journals")
-    
+
     vehicle_info = data["vehicle_info"]
     max_entries = data.get("max_entries", 20)
 
-    entries = []
-
     # Проверяем корректность vehicle_info
     if not validate_vehicle_info(vehicle_info, "search_board_journals"):
-        return entries
+        return []
 
-    # Получаем данные в зависимости от типа vehicle_info
-    if isinstance(vehicle_info, dict):
-        brand = vehicle_info.get('brand')
-        model = vehicle_info.get('model')
-        year = vehicle_info.get('year')
-    else:
-        brand = vehicle_info.brand
-        model = vehicle_info.model
-        year = vehicle_info.year
+    model_key = build_model_key(vehicle_info)
+    log.info("🔍 Поиск бортжурналов для %s %s", model_key['brand_for_url'], model_key['model_for_url'])
 
-    print(f"  🔍 Поиск бортжурналов для {brand} {model}")
-
-    brand_normalized = brand.lower().replace(' ', '-').replace('_', '-')
-    model_normalized = model.lower().replace(' ', '-').replace('_', '-')
-
-    brand_url_mapping = {
-        'mitsubishi': 'mitsubishi',
-        'volkswagen': 'volkswagen',
-        'mercedes-benz': 'mercedes',
-        'bmw': 'bmw',
-        'toyota': 'toyota',
-        'nissan': 'nissan',
-        'mazda': 'mazda',
-        'honda': 'honda',
-        'hyundai': 'hyundai',
-        'kia': 'kia',
-        'ford': 'ford',
-        'chevrolet': 'chevrolet',
-        'lada': 'lada',
-        'vaz': 'vaz'
-    }
+    model_entries = run_model_scraper(
+        scrape_model_journals,
+        _scrape_model_journals,
+        {"drom.ru": _http_drom_journals, "drive2.ru": _http_drive2_journals},
+        {**model_key, "max_entries": max_entries}
+    )
+    entries = _attach_vehicle_fields(model_entries or [], vehicle_info)
+
+    return entries[:max_entries]
 
-    brand_for_url = brand_url_mapping.get(brand_normalized, brand_normalized)
+# ==================== HTML-ОТЧЕТЫ ====================
 
-    model_url_mapping = {
-        'outlander': 'outlander',
-        'аутлендер': 'outlander',
-        'asx': 'asx',
-        'pajero': 'pajero',
-        'lancer': 'lancer',
-        'eclipse cross': 'eclipse-cross',
-        'l200': 'l200'
-    }
+REPORT_CSS = """body {
+    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+    max-width: 1200px;
+    margin: 0 auto;
+    padding: 20px;
+    background: #f5f5f5;
+}
+.header {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    padding: 30px;
+    border-radius: 10px;
+    margin-bottom: 30px;
+}
+.section {
+    background: white;
+    border-radius: 10px;
+    padding: 25px;
+    margin-bottom: 20px;
+    box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+}
+.info-grid {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
+    gap: 20px;
+}
+.info-item {
+    padding: 15px;
+    background: #f8f9fa;
+    border-radius: 8px;
+    border-left: 4px solid #667eea;
+}
+.info-label {
+    font-size: 12px;
+    color: #666;
+    text-transform: uppercase;
+    margin-bottom: 5px;
+}
+.info-value {
+    font-size: 18px;
+    font-weight: 600;
+    color: #333;
+}
+.ownership-timeline {
+    position: relative;
+    padding-left: 30px;
+}
+.ownership-item {
+    position: relative;
+    padding: 15px;
+    background: #f8f9fa;
+    border-radius: 8px;
+    margin-bottom: 15px;
+}
+.ownership-item:before {
+    content: '';
+    position: absolute;
+    left: -22px;
+    top: 20px;
+    width: 12px;
+    height: 12px;
+    border-radius: 50%;
+    background: #667eea;
+}
+.review-card {
+    padding: 20px;
+    background: #f8f9fa;
+    border-radius: 8px;
+    margin-bottom: 15px;
+    transition: transform 0.2s;
+}
+.review-card:hover {
+    transform: translateY(-2px);
+    box-shadow: 0 4px 12px rgba(0,0,0,0.1);
+}
+.review-badges {
+    margin-bottom: 10px;
+}
+.badge {
+    display: inline-block;
+    padding: 4px 10px;
+    border-radius: 4px;
+    font-size: 12px;
+    font-weight: 600;
+    margin-right: 5px;
+}
+.badge-success {
+    background: #d4edda;
+    color: #155724;
+}
+.badge-warning {
+    background: #fff3cd;
+    color: #856404;
+}
+.badge-info {
+    background: #d1ecf1;
+    color: #0c5460;
+}
+"""
 
-    model_for_url = model_url_mapping.get(model_normalized, model_normalized)
+REPORT_PAGE = """<!DOCTYPE html>
+<html lang="ru">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>Отчет по VIN: {vin}</title>
+{style_html}
+</head>
+<body>
+<div class="header">
+<h1>{full_name}</h1>
+<p>VIN: {vin}</p>
+<p>Отчет сформирован: {generated_at}</p>
+</div>
+<div class="section">
+<h2>📊 Основная информация</h2>
+<div class="info-grid">
+{main_items_html}
+</div>
+</div>
+<div class="section">
+<h2>🚗 Дополнительная информация</h2>
+<div class="info-grid">
+{additional_items_html}
+</div>
+</div>
+{ownership_html}{reviews_html}</body>
+</html>
+"""
 
-    # === DROM.RU БОРТЖУРНАЛ ===
-    try:
-        print("    📔 Бортжурналы на Drom.ru...")
-        drom_url = f"https://www.drom.ru/bjournal/{brand_for_url}/{model_for_url}/"
-        driver.google_get(drom_url, bypass_cloudflare=True)
-        driver.sleep(2)
-
-        bj_cards = driver.select_all('article')[:max_entries//2]
-
-        for card in bj_cards:
-            entry = {
-                "source": "drom.ru",
-                "type": "board_journal",
-                "brand": brand,
-                "model": model,
-                "year": year
-            }
+REPORT_INFO_ITEM = """<div class="info-item">
+<div class="info-label">{label}</div>
+<div class="info-value">{value}</div>
+</div>
+"""
 
-            title_elem = card.select('a')
-            if title_elem:
-                entry['title'] = title_elem.get_text(strip=True)
-                href = title_elem.get_attribute('href')
-                if href and not href.startswith('http'):
-                    href = f"https://www.drom.ru{href}"
-                entry['url'] = href
+REPORT_OWNERSHIP = """<div class="section">
+<h2>👥 История владения</h2>
+<div class="ownership-timeline">
+{items_html}</div>
+</div>
+"""
 
-            preview_elem = card.select('p')
-            if preview_elem:
-                entry['preview'] = preview_elem.get_text(strip=True)[:200]
+REPORT_OWNER = """<div class="ownership-item">
+<h4>Владелец #{number}{current}</h4>
+<p><strong>Тип:</strong> {type}</p>
+<p><strong>Период:</strong> с {date_from} {date_to}</p>
+<p><strong>Срок владения:</strong> {period}</p>
+<p><strong>Операция:</strong> {operation}</p>
+</div>
+"""
 
-            entries.append(entry)
+REPORT_REVIEWS = """<div class="section">
+<h2>📝 Отзывы владельцев ({count} найдено)</h2>
+{items_html}</div>
+"""
 
-        print(f"      ✓ Найдено {len([e for e in entries if e['source'] == 'drom.ru'])} бортжурналов на Drom.ru")
-    except Exception as e:
-        print(f"      ✗ Ошибка при поиске бортжурналов на Drom.ru: {e}")
+REPORT_REVIEW = """<div class="review-card">
+<div class="review-badges">{badges_html}</div>
+<h4>{title}</h4>
+<p><strong>Рейтинг:</strong> {rating}</p>
+{details_html}<a href="{url}" target="_blank" rel="noopener">Читать полностью →</a>
+</div>
+"""
 
-    # === DRIVE2.RU БОРТЖУРНАЛ ===
-    try:
-        print("    📔 Бортжурналы на Drive2.ru...")
-
-        drive2_brand_mapping = {
-            'mitsubishi': 'mitsubishi',
-            'volkswagen': 'volkswagen',
-            'mercedes-benz': 'mercedes-benz',
-            'toyota': 'toyota',
-            'nissan': 'nissan',
-            'mazda': 'mazda',
-            'honda': 'honda'
+REPORT_BADGE = """<span class="badge badge-{kind}">{text}</span>"""
+REPORT_PARAGRAPH = """<p>{label_html}{text}</p>
+"""
+
+
+class CompiledTemplate:
+    """
+    Шаблон с подстановками ``{name}``, разобранный один раз
+
+    Значения экранируются html.escape, кроме полей с суффиксом ``_html``,
+    в которые подставляются уже готовые фрагменты разметки.
+    """
+
+    def __init__(self, source: str):
+        self._parts = [
+            (literal, field, field.endswith("_html") if field else False)
+            for literal, field, _, _ in string.Formatter().parse(source)
+        ]
+
+    def render(self, **values) -> str:
+        chunks = []
+        for literal, field, raw in self._parts:
+            chunks.append(literal)
+            if field:
+                value = values[field]
+                chunks.append(value if raw else escape("" if value is None else str(value)))
+        return "".join(chunks)
+
+
+def safe_url(url) -> str:
+    """Ссылка из внешних данных: только http(s), иначе ``#``"""
+    url = str(url or "")
+    return url if url.startswith(("http://", "https://")) else "#"
+
+
+class HtmlReportRenderer:
+    """
+    Генерация HTML-отчетов по VIN
+
+    Шаблоны компилируются один раз при создании. Без ``stylesheet_href``
+    стили встраиваются в каждый отчет; в пакетном режиме отчеты ссылаются
+    на общий файл стилей, который записывается один раз на каталог.
+    """
+
+    MAX_REVIEWS = 10
+    STYLESHEET = "report.css"
+
+    def __init__(self, stylesheet_href: str = None):
+        """
+        Args:
+            stylesheet_href: Ссылка на внешний файл стилей (None - встроенные стили)
+        """
+        self.stylesheet_href = stylesheet_href
+        if stylesheet_href:
+            self._style_html = f'<link rel="stylesheet" href="{escape(stylesheet_href)}">'
+        else:
+            self._style_html = f"<style>\n{REPORT_CSS}</style>"
+
+        self._page = CompiledTemplate(REPORT_PAGE)
+        self._info_item = CompiledTemplate(REPORT_INFO_ITEM)
+        self._ownership = CompiledTemplate(REPORT_OWNERSHIP)
+        self._owner = CompiledTemplate(REPORT_OWNER)
+        self._reviews = CompiledTemplate(REPORT_REVIEWS)
+        self._review = CompiledTemplate(REPORT_REVIEW)
+        self._badge = CompiledTemplate(REPORT_BADGE)
+        self._paragraph = CompiledTemplate(REPORT_PARAGRAPH)
+
+    def _info_items(self, items: List[Tuple[str, object]]) -> str:
+        return "".join(self._info_item.render(label=label, value=value) for label, value in items)
+
+    def _render_ownership(self, vehicle_info) -> str:
+        if not vehicle_info or not vehicle_info.ownership_history:
+            return ""
+
+        owners = []
+        for i, owner in enumerate(vehicle_info.ownership_history, 1):
+            current = owner.get('to') == 'null' or not owner.get('to')
+            owners.append(self._owner.render(
+                number=i,
+                current=" (Текущий)" if current else "",
+                type=owner.get('type', 'Н/Д'),
+                date_from=owner.get('from', 'Н/Д'),
+                date_to="по настоящее время" if current else f"по {owner.get('to')}",
+                period=owner.get('period', 'Н/Д'),
+                operation=owner.get('operation', 'Н/Д')
+            ))
+        return self._ownership.render(items_html="".join(owners))
+
+    def _render_review(self, review: Dict) -> str:
+        badges = [self._badge.render(kind="warning", text=review.get("source", ""))]
+        if review.get('year_match'):
+            badges.append(self._badge.render(kind="success", text="Год совпадает"))
+        if review.get('engine_match'):
+            badges.append(self._badge.render(kind="info", text="Двигатель совпадает"))
+
+        details = []
+        if review.get("author"):
+            details.append(self._paragraph.render(label_html="<strong>Автор:</strong> ", text=review["author"]))
+        if review.get("car_info"):
+            details.append(self._paragraph.render(label_html="<strong>Информация об авто:</strong> ", text=review["car_info"]))
+        if review.get("preview"):
+            details.append(self._paragraph.render(label_html="", text=review["preview"]))
+
+        return self._review.render(
+            badges_html="".join(badges),
+            title=review.get('title', 'Без названия'),
+            rating=review.get('rating', 'Н/Д'),
+            details_html="".join(details),
+            url=safe_url(review.get('url'))
+        )
+
+    def render(self, result: Dict) -> str:
+        """HTML-отчет по результату парсинга VIN"""
+        summary = result.get("summary", {})
+        additional = summary.get("additional_info", {})
+        reviews = result.get("reviews", [])
+
+        reviews_html = ""
+        if reviews:
+            reviews_html = self._reviews.render(
+                count=len(reviews),
+                items_html="".join(self._render_review(review) for review in reviews[:self.MAX_REVIEWS])
+            )
+
+        return self._page.render(
+            vin=result['vin'],
+            style_html=self._style_html,
+            full_name=summary.get('full_name', 'Автомобиль'),
+            generated_at=datetime.now().strftime('%d.%m.%Y %H:%M'),
+            main_items_html=self._info_items([
+                ("Марка и модель", f"{summary.get('brand', 'Н/Д')} {summary.get('model', '')}"),
+                ("Год выпуска", summary.get('year', 'Н/Д')),
+                ("Цвет", summary.get('color', 'Н/Д')),
+                ("Двигатель", summary.get('engine', 'Н/Д')),
+                ("Тип кузова", summary.get('body_type', 'Н/Д')),
+                ("ПТС", summary.get('pts', 'Н/Д'))
+            ]),
+            additional_items_html=self._info_items([
+                ("ДТП", additional.get('accidents', 'Нет данных')),
+                ("Пробег", additional.get('mileage', 'Нет данных')),
+                ("Ограничения", additional.get('restrictions', 'Нет данных'))
+            ]),
+            ownership_html=self._render_ownership(result.get("vehicle_info")),
+            reviews_html=reviews_html
+        )
+
+
+class HtmlReportWriter:
+    """
+    Пакетная запись HTML-отчетов в каталог с общим файлом стилей
+
+    Потокобезопасен: write можно вызывать из on_result BatchRunner.
+    """
+
+    def __init__(self, directory: str = "output"):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.renderer = HtmlReportRenderer(stylesheet_href=HtmlReportRenderer.STYLESHEET)
+        self.count = 0
+        self._lock = threading.Lock()
+
+        with open(os.path.join(directory, HtmlReportRenderer.STYLESHEET), "w", encoding="utf-8") as f:
+            f.write(REPORT_CSS)
+
+    def write(self, result: Dict) -> str:
+        """Запись отчета по VIN, возвращает путь к файлу"""
+        content = self.renderer.render(result)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.directory, f"vin_report_{result['vin']}_{timestamp}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        with self._lock:
+            self.count += 1
+        return path
+
+    def write_batch(self, results: Iterable[Dict]) -> List[str]:
+        """Запись отчетов для набора результатов (результаты с ошибкой пропускаются)"""
+        return [self.write(result) for result in results if not result.get("error")]
+
+
+BATCH_VIEWER_CSS = """.layout {
+    display: grid;
+    grid-template-columns: 320px 1fr;
+    gap: 20px;
+    align-items: start;
+}
+.index {
+    position: sticky;
+    top: 20px;
+    max-height: calc(100vh - 40px);
+    overflow-y: auto;
+}
+.index input {
+    width: 100%;
+    box-sizing: border-box;
+    padding: 8px;
+    margin-bottom: 10px;
+}
+.index-item {
+    padding: 8px 10px;
+    border-radius: 6px;
+    cursor: pointer;
+}
+.index-item:hover, .index-item.active {
+    background: #eef0fb;
+}
+.index-item.error {
+    color: #a94442;
+}
+.index-vin {
+    font-family: monospace;
+    font-weight: 600;
+}
+"""
+
+BATCH_VIEWER_PAGE = """<!DOCTYPE html>
+<html lang="ru">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>Пакетный отчет по VIN</title>
+<style>
+{css_html}</style>
+</head>
+<body>
+<div class="header">
+<h1>Пакетный отчет по VIN</h1>
+<p id="batch-stats"></p>
+</div>
+<div class="layout">
+<div class="section index">
+<input id="filter" type="search" placeholder="VIN или модель">
+<div id="index"></div>
+</div>
+<div id="report"><div class="section">Выберите VIN в списке слева.</div></div>
+</div>
+<script src="{data_file}"></script>
+<script>
+(function () {{
+    var records = window.VIN_BATCH || [];
+    var index = document.getElementById("index");
+    var report = document.getElementById("report");
+    var active = null;
+
+    function el(tag, className, text) {{
+        var node = document.createElement(tag);
+        if (className) node.className = className;
+        if (text !== undefined && text !== null) node.textContent = String(text);
+        return node;
+    }}
+
+    function section(title) {{
+        var node = el("div", "section");
+        node.appendChild(el("h2", null, title));
+        report.appendChild(node);
+        return node;
+    }}
+
+    function grid(parent, items) {{
+        var node = el("div", "info-grid");
+        items.forEach(function (item) {{
+            var cell = el("div", "info-item");
+            cell.appendChild(el("div", "info-label", item[0]));
+            cell.appendChild(el("div", "info-value", item[1]));
+            node.appendChild(cell);
+        }});
+        parent.appendChild(node);
+    }}
+
+    function show(i) {{
+        var record = records[i];
+        // Раздел VIN разбирается только при открытии
+        var data = JSON.parse(record[3]);
+        var summary = data.summary || {{}};
+        var extra = summary.additional_info || {{}};
+        report.innerHTML = "";
+
+        var header = el("div", "header");
+        header.appendChild(el("h1", null, summary.full_name || "Автомобиль"));
+        header.appendChild(el("p", null, "VIN: " + record[0]));
+        report.appendChild(header);
+
+        if (data.error) {{
+            section("❌ Ошибка").appendChild(el("p", null, data.error));
+            return;
+        }}
+
+        grid(section("📊 Основная информация"), [
+            ["Марка и модель", (summary.brand || "Н/Д") + " " + (summary.model || "")],
+            ["Год выпуска", summary.year || "Н/Д"],
+            ["Цвет", summary.color || "Н/Д"],
+            ["Двигатель", summary.engine || "Н/Д"],
+            ["Тип кузова", summary.body_type || "Н/Д"],
+            ["ПТС", summary.pts || "Н/Д"]
+        ]);
+        grid(section("🚗 Дополнительная информация"), [
+            ["ДТП", extra.accidents || "Нет данных"],
+            ["Пробег", extra.mileage || "Нет данных"],
+            ["Ограничения", extra.restrictions || "Нет данных"]
+        ]);
+
+        if (data.owners && data.owners.length) {{
+            var timeline = el("div", "ownership-timeline");
+            data.owners.forEach(function (owner, n) {{
+                var current = !owner.to || owner.to === "null";
+                var item = el("div", "ownership-item");
+                item.appendChild(el("h4", null, "Владелец #" + (n + 1) + (current ? " (Текущий)" : "")));
+                item.appendChild(el("p", null, "Тип: " + (owner.type || "Н/Д")));
+                item.appendChild(el("p", null, "Период: с " + (owner.from || "Н/Д") + (current ? " по настоящее время" : " по " + owner.to)));
+                item.appendChild(el("p", null, "Срок владения: " + (owner.period || "Н/Д")));
+                timeline.appendChild(item);
+            }});
+            section("👥 История владения").appendChild(timeline);
+        }}
+
+        if (data.reviews && data.reviews.length) {{
+            var reviews = section("📝 Отзывы владельцев (" + data.reviews_found + " найдено)");
+            data.reviews.forEach(function (review) {{
+                var card = el("div", "review-card");
+                var badges = el("div", "review-badges");
+                badges.appendChild(el("span", "badge badge-warning", review.source));
+                if (review.year_match) badges.appendChild(el("span", "badge badge-success", "Год совпадает"));
+                if (review.engine_match) badges.appendChild(el("span", "badge badge-info", "Двигатель совпадает"));
+                card.appendChild(badges);
+                card.appendChild(el("h4", null, review.title || "Без названия"));
+                card.appendChild(el("p", null, "Рейтинг: " + (review.rating || "Н/Д")));
+                if (review.author) card.appendChild(el("p", null, "Автор: " + review.author));
+                if (review.preview) card.appendChild(el("p", null, review.preview));
+                var link = el("a", null, "Читать полностью →");
+                link.href = review.url;
+                link.target = "_blank";
+                link.rel = "noopener";
+                card.appendChild(link);
+                reviews.appendChild(card);
+            }});
+        }}
+    }}
+
+    function select(i, item) {{
+        if (active) active.classList.remove("active");
+        active = item;
+        item.classList.add("active");
+        show(i);
+    }}
+
+    var fragment = document.createDocumentFragment();
+    records.forEach(function (record, i) {{
+        var item = el("div", "index-item" + (record[2] ? " error" : ""));
+        item.appendChild(el("div", "index-vin", record[0]));
+        item.appendChild(el("div", null, record[2] ? "Ошибка" : record[1]));
+        item.dataset.search = (record[0] + " " + record[1]).toLowerCase();
+        item.onclick = function () {{ select(i, item); }};
+        fragment.appendChild(item);
+    }});
+    index.appendChild(fragment);
+
+    var errors = records.filter(function (record) {{ return record[2]; }}).length;
+    document.getElementById("batch-stats").textContent =
+        "VIN: " + records.length + ", с ошибками: " + errors;
+
+    document.getElementById("filter").oninput = function () {{
+        var query = this.value.trim().toLowerCase();
+        Array.prototype.forEach.call(index.children, function (item) {{
+            item.style.display = item.dataset.search.indexOf(query) === -1 ? "none" : "";
+        }});
+    }};
+}})();
+</script>
+</body>
+</html>
+"""
+
+
+class BatchReportWriter:
+    """
+    Сводный отчет по пакету: один файл данных и одна HTML-страница
+
+    Результаты дописываются в ``<name>.data.js`` по мере обработки (одна
+    строка на VIN, раздел хранится JSON-строкой и разбирается в браузере
+    только при открытии), страница ``<name>.html`` строит оглавление и
+    показывает выбранный VIN. Работает без веб-сервера (file://).
+    Потокобезопасен: write можно вызывать из on_result BatchRunner.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Путь к отчету без расширения
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.html_path = f"{path}.html"
+        self.data_path = f"{path}.data.js"
+        self.count = 0
+        self._lock = threading.Lock()
+
+        page = CompiledTemplate(BATCH_VIEWER_PAGE).render(
+            css_html=REPORT_CSS + BATCH_VIEWER_CSS,
+            data_file=os.path.basename(self.data_path)
+        )
+        with open(self.html_path, "w", encoding="utf-8") as f:
+            f.write(page)
+
+        self._file = open(self.data_path, "w", encoding="utf-8")
+        self._file.write("window.VIN_BATCH = [];\n")
+        self._file.flush()
+
+    @staticmethod
+    def section(result: Dict) -> Dict:
+        """Компактные данные VIN для просмотра"""
+        summary = result.get("summary", {})
+        vehicle_info = result.get("vehicle_info")
+        if isinstance(vehicle_info, dict):
+            owners = vehicle_info.get("ownership_history") or []
+        else:
+            owners = getattr(vehicle_info, "ownership_history", None) or []
+        reviews = result.get("reviews", [])
+
+        return {
+            "error": result.get("error"),
+            "summary": summary,
+            "owners": owners,
+            "reviews_found": len(reviews),
+            "reviews": [
+                {
+                    "source": review.get("source", ""),
+                    "title": review.get("title"),
+                    "rating": review.get("rating"),
+                    "author": review.get("author"),
+                    "preview": review.get("preview"),
+                    "url": safe_url(review.get("url")),
+                    "year_match": review.get("year_match"),
+                    "engine_match": review.get("engine_match")
+                }
+                for review in reviews[:HtmlReportRenderer.MAX_REVIEWS]
+            ]
+        }
+
+    def write(self, result: Dict) -> None:
+        """Добавление результата VIN в отчет"""
+        section = json.dumps(self.section(result), ensure_ascii=False, separators=(",", ":"), default=str)
+        record = [result["vin"], result.get("summary", {}).get("full_name", ""), bool(result.get("error")), section]
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        # U+2028/U+2029 допустимы в JSON, но не в строках старых движков JS
+        line = line.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+        with self._lock:
+            self._file.write(f"VIN_BATCH.push({line});\n")
+            self._file.flush()
+            self.count += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "BatchReportWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+HTML_RENDERER = HtmlReportRenderer()
+
+# ==================== СПЕКУЛЯТИВНАЯ ПРЕДЗАГРУЗКА ====================
+
+class ModelHistory:
+    """
+    История моделей по префиксу VIN в текущем пакете
+
+    Префикс - WMI и VDS (символы 1-8) плюс код модельного года: у VIN
+    одного производителя с одинаковым префиксом почти всегда одна модель.
+    """
+
+    def __init__(self, size: int = 5, min_votes: int = 2):
+        """
+        Args:
+            size: Сколько последних VIN с префиксом учитывать
+            min_votes: Сколько из них должны совпасть для догадки
+        """
+        self.size = size
+        self.min_votes = min_votes
+        self._entries: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def prefix(vin: str) -> str:
+        return vin[:8] + vin[9]
+
+    def record(self, vin: str, vehicle_info: VehicleInfo) -> None:
+        """Запоминание модели, определенной по данным ГИБДД"""
+        entry = (vehicle_info.brand, vehicle_info.model, vehicle_info.year, vehicle_info.engine_volume)
+        with self._lock:
+            self._entries.setdefault(self.prefix(vin), deque(maxlen=self.size)).append(entry)
+
+    def guess(self, vin: str) -> Optional[Dict]:
+        """Предполагаемые марка, модель, год и объем двигателя (None - нет уверенности)"""
+        with self._lock:
+            entries = list(self._entries.get(self.prefix(vin), ()))
+        if not entries:
+            return None
+
+        entry, votes = Counter(entries).most_common(1)[0]
+        if votes < self.min_votes:
+            return None
+        brand, model, year, engine_volume = entry
+        return {"brand": brand, "model": model, "year": year, "engine_volume": engine_volume}
+
+
+@dataclass
+class Speculation:
+    """Предзагрузка, запущенная для VIN до ответа ГИБДД"""
+    key: Tuple
+    future: Future
+
+
+class Speculator:
+    """
+    Предзагрузка отзывов по предполагаемой модели, пока идет запрос ГИБДД
+
+    Модель угадывается по истории пакета (ModelHistory). Предзагрузка
+    вызывает обычный поиск отзывов, который кэширует карточки модели в
+    RESULT_CACHE. Если ответ ГИБДД дал ту же модель (тот же ключ
+    build_model_key), этап отзывов дожидается предзагрузки и берет
+    результат из кэша; иначе предзагрузка отбрасывается.
+    """
+
+    def __init__(
+        self,
+        history: ModelHistory = None,
+        workers: int = 1,
+        max_reviews: int = 20,
+        include_board_journals: bool = False
+    ):
+        """
+        Args:
+            history: История моделей (по умолчанию новая)
+            workers: Количество потоков (браузеров) для предзагрузки
+            max_reviews: Как у основного поиска, иначе ключ кэша не совпадет
+            include_board_journals: Предзагружать и бортжурналы
+        """
+        self.history = history or ModelHistory()
+        self.workers = workers
+        self.max_reviews = max_reviews
+        self.include_board_journals = include_board_journals
+        self.started = 0
+        self.confirmed = 0
+        self.discarded = 0
+        self._inflight: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="speculative")
+
+    @staticmethod
+    def model_key(vehicle_info) -> Tuple:
+        return tuple(sorted(build_model_key(vehicle_info).items()))
+
+    def _prefetch(self, guess: Dict) -> None:
+        try:
+            search_reviews_enhanced({"vehicle_info": guess, "max_reviews": self.max_reviews})
+            if self.include_board_journals:
+                search_board_journals({"vehicle_info": guess, "max_entries": self.max_reviews})
+        except Exception as e:
+            log.warning("⚠️ Ошибка предзагрузки отзывов: %s", e)
+
+    def start(self, vin: str) -> Optional[Speculation]:
+        """Запуск предзагрузки для VIN, если модель удается угадать"""
+        guess = self.history.guess(vin)
+        if guess is None:
+            return None
+
+        key = self.model_key(guess)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                # Не копим очередь догадок больше, чем успевают потоки
+                if len(self._inflight) >= 2 * self.workers:
+                    return None
+                log.info("🔮 %s: предзагрузка отзывов для %s %s %s", vin, guess['brand'], guess['model'], guess['year'])
+                future = self._pool.submit(self._prefetch, guess)
+                self._inflight[key] = future
+                future.add_done_callback(lambda _, key=key: self._forget(key))
+            self.started += 1
+        return Speculation(key=key, future=future)
+
+    def _forget(self, key: Tuple) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def settle(self, vin: str, speculation: Optional[Speculation], vehicle_info: VehicleInfo) -> Optional[Speculation]:
+        """
+        Сверка предзагрузки с ответом ГИБДД
+
+        Returns:
+            Подтвержденная предзагрузка или None
+        """
+        self.history.record(vin, vehicle_info)
+        if speculation is None:
+            return None
+
+        confirmed = speculation.key == self.model_key(vehicle_info)
+        with self._lock:
+            if confirmed:
+                self.confirmed += 1
+            else:
+                self.discarded += 1
+        if not confirmed:
+            log.info("🔮 %s: модель не совпала, предзагрузка отброшена", vin)
+            return None
+        return speculation
+
+    @staticmethod
+    def wait(speculation: Optional[Speculation]) -> None:
+        """Ожидание подтвержденной предзагрузки перед поиском отзывов"""
+        if speculation is not None:
+            speculation.future.result()
+
+    def close(self) -> None:
+        """Остановка пула: неначатые предзагрузки отменяются, начатые дожидаются"""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+# ==================== ГЛАВНЫЙ КЛАСС VIN-ПАРСЕРА ====================
+
+class VINParser:
+    """Основной класс для парсинга по VIN с использованием API ГИБДД"""
+    
+    def __init__(self, api_key: str = None):
+        """
+        Инициализация парсера
+        
+        Args:
+            api_key: API ключ для доступа к сервису ГИБДД
+        """
+        self.api_key = api_key
+    
+    @staticmethod
+    def validate_vin(vin: str) -> bool:
+        """Проверка формата VIN-кода (см. также VIN_DECODER.decode)"""
+        return bool(VIN_PATTERN.match(vin.upper()))
+    
+    def fetch_gibdd(self, vin: str, use_mock_data: bool = False) -> Optional[Dict]:
+        """
+        Получение ответа ГИБДД для VIN (этап 1 без разбора)
+
+        Вынесено из parse_by_vin, чтобы пакетная обработка могла запрашивать
+        ГИБДД в отдельном пуле потоков.
+
+        Args:
+            vin: Нормализованный VIN-код
+            use_mock_data: Использовать тестовые данные (для демонстрации)
+        """
+        if replaying():
+            return ARCHIVE.get_json(f"gibdd:{vin}")
+        if not use_mock_data:
+            return RESULT_CACHE.cached(
+                "get_gibdd_data",
+                {"vin": vin},
+                lambda: archived_json(f"gibdd:{vin}", lambda: get_gibdd_data(vin, self.api_key))
+            )
+
+        # Используем предоставленные тестовые данные
+        response = {
+            "status": 200,
+            "response": {
+                "status": 200,
+                "found": True,
+                "vehicle": {
+                    "vin": vin,
+                    "bodyNumber": vin,
+                    "engineNumber": "9459",
+                    "model": "МИЦУБИСИ АУТЛЕНДЕР 2.0",
+                    "color": "Белый",
+                    "year": "2013",
+                    "engineVolume": "1998.0",
+                    "powerHp": "146.0",
+                    "powerKwt": "107.4",
+                    "category": "В",
+                    "type": "21",
+                    "typeinfo": "Легковые автомобили универсал"
+                },
+                "vehiclePassport": {
+                    "number": "78УТ410971",
+                    "issue": "ТАМОЖНЯ: 10009194"
+                },
+                "ownershipPeriod": [
+                    {
+                        "lastOperation": "07",
+                        "lastOperationInfo": "прекращение регистрации",
+                        "simplePersonType": "Natural",
+                        "simplePersonTypeInfo": "Физическое лицо",
+                        "from": "19.10.2013",
+                        "to": "2024-07-20",
+                        "period": "10 лет 9 месяцев"
+                    },
+                    {
+                        "lastOperation": "02",
+                        "lastOperationInfo": "регистрация",
+                        "simplePersonType": "Natural",
+                        "simplePersonTypeInfo": "Физическое лицо",
+                        "from": "03.08.2024",
+                        "to": "null",
+                        "period": "текущий владелец"
+                    }
+                ]
+            },
+            "success": True
+        }
+        if recording():
+            ARCHIVE.put_json(f"gibdd:{vin}", response)
+        return response
+
+    def new_result(self, vin: str) -> Dict:
+        """Пустой результат анализа VIN"""
+        return {
+            "vin": vin,
+            "parsed_at": datetime.now().isoformat(),
+            "sources": [],
+            "gibdd_data": None,
+            "vehicle_info": None,
+            "additional_info": {},
+            "reviews": [],
+            "summary": {},
+            # Марка и год из VIN известны до ответа ГИБДД
+            "decoded_vin": asdict(VIN_DECODER.decode(vin))
         }
 
-        drive2_brand = drive2_brand_mapping.get(brand_normalized, brand_for_url)
-        drive2_url = f"https://www.drive2.ru/board/{drive2_brand}/{model_for_url}/"
+    def apply_gibdd(self, result: Dict, gibdd_response: Optional[Dict]) -> Optional[VehicleInfo]:
+        """
+        Этап 1: разбор ответа ГИБДД в результат
+
+        Returns:
+            VehicleInfo или None, если данных ГИБДД нет (тогда в
+            result записывается error, и --resume повторит VIN)
+        """
+        if gibdd_response and gibdd_response.get('success'):
+            result["gibdd_data"] = gibdd_response.get('response')
+            result["sources"].append("ГИБДД")
+            
+            # Парсим данные ГИБДД
+            vehicle_info = parse_gibdd_response(gibdd_response)
+            
+            if vehicle_info is None:
+                log.warning("✗ Не удалось распарсить данные ГИБДД")
+                result["error"] = "Не удалось распарсить данные ГИБДД"
+                return None
+                
+            result["vehicle_info"] = vehicle_info
+            
+            log.info(
+                "✓ ГИБДД: %s %s %s, %s, %s см³, %s л.с., ПТС %s, владельцев %d",
+                vehicle_info.brand, vehicle_info.model, vehicle_info.year, vehicle_info.color,
+                vehicle_info.engine_volume, vehicle_info.power_hp, vehicle_info.pts_number,
+                len(vehicle_info.ownership_history)
+            )
+            return vehicle_info
+
+        log.warning("✗ Не удалось получить данные из ГИБДД")
+        result["error"] = "Не удалось получить данные из ГИБДД"
+        return None
+
+    @timed_stage("additional")
+    def collect_additional(self, result: Dict, vehicle_info: VehicleInfo) -> None:
+        """Этап 2: поиск дополнительной информации"""
+        log.info("🔍 Этап 2: Поиск дополнительной информации...")
+        
+        try:
+            additional_data = {
+                "vehicle_info": vehicle_info
+            }
+            additional = RESULT_CACHE.cached(
+                "get_additional_info",
+                {"vin": vehicle_info.vin},
+                lambda: archived_json(f"additional:{vehicle_info.vin}", lambda: get_additional_info(additional_data))
+            )
+            result["additional_info"] = additional or {}
+            
+            if additional:
+                if 'accidents' in additional:
+                    log.info("• ДТП: %s", additional['accidents'])
+                if 'mileage' in additional:
+                    log.info("• Пробег: %s", additional['mileage'])
+                if 'restrictions' in additional:
+                    log.info("• Ограничения: %s", additional['restrictions'])
+        except Exception as e:
+            log.warning("✗ Ошибка при получении дополнительной информации: %s", e)
+            result["additional_info"] = {}
 
-        driver.get_via_this_page(drive2_url)
-        driver.sleep(2)
+    @timed_stage("reviews")
+    def collect_reviews(
+        self,
+        result: Dict,
+        vehicle_info: VehicleInfo,
+        max_reviews: int = 20,
+        include_board_journals: bool = False
+    ) -> None:
+        """
+        Этап 3: поиск отзывов и бортжурналов
 
-        drive2_cards = driver.select_all('.c-post-card')[:max_entries//2]
+        Отзывы и бортжурналы не зависят друг от друга, поэтому собираются
+        одновременно (каждый декоратор @browser использует свой браузер).
+        Ошибка поиска записывается в ``result["stage_errors"]`` под именем
+        reviews или board_journals, найденное другим поиском сохраняется.
+        """
+        log.info("📝 Этап 3: Поиск отзывов владельцев...")
 
-        for card in drive2_cards:
-            entry = {
-                "source": "drive2.ru",
-                "type": "board_journal",
-                "brand": brand,
-                "model": model,
-                "year": year
+        reviews_data = {
+            "vehicle_info": vehicle_info,
+            "max_reviews": max_reviews,
+        }
+        searches = [("reviews", "✗ Ошибка при поиске отзывов: %s", search_reviews_enhanced, reviews_data)]
+        if include_board_journals:
+            log.info("📔 Поиск бортжурналов...")
+            bj_data = {
+                "vehicle_info": vehicle_info,
+                "max_entries": max_reviews,
             }
+            searches.append(("board_journals", "✗ Ошибка при поиске бортжурналов: %s", search_board_journals, bj_data))
 
-            title_elem = card.select('a')
-            if title_elem:
-                entry['title'] = title_elem.get_text(strip=True)
-                href = title_elem.get_attribute('href')
-                if href and not href.startswith('http'):
-                    href = f"https://www.drive2.ru{href}"
-                entry['url'] = href
-
-            preview_elem = card.select('p')
-            if preview_elem:
-                entry['preview'] = preview_elem.get_text(strip=True)[:200]
-
-            entries.append(entry)
+        reviews = []
+        with ThreadPoolExecutor(max_workers=len(searches), thread_name_prefix="stage3") as pool:
+            # Потоки пула получают контекст журнала (vin, stage) вызывающего
+            futures = [
+                (name, message, pool.submit(contextvars.copy_context().run, search, data))
+                for name, message, search, data in searches
+            ]
+            # Ошибка одного поиска не отменяет результаты другого
+            for name, message, future in futures:
+                try:
+                    reviews.extend(future.result())
+                except Exception as e:
+                    log.warning(message, e)
+                    result.setdefault("stage_errors", {})[name] = str(e)
 
-        print(f"      ✓ Найдено {len([e for e in entries if e['source'] == 'drive2.ru'])} бортжурналов на Drive2.ru")
-    except Exception as e:
-        print(f"      ✗ Ошибка при поиске бортжурналов на Drive2.ru: {e}")
+        result["reviews"] = reviews
 
-    return entries[:max_entries]
+        # Статистика по отзывам считается за один проход и только для вывода
+        if log.isEnabledFor(logging.INFO):
+            by_source = Counter(r['source'] for r in reviews)
+            exact_matches = sum(1 for r in reviews if r.get('year_match') or r.get('engine_match'))
+            log.info(
+                "📊 Отзывов и бортжурналов: %d (Drom.ru %d, Drive2.ru %d, с точным совпадением %d)",
+                len(reviews), by_source['drom.ru'], by_source['drive2.ru'], exact_matches,
+                extra={"reviews": len(reviews), "by_source": dict(by_source)}
+            )
 
-# ==================== ГЛАВНЫЙ КЛАСС VIN-ПАРСЕРА ====================
+    @timed_stage("summary")
+    def build_summary(self, result: Dict, vehicle_info: VehicleInfo) -> None:
+        """Этап 4: формирование итогового резюме"""
+        result["summary"] = {
+            "vin": result["vin"],
+            "full_name": f"{vehicle_info.brand} {vehicle_info.model} {vehicle_info.year}",
+            "brand": vehicle_info.brand,
+            "model": vehicle_info.model,
+            "year": vehicle_info.year,
+            "color": vehicle_info.color,
+            "engine": f"{vehicle_info.engine_volume} см³ / {vehicle_info.power_hp} л.с.",
+            "body_type": vehicle_info.type_info,
+            "pts": vehicle_info.pts_number,
+            "owners_count": len(vehicle_info.ownership_history),
+            "current_owner_since": vehicle_info.ownership_history[-1]['from'] if vehicle_info.ownership_history else None,
+            "reviews_found": len(result["reviews"]),
+            "data_sources": result["sources"],
+            "additional_info": {
+                "accidents": result["additional_info"].get("accidents", "Нет данных"),
+                "mileage": result["additional_info"].get("mileage", "Нет данных"),
+                "restrictions": result["additional_info"].get("restrictions", "Нет данных")
+            }
+        }
 
-class VINParser:
-    """Основной класс для парсинга по VIN с использованием API ГИБДД"""
-    
-    def __init__(self, api_key: str = None):
-        """
-        Инициализация парсера
-        
-        Args:
-            api_key: API ключ для доступа к сервису ГИБДД
-        """
-        self.api_key = api_key
-    
-    @staticmethod
-    def validate_vin(vin: str) -> bool:
-        """Проверка валидности VIN-кода"""
-        vin_pattern = re.compile(r'^[A-HJ-NPR-Z0-9]{17}$')
-        return bool(vin_pattern.match(vin.upper()))
-    
     def parse_by_vin(
         self,
         vin: str,
@@ -764,7 +3958,9 @@ class VINParser:
         get_additional: bool = True,
         max_reviews: int = 20,
         use_mock_data: bool = False,
-        include_board_journals: bool = False
+        include_board_journals: bool = False,
+        gibdd_response: Dict = None,
+        speculator: Speculator = None
     ) -> Dict:
         """
         Главная функция парсинга по VIN
@@ -776,198 +3972,73 @@ class VINParser:
             max_reviews: Максимальное количество отзывов
             use_mock_data: Использовать тестовые данные (для демонстрации)
             include_board_journals: Искать ли записи бортжурналов
+            gibdd_response: Заранее полученный ответ ГИБДД (см. fetch_gibdd)
+            speculator: Предзагрузка отзывов по угаданной модели на время
+                запроса ГИБДД (см. Speculator)
         """
         
         # Валидация и нормализация VIN
         vin = vin.upper().strip()
         
-        if not self.validate_vin(vin):
+        decoded = VIN_DECODER.decode(vin)
+        if not decoded.valid:
             return {
-                "error": "Неверный формат VIN-кода",
+                "error": decoded.error,
                 "vin": vin
             }
         
-        print(f"\n{'='*70}")
-        print(f"🔎 КОМПЛЕКСНЫЙ АНАЛИЗ VIN: {vin}")
-        print(f"{'='*70}")
+        with log_context(vin=vin):
+            return self._parse_by_vin(
+                vin, search_reviews, get_additional, max_reviews,
+                use_mock_data, include_board_journals, gibdd_response, speculator
+            )
+
+    def _parse_by_vin(
+        self,
+        vin: str,
+        search_reviews: bool,
+        get_additional: bool,
+        max_reviews: int,
+        use_mock_data: bool,
+        include_board_journals: bool,
+        gibdd_response: Optional[Dict],
+        speculator: Optional[Speculator]
+    ) -> Dict:
+        log.info("🔎 Комплексный анализ VIN: %s", vin)
         
-        result = {
-            "vin": vin,
-            "parsed_at": datetime.now().isoformat(),
-            "sources": [],
-            "gibdd_data": None,
-            "vehicle_info": None,
-            "additional_info": {},
-            "reviews": [],
-            "summary": {}
-        }
+        result = self.new_result(vin)
         
         # 1. Получение данных из ГИБДД
-        print("\n📊 Этап 1: Получение официальных данных ГИБДД...")
-        
-        if use_mock_data:
-            # Используем предоставленные тестовые данные
-            gibdd_response = {
-                "status": 200,
-                "response": {
-                    "status": 200,
-                    "found": True,
-                    "vehicle": {
-                        "vin": vin,
-                        "bodyNumber": vin,
-                        "engineNumber": "9459",
-                        "model": "МИЦУБИСИ АУТЛЕНДЕР 2.0",
-                        "color": "Белый",
-                        "year": "2013",
-                        "engineVolume": "1998.0",
-                        "powerHp": "146.0",
-                        "powerKwt": "107.4",
-                        "category": "В",
-                        "type": "21",
-                        "typeinfo": "Легковые автомобили универсал"
-                    },
-                    "vehiclePassport": {
-                        "number": "78УТ410971",
-                        "issue": "ТАМОЖНЯ: 10009194"
-                    },
-                    "ownershipPeriod": [
-                        {
-                            "lastOperation": "07",
-                            "lastOperationInfo": "прекращение регистрации",
-                            "simplePersonType": "Natural",
-                            "simplePersonTypeInfo": "Физическое лицо",
-                            "from": "19.10.2013",
-                            "to": "2024-07-20",
-                            "period": "10 лет 9 месяцев"
-                        },
-                        {
-                            "lastOperation": "02",
-                            "lastOperationInfo": "регистрация",
-                            "simplePersonType": "Natural",
-                            "simplePersonTypeInfo": "Физическое лицо",
-                            "from": "03.08.2024",
-                            "to": "null",
-                            "period": "текущий владелец"
-                        }
-                    ]
-                },
-                "success": True
-            }
-        else:
-            gibdd_response = get_gibdd_data(vin, self.api_key)
+        log.info("📊 Этап 1: Получение официальных данных ГИБДД...")
         
-        if gibdd_response and gibdd_response.get('success'):
-            result["gibdd_data"] = gibdd_response.get('response')
-            result["sources"].append("ГИБДД")
-            
-            # Парсим данные ГИБДД
-            vehicle_info = parse_gibdd_response(gibdd_response)
-            
-            if vehicle_info is None:
-                print("  ✗ Не удалось распарсить данные ГИБДД")
-                return result
-                
-            result["vehicle_info"] = vehicle_info
-            
-            print(f"  ✓ Получены официальные данные:")
-            print(f"    • Марка: {vehicle_info.brand}")
-            print(f"    • Модель: {vehicle_info.model}")
-            print(f"    • Год: {vehicle_info.year}")
-            print(f"    • Цвет: {vehicle_info.color}")
-            print(f"    • Двигатель: {vehicle_info.engine_volume} см³, {vehicle_info.power_hp} л.с.")
-            print(f"    • ПТС: {vehicle_info.pts_number}")
-            print(f"    • Владельцев: {len(vehicle_info.ownership_history)}")
-        else:
-            print("  ✗ Не удалось получить данные из ГИБДД")
+        started = time.perf_counter()
+        speculation = None
+        if gibdd_response is None and speculator and search_reviews:
+            speculation = speculator.start(vin)
+        with stage_timer(result, "gibdd"):
+            if gibdd_response is None:
+                gibdd_response = self.fetch_gibdd(vin, use_mock_data)
+            vehicle_info = self.apply_gibdd(result, gibdd_response)
+        if vehicle_info is None:
+            record_total(result, started)
             return result
+        if speculator:
+            speculation = speculator.settle(vin, speculation, vehicle_info)
 
         # 2. Поиск дополнительной информации
-        if get_additional and vehicle_info:
-            print("\n🔍 Этап 2: Поиск дополнительной информации...")
-            
-            try:
-                additional_data = {
-                    "vehicle_info": vehicle_info
-                }
-                additional = get_additional_info(additional_data)
-                result["additional_info"] = additional
-                
-                if additional:
-                    if 'accidents' in additional:
-                        print(f"    • ДТП: {additional['accidents']}")
-                    if 'mileage' in additional:
-                        print(f"    • Пробег: {additional['mileage']}")
-                    if 'restrictions' in additional:
-                        print(f"    • Ограничения: {additional['restrictions']}")
-            except Exception as e:
-                print(f"    ✗ Ошибка при получении дополнительной информации: {e}")
-                result["additional_info"] = {}
+        if get_additional:
+            self.collect_additional(result, vehicle_info)
         
         # 3. Поиск отзывов и бортжурналов
-        if search_reviews and vehicle_info:
-            print("\n📝 Этап 3: Поиск отзывов владельцев...")
-
-            try:
-                reviews_data = {
-                    "vehicle_info": vehicle_info,
-                    "max_reviews": max_reviews,
-                }
-                reviews = search_reviews_enhanced(reviews_data)
-
-                if include_board_journals:
-                    print("  📔 Поиск бортжурналов...")
-                    bj_data = {
-                        "vehicle_info": vehicle_info,
-                        "max_entries": max_reviews,
-                    }
-                    board_journals = search_board_journals(bj_data)
-                    reviews.extend(board_journals)
-
-                result["reviews"] = reviews
-
-                # Статистика по отзывам
-                drom_count = len([r for r in reviews if r['source'] == 'drom.ru'])
-                drive2_count = len([r for r in reviews if r['source'] == 'drive2.ru'])
-
-                print(f"\n  📊 Статистика отзывов и бортжурналов:")
-                print(f"    • Всего найдено: {len(reviews)}")
-                print(f"    • Drom.ru: {drom_count}")
-                print(f"    • Drive2.ru: {drive2_count}")
-
-                # Отзывы с точным совпадением
-                exact_matches = [r for r in reviews if r.get('year_match') or r.get('engine_match')]
-                if exact_matches:
-                    print(f"    • С точным совпадением характеристик: {len(exact_matches)}")
-            except Exception as e:
-                print(f"    ✗ Ошибка при поиске отзывов: {e}")
-                result["reviews"] = []
+        if search_reviews:
+            Speculator.wait(speculation)
+            self.collect_reviews(result, vehicle_info, max_reviews, include_board_journals)
         
         # 4. Формирование итогового резюме
-        if vehicle_info:
-            result["summary"] = {
-                "vin": vin,
-                "full_name": f"{vehicle_info.brand} {vehicle_info.model} {vehicle_info.year}",
-                "brand": vehicle_info.brand,
-                "model": vehicle_info.model,
-                "year": vehicle_info.year,
-                "color": vehicle_info.color,
-                "engine": f"{vehicle_info.engine_volume} см³ / {vehicle_info.power_hp} л.с.",
-                "body_type": vehicle_info.type_info,
-                "pts": vehicle_info.pts_number,
-                "owners_count": len(vehicle_info.ownership_history),
-                "current_owner_since": vehicle_info.ownership_history[-1]['from'] if vehicle_info.ownership_history else None,
-                "reviews_found": len(result["reviews"]),
-                "data_sources": result["sources"],
-                "additional_info": {
-                    "accidents": result["additional_info"].get("accidents", "Нет данных"),
-                    "mileage": result["additional_info"].get("mileage", "Нет данных"),
-                    "restrictions": result["additional_info"].get("restrictions", "Нет данных")
-                }
-            }
+        self.build_summary(result, vehicle_info)
+        record_total(result, started)
         
-        print(f"\n{'='*70}")
-        print(f"✅ АНАЛИЗ ЗАВЕРШЕН")
-        print(f"{'='*70}")
+        log.info("✅ Анализ завершен за %.1f с", result["timings"]["total"])
         
         return result
     
@@ -1020,10 +4091,7 @@ class VINParser:
             
         elif format == "json":
             # Преобразуем VehicleInfo в словарь для сериализации
-            result_copy = result.copy()
-            if result_copy.get("vehicle_info") and hasattr(result_copy["vehicle_info"], 'to_dict'):
-                result_copy["vehicle_info"] = result_copy["vehicle_info"].to_dict()
-            bt.write_json(result_copy, filename)
+            bt.write_json(result_to_dict(result), filename)
             return f"{filename}.json"
         
         else:
@@ -1031,239 +4099,628 @@ class VINParser:
     
     def _generate_html_report(self, result: Dict) -> str:
         """Генерация HTML отчета"""
-        
-        summary = result.get("summary", {})
-        vehicle_info = result.get("vehicle_info")
-        reviews = result.get("reviews", [])
-        
-        html = f"""
-        <!DOCTYPE html>
-        <html lang="ru">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Отчет по VIN: {result['vin']}</title>
-            <style>
-                body {{
-                    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                    max-width: 1200px;
-                    margin: 0 auto;
-                    padding: 20px;
-                    background: #f5f5f5;
-                }}
-                .header {{
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    color: white;
-                    padding: 30px;
-                    border-radius: 10px;
-                    margin-bottom: 30px;
-                }}
-                .section {{
-                    background: white;
-                    border-radius: 10px;
-                    padding: 25px;
-                    margin-bottom: 20px;
-                    box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-                }}
-                .info-grid {{
-                    display: grid;
-                    grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-                    gap: 20px;
-                }}
-                .info-item {{
-                    padding: 15px;
-                    background: #f8f9fa;
-                    border-radius: 8px;
-                    border-left: 4px solid #667eea;
-                }}
-                .info-label {{
-                    font-size: 12px;
-                    color: #666;
-                    text-transform: uppercase;
-                    margin-bottom: 5px;
-                }}
-                .info-value {{
-                    font-size: 18px;
-                    font-weight: 600;
-                    color: #333;
-                }}
-                .ownership-timeline {{
-                    position: relative;
-                    padding-left: 30px;
-                }}
-                .ownership-item {{
-                    position: relative;
-                    padding: 15px;
-                    background: #f8f9fa;
-                    border-radius: 8px;
-                    margin-bottom: 15px;
-                }}
-                .ownership-item:before {{
-                    content: '';
-                    position: absolute;
-                    left: -22px;
-                    top: 20px;
-                    width: 12px;
-                    height: 12px;
-                    border-radius: 50%;
-                    background: #667eea;
-                }}
-                .review-card {{
-                    padding: 20px;
-                    background: #f8f9fa;
-                    border-radius: 8px;
-                    margin-bottom: 15px;
-                    transition: transform 0.2s;
-                }}
-                .review-card:hover {{
-                    transform: translateY(-2px);
-                    box-shadow: 0 4px 12px rgba(0,0,0,0.1);
-                }}
-                .badge {{
-                    display: inline-block;
-                    padding: 4px 10px;
-                    border-radius: 4px;
-                    font-size: 12px;
-                    font-weight: 600;
-                    margin-right: 5px;
-                }}
-                .badge-success {{
-                    background: #d4edda;
-                    color: #155724;
-                }}
-                .badge-warning {{
-                    background: #fff3cd;
-                    color: #856404;
-                }}
-                .badge-info {{
-                    background: #d1ecf1;
-                    color: #0c5460;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>{summary.get('full_name', 'Автомобиль')}</h1>
-                <p>VIN: {result['vin']}</p>
-                <p>Отчет сформирован: {datetime.now().strftime('%d.%m.%Y %H:%M')}</p>
-            </div>
-            
-            <div class="section">
-                <h2>📊 Основная информация</h2>
-                <div class="info-grid">
-                    <div class="info-item">
-                        <div class="info-label">Марка и модель</div>
-                        <div class="info-value">{summary.get('brand', 'Н/Д')} {summary.get('model', '')}</div>
-                    </div>
-                    <div class="info-item">
-                        <div class="info-label">Год выпуска</div>
-                        <div class="info-value">{summary.get('year', 'Н/Д')}</div>
-                    </div>
-                    <div class="info-item">
-                        <div class="info-label">Цвет</div>
-                        <div class="info-value">{summary.get('color', 'Н/Д')}</div>
-                    </div>
-                    <div class="info-item">
-                        <div class="info-label">Двигатель</div>
-                        <div class="info-value">{summary.get('engine', 'Н/Д')}</div>
-                    </div>
-                    <div class="info-item">
-                        <div class="info-label">Тип кузова</div>
-                        <div class="info-value">{summary.get('body_type', 'Н/Д')}</div>
-                    </div>
-                    <div class="info-item">
-                        <div class="info-label">ПТС</div>
-                        <div class="info-value">{summary.get('pts', 'Н/Д')}</div>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="section">
-                <h2>🚗 Дополнительная информация</h2>
-                <div class="info-grid">
-                    <div class="info-item">
-                        <div class="info-label">ДТП</div>
-                        <div class="info-value">{summary.get('additional_info', {}).get('accidents', 'Нет данных')}</div>
-                    </div>
-                    <div class="info-item">
-                        <div class="info-label">Пробег</div>
-                        <div class="info-value">{summary.get('additional_info', {}).get('mileage', 'Нет данных')}</div>
-                    </div>
-                    <div class="info-item">
-                        <div class="info-label">Ограничения</div>
-                        <div class="info-value">{summary.get('additional_info', {}).get('restrictions', 'Нет данных')}</div>
-                    </div>
-                </div>
-            </div>
+        return HTML_RENDERER.render(result)
+
+# ==================== ХРАНИЛИЩЕ РЕЗУЛЬТАТОВ ====================
+
+# Версия конвейера: увеличивается при изменении состава результата, чтобы
+# --resume не считал завершенными VIN, обработанные старой версией
+PIPELINE_VERSION = "1"
+
+
+def result_to_dict(result: Dict) -> Dict:
+    """Копия результата с VehicleInfo, преобразованным в словарь"""
+    result_copy = result.copy()
+    if result_copy.get("vehicle_info") and hasattr(result_copy["vehicle_info"], 'to_dict'):
+        result_copy["vehicle_info"] = result_copy["vehicle_info"].to_dict()
+    return result_copy
+
+
+def parse_duration(value: str) -> float:
+    """Разбор длительности вида 3600, 30m, 12h, 7d в секунды"""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    value = value.strip().lower()
+    try:
+        if value and value[-1] in units:
+            return float(value[:-1]) * units[value[-1]]
+        return float(value)
+    except ValueError:
+        raise ValueError(f"Invalid duration '{value}', expected e.g. 3600, 30m, 12h, 7d")
+
+
+class ResultStore:
+    """
+    Постоянное хранилище результатов в SQLite
+
+    Результаты хранятся по ключу (VIN, версия конвейера) и записываются
+    сразу после обработки каждого VIN, поэтому прерванный пакет можно
+    продолжить с --resume.
+    """
+
+    def __init__(self, path: str = "output/vin_results.sqlite3", pipeline_version: str = PIPELINE_VERSION):
         """
-        
-        # История владения
-        if vehicle_info and vehicle_info.ownership_history:
-            html += """
-            <div class="section">
-                <h2>👥 История владения</h2>
-                <div class="ownership-timeline">
-            """
-            
-            for i, owner in enumerate(vehicle_info.ownership_history, 1):
-                current = owner.get('to') == 'null' or not owner.get('to')
-                html += f"""
-                    <div class="ownership-item">
-                        <h4>Владелец #{i} {' (Текущий)' if current else ''}</h4>
-                        <p><strong>Тип:</strong> {owner.get('type', 'Н/Д')}</p>
-                        <p><strong>Период:</strong> с {owner.get('from', 'Н/Д')} 
-                           {f"по {owner.get('to')}" if not current else 'по настоящее время'}</p>
-                        <p><strong>Срок владения:</strong> {owner.get('period', 'Н/Д')}</p>
-                        <p><strong>Операция:</strong> {owner.get('operation', 'Н/Д')}</p>
-                    </div>
-                """
-            
-            html += """
-                </div>
-            </div>
-            """
-        
-        # Отзывы
-        if reviews:
-            html += f"""
-            <div class="section">
-                <h2>📝 Отзывы владельцев ({len(reviews)} найдено)</h2>
-            """
-            
-            for review in reviews[:10]:  # Показываем первые 10 отзывов
-                badges = []
-                if review.get('year_match'):
-                    badges.append('<span class="badge badge-success">Год совпадает</span>')
-                if review.get('engine_match'):
-                    badges.append('<span class="badge badge-info">Двигатель совпадает</span>')
-                
-                source_badge = f'<span class="badge badge-warning">{review["source"]}</span>'
-                
-                html += f"""
-                    <div class="review-card">
-                        <div style="margin-bottom: 10px;">
-                            {source_badge}
-                            {''.join(badges)}
-                        </div>
-                        <h4>{review.get('title', 'Без названия')}</h4>
-                        <p><strong>Рейтинг:</strong> {review.get('rating', 'Н/Д')}</p>
-                        {f'<p><strong>Автор:</strong> {review.get("author")}</p>' if review.get("author") else ''}
-                        {f'<p><strong>Информация об авто:</strong> {review.get("car_info")}</p>' if review.get("car_info") else ''}
-                        {f'<p>{review.get("preview")}</p>' if review.get("preview") else ''}
-                        <a href="{review.get('url', '#')}" target="_blank">Читать полностью →</a>
-                    </div>
-                """
-            
-            html += """
-            </div>
-            """
-        
-        html += """
-        </body>
-        </html>
+        Args:
+            path: Путь к файлу базы
+            pipeline_version: Версия конвейера для ключа записей
         """
-        
-        return html
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.pipeline_version = pipeline_version
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                vin TEXT NOT NULL,
+                pipeline_version TEXT NOT NULL,
+                completed_at REAL NOT NULL,
+                error TEXT,
+                result TEXT NOT NULL,
+                PRIMARY KEY (vin, pipeline_version)
+            )
+        """)
+        self._conn.commit()
+
+    def save(self, result: Dict) -> None:
+        """Сохранение (или замена) результата VIN"""
+        payload = json.dumps(result_to_dict(result), ensure_ascii=False, default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (vin, pipeline_version, completed_at, error, result) VALUES (?, ?, ?, ?, ?)",
+                (result["vin"], self.pipeline_version, time.time(), result.get("error"), payload)
+            )
+            self._conn.commit()
+
+    def get(self, vin: str) -> Optional[Dict]:
+        """Сохраненный результат VIN (vehicle_info восстанавливается в VehicleInfo)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM results WHERE vin = ? AND pipeline_version = ?",
+                (vin, self.pipeline_version)
+            ).fetchone()
+        if row is None:
+            return None
+
+        result = json.loads(row[0])
+        if result.get("vehicle_info"):
+            result["vehicle_info"] = VehicleInfo.from_dict(result["vehicle_info"])
+        return result
+
+    def is_fresh(self, vin: str, max_age: float = None) -> bool:
+        """
+        VIN уже успешно обработан (без ошибки и с данными ГИБДД)
+
+        Args:
+            max_age: Максимальный возраст записи в секундах (None - без ограничения)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT completed_at FROM results WHERE vin = ? AND pipeline_version = ? AND error IS NULL "
+                "AND json_extract(result, '$.vehicle_info') IS NOT NULL",
+                (vin, self.pipeline_version)
+            ).fetchone()
+        if row is None:
+            return False
+        return max_age is None or time.time() - row[0] <= max_age
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+# ==================== ПОТОКОВАЯ ЗАПИСЬ РЕЗУЛЬТАТОВ ====================
+
+SUMMARY_COLUMNS = [
+    "VIN", "Автомобиль", "Год", "Цвет", "Двигатель", "Владельцев",
+    "Отзывов найдено", "ДТП", "Пробег", "Ошибка"
+]
+INTEGER_COLUMNS = ("Владельцев", "Отзывов найдено")
+
+
+def summary_row(result: Dict) -> Dict:
+    """Плоская строка сводки по результату VIN для табличных форматов"""
+    summary = result.get("summary", {})
+    additional = summary.get("additional_info", {})
+    return {
+        "VIN": result["vin"],
+        "Автомобиль": summary.get("full_name", ""),
+        "Год": summary.get("year", ""),
+        "Цвет": summary.get("color", ""),
+        "Двигатель": summary.get("engine", ""),
+        "Владельцев": summary.get("owners_count", 0),
+        "Отзывов найдено": summary.get("reviews_found", 0),
+        "ДТП": additional.get("accidents", ""),
+        "Пробег": additional.get("mileage", ""),
+        "Ошибка": result.get("error") or ""
+    }
+
+
+class ResultSink:
+    """
+    Базовый приемник результатов пакетной обработки
+
+    Каждый результат записывается сразу после обработки VIN, в памяти
+    остается не больше одного блока строк, поэтому потребление памяти не
+    зависит от размера пакета. Метод ``write`` потокобезопасен и подходит
+    как on_result для BatchRunner.
+    """
+
+    extension = ""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def write(self, result: Dict) -> None:
+        with self._lock:
+            self._write(result)
+            self.count += 1
+
+    def __call__(self, idx: int, result: Dict) -> None:
+        self.write(result)
+
+    def _write(self, result: Dict) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "ResultSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class JsonlSink(ResultSink):
+    """Полные результаты, по одному JSON-объекту на строку"""
+
+    extension = "jsonl"
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _write(self, result: Dict) -> None:
+        self._file.write(json.dumps(result_to_dict(result), ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class CsvSink(ResultSink):
+    """Строки сводки в CSV"""
+
+    extension = "csv"
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        # utf-8-sig, чтобы Excel правильно открыл кириллицу
+        self._file = open(path, "a", encoding="utf-8-sig" if is_new else "utf-8", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=SUMMARY_COLUMNS)
+        if is_new:
+            self._writer.writeheader()
+
+    def _write(self, result: Dict) -> None:
+        self._writer.writerow(summary_row(result))
+        self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class ParquetSink(ResultSink):
+    """
+    Строки сводки в колоночном файле Parquet (нужен pyarrow)
+
+    Строки копятся до ``row_group_size`` и записываются группой строк.
+    """
+
+    extension = "parquet"
+
+    def __init__(self, path: str, row_group_size: int = 1000):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Parquet output requires pyarrow: pip install pyarrow")
+
+        super().__init__(path)
+        self._pa = pyarrow
+        self._schema = pyarrow.schema([
+            (name, pyarrow.int64() if name in INTEGER_COLUMNS else pyarrow.string())
+            for name in SUMMARY_COLUMNS
+        ])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+        self.row_group_size = row_group_size
+        self._rows: List[Dict] = []
+
+    def _write(self, result: Dict) -> None:
+        row = summary_row(result)
+        for name, value in row.items():
+            if name in INTEGER_COLUMNS:
+                row[name] = int(value or 0)
+            else:
+                row[name] = "" if value is None else str(value)
+        self._rows.append(row)
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._rows:
+            self._writer.write_table(self._pa.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush()
+            self._writer.close()
+
+
+class XlsxSink(ResultSink):
+    """
+    Строки сводки в XLSX, разбитые на файлы по ``chunk_rows`` строк
+
+    Книга пишется в режиме write_only (openpyxl) и сохраняется при
+    заполнении части, поэтому завершенные части остаются на диске, даже
+    если пакет прервется: ``name_part001.xlsx``, ``name_part002.xlsx``...
+    """
+
+    extension = "xlsx"
+
+    def __init__(self, path: str, chunk_rows: int = 1000):
+        super().__init__(path)
+        self.chunk_rows = chunk_rows
+        self.files: List[str] = []
+        self._workbook = None
+        self._sheet = None
+        self._rows = 0
+
+    def _write(self, result: Dict) -> None:
+        if self._workbook is None:
+            from openpyxl import Workbook
+
+            self._workbook = Workbook(write_only=True)
+            self._sheet = self._workbook.create_sheet("VIN")
+            self._sheet.append(SUMMARY_COLUMNS)
+        row = summary_row(result)
+        self._sheet.append([row[name] for name in SUMMARY_COLUMNS])
+        self._rows += 1
+        if self._rows >= self.chunk_rows:
+            self._save_chunk()
+
+    def _save_chunk(self) -> None:
+        if self._workbook is None:
+            return
+        base, _ = os.path.splitext(self.path)
+        filename = f"{base}_part{len(self.files) + 1:03d}.xlsx"
+        self._workbook.save(filename)
+        self.files.append(filename)
+        self._workbook = None
+        self._sheet = None
+        self._rows = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._save_chunk()
+
+
+SINKS = {
+    "jsonl": JsonlSink,
+    "csv": CsvSink,
+    "parquet": ParquetSink,
+    "xlsx": XlsxSink
+}
+
+
+def open_sinks(formats: Iterable[str], basename: str) -> List[ResultSink]:
+    """
+    Создание приемников результатов
+
+    Args:
+        formats: Форматы (jsonl, csv, parquet, xlsx; excel - синоним xlsx)
+        basename: Путь к файлу без расширения
+    """
+    sinks = []
+    try:
+        for name in formats:
+            sink_class = SINKS.get("xlsx" if name == "excel" else name)
+            if sink_class is None:
+                raise ValueError(f"Неподдерживаемый формат: {name}")
+            sinks.append(sink_class(f"{basename}.{sink_class.extension}"))
+    except Exception:
+        for sink in sinks:
+            sink.close()
+        raise
+    return sinks
+
+# ==================== ПАКЕТНАЯ ОБРАБОТКА ====================
+
+class StagePipeline:
+    """
+    Конвейер этапов с ограниченными очередями
+
+    Каждый этап обслуживается своим набором потоков и читает задания из
+    собственной очереди ограниченного размера. Заполненная очередь
+    блокирует предыдущий этап (backpressure), поэтому быстрый этап уходит
+    вперед не больше чем на ``queue_size`` заданий.
+    """
+
+    _DONE = object()
+
+    def __init__(self, stages: List[Tuple[str, Callable, int]], queue_size: int = 8):
+        """
+        Args:
+            stages: Список (название, функция(item) -> item, количество потоков)
+            queue_size: Размер очереди перед каждым этапом
+        """
+        if not stages:
+            raise ValueError("stages must not be empty")
+        if queue_size < 1:
+            raise ValueError("queue_size must be >= 1")
+
+        self.stages = stages
+        self.queue_size = queue_size
+
+    def run(self, items: Iterable, sink: Callable) -> None:
+        """
+        Прогон заданий через все этапы
+
+        Задания подаются из вызывающего потока по мере освобождения места
+        в первой очереди, поэтому ``items`` может быть ленивым итератором.
+        Если ``items`` выбрасывает исключение, уже начатые задания
+        завершаются, остальные пропускаются, и исключение пробрасывается
+        после остановки потоков.
+
+        Args:
+            items: Итерируемый набор заданий
+            sink: Функция, вызываемая для каждого задания после последнего этапа
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = []
+        stop = threading.Event()
+
+        for stage_idx, (name, func, workers) in enumerate(self.stages):
+            in_queue = queues[stage_idx]
+            is_last = stage_idx + 1 == len(self.stages)
+            emit = sink if is_last else queues[stage_idx + 1].put
+            state = {"remaining": workers}
+            lock = threading.Lock()
+
+            def loop(in_queue=in_queue, func=func, emit=emit, state=state, lock=lock, stage_idx=stage_idx):
+                while True:
+                    item = in_queue.get()
+                    if item is self._DONE:
+                        with lock:
+                            state["remaining"] -= 1
+                            last_worker = state["remaining"] == 0
+                        # Последний поток этапа завершает следующий этап
+                        if last_worker and stage_idx + 1 < len(self.stages):
+                            for _ in range(self.stages[stage_idx + 1][2]):
+                                queues[stage_idx + 1].put(self._DONE)
+                        return
+                    if stop.is_set():
+                        # Подача заданий прервана: оставшиеся пропускаются
+                        continue
+                    emit(func(item))
+
+            for worker_idx in range(workers):
+                thread = threading.Thread(target=loop, name=f"{name}-{worker_idx}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for item in items:
+                queues[0].put(item)
+        except BaseException:
+            stop.set()
+            raise
+        finally:
+            for _ in range(self.stages[0][2]):
+                queues[0].put(self._DONE)
+            # Потоки этапов не переживают run(), даже если items выбросил исключение
+            for thread in threads:
+                thread.join()
+
+
+@dataclass
+class BatchItem:
+    """Состояние одного VIN в конвейере"""
+    idx: int
+    vin: str
+    result: Dict = None
+    vehicle_info: VehicleInfo = None
+    speculation: Speculation = None
+    started: float = None
+    done: bool = False
+
+
+class BatchRunner:
+    """
+    Конвейерная обработка VIN-кодов
+
+    Этапы ГИБДД, дополнительной информации и поиска отзывов выполняются
+    в отдельных пулах потоков и связаны очередями размера ``queue_size``:
+    пока браузер собирает отзывы для VIN n, запросы ГИБДД для следующих
+    VIN уже выполняются. Декораторы @browser с reuse_driver=True выдают
+    каждому потоку собственный экземпляр браузера. Результаты
+    возвращаются в порядке входного списка.
+    """
+
+    def __init__(
+        self,
+        parser: VINParser,
+        workers: int = 1,
+        gibdd_workers: int = None,
+        queue_size: int = None,
+        store: ResultStore = None,
+        resume: bool = False,
+        refresh_older_than: float = None,
+        speculative: bool = False,
+        progress: bool = False,
+        **parse_kwargs
+    ):
+        """
+        Args:
+            parser: Экземпляр VINParser
+            workers: Количество параллельных потоков (браузеров) на этап
+            gibdd_workers: Количество потоков для запросов к ГИБДД
+            queue_size: Размер очереди перед этапом (по умолчанию 2 * workers)
+            store: Хранилище, в которое записывается каждый результат
+            resume: Пропускать VIN, уже успешно обработанные в store
+            refresh_older_than: При resume обрабатывать заново записи старше
+                указанного числа секунд
+            speculative: Предзагружать отзывы по модели, угаданной по
+                истории пакета, пока идет запрос ГИБДД (см. Speculator)
+            progress: Показывать общий счетчик прогресса (см. Progress)
+            **parse_kwargs: Аргументы для parse_by_vin
+        """
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+
+        self.parser = parser
+        self.workers = workers
+        self.gibdd_workers = gibdd_workers or workers
+        self.queue_size = queue_size or 2 * workers
+        self.store = store
+        self.resume = resume and store is not None
+        self.refresh_older_than = refresh_older_than
+        self.parse_kwargs = parse_kwargs
+        self.progress = progress
+        self.skipped = 0
+        self.rejected = 0
+        self.speculator = None
+        if speculative and parse_kwargs.get("search_reviews", True) and not RESULT_CACHE.enabled:
+            # Предзагрузка передает карточки через RESULT_CACHE; без кэша
+            # (--record/--replay) она лишь повторила бы каждый сбор
+            log.warning("⚠️ Кэш отключен, предзагрузка отзывов не используется")
+        elif speculative and parse_kwargs.get("search_reviews", True):
+            self.speculator = Speculator(
+                workers=workers,
+                max_reviews=parse_kwargs.get("max_reviews", 20),
+                include_board_journals=parse_kwargs.get("include_board_journals", False)
+            )
+
+    def _guard(self, item: BatchItem, name: str, stage: Callable) -> BatchItem:
+        """Выполнение этапа с перехватом ошибок (ошибка завершает обработку VIN)"""
+        if item.done:
+            return item
+        try:
+            with log_context(vin=item.vin, stage=name):
+                stage(item)
+        except Exception as e:
+            log.warning("✗ Ошибка при обработке VIN %s: %s", item.vin, e)
+            item.result = {"error": str(e), "vin": item.vin}
+            item.done = True
+        return item
+
+    def _gibdd_stage(self, item: BatchItem) -> None:
+        item.started = time.perf_counter()
+        item.result = self.parser.new_result(item.vin)
+        if self.speculator:
+            item.speculation = self.speculator.start(item.vin)
+        with stage_timer(item.result, "gibdd"):
+            gibdd_response = self.parser.fetch_gibdd(item.vin, self.parse_kwargs.get("use_mock_data", False))
+            item.vehicle_info = self.parser.apply_gibdd(item.result, gibdd_response)
+        item.done = item.vehicle_info is None
+        if self.speculator and not item.done:
+            item.speculation = self.speculator.settle(item.vin, item.speculation, item.vehicle_info)
+
+    def _additional_stage(self, item: BatchItem) -> None:
+        if self.parse_kwargs.get("get_additional", True):
+            self.parser.collect_additional(item.result, item.vehicle_info)
+
+    def _reviews_stage(self, item: BatchItem) -> None:
+        if self.parse_kwargs.get("search_reviews", True):
+            Speculator.wait(item.speculation)
+            self.parser.collect_reviews(
+                item.result,
+                item.vehicle_info,
+                self.parse_kwargs.get("max_reviews", 20),
+                self.parse_kwargs.get("include_board_journals", False)
+            )
+        self.parser.build_summary(item.result, item.vehicle_info)
+
+    def run(self, vin_list: Iterable[str], on_result=None, keep_results: bool = True) -> List[Dict]:
+        """
+        Обработка списка VIN
+
+        Args:
+            vin_list: VIN-коды (список или поток, например iter_vins)
+            on_result: Необязательный callback(idx, result), вызывается
+                сразу после обработки VIN (порядок завершения произвольный)
+            keep_results: Хранить результаты в памяти; False для больших
+                потоков, когда результаты уходят в on_result/хранилище
+
+        Returns:
+            Результаты в порядке vin_list (пустой список при keep_results=False)
+        """
+        total = len(vin_list) if hasattr(vin_list, "__len__") else "?"
+        results = {}
+        progress = Progress(total if total != "?" else None) if self.progress else None
+
+        def sink(item: BatchItem) -> None:
+            if item.started is not None:
+                # Полное время VIN в конвейере, включая ожидание в очередях
+                record_total(item.result, item.started)
+            if keep_results:
+                results[item.idx] = item.result
+            if self.store is not None:
+                try:
+                    self.store.save(item.result)
+                except Exception as e:
+                    log.warning("✗ Ошибка при записи результата %s в хранилище: %s", item.vin, e)
+            if on_result:
+                try:
+                    on_result(item.idx, item.result)
+                except Exception as e:
+                    log.warning("✗ Ошибка при сохранении результата %s: %s", item.vin, e)
+            if progress:
+                progress.update(not item.result.get("error"))
+
+        def items():
+            # Повторный VIN получает собственный результат: запросы ГИБДД,
+            # дополнительной информации и отзывов для него берутся из
+            # RESULT_CACHE или присоединяются к уже выполняющимся
+            for idx, vin in enumerate(vin_list, 1):
+                vin = vin.upper().strip()
+                if self.resume and self.store.is_fresh(vin, self.refresh_older_than):
+                    if keep_results:
+                        results[idx] = self.store.get(vin)
+                    self.skipped += 1
+                    continue
+                # Неверные VIN отсекаются до конвейера, без запроса ГИБДД
+                decoded = VIN_DECODER.decode(vin)
+                if not decoded.valid:
+                    log.warning("[%s/%s] ✗ %s: %s", idx, total, vin, decoded.error)
+                    self.rejected += 1
+                    sink(BatchItem(idx=idx, vin=vin, result={"error": decoded.error, "vin": vin}, done=True))
+                    continue
+                log.debug("[%s/%s] Обработка VIN: %s", idx, total, vin)
+                yield BatchItem(idx=idx, vin=vin)
+
+        pipeline = StagePipeline([
+            ("gibdd", lambda item: self._guard(item, "gibdd", self._gibdd_stage), self.gibdd_workers),
+            ("additional", lambda item: self._guard(item, "additional", self._additional_stage), self.workers),
+            ("reviews", lambda item: self._guard(item, "reviews", self._reviews_stage), self.workers)
+        ], queue_size=self.queue_size)
+        pipeline.run(items(), sink)
+        if progress:
+            progress.finish()
+
+        return [results[idx] for idx in sorted(results)]
 
 # ==================== ФУНКЦИИ ДЛЯ УДОБНОЙ РАБОТЫ ====================
 
@@ -1278,99 +4735,309 @@ def parse_vin_simple(vin: str, api_key: str = None) -> Dict:
     Returns:
         Полная информация об автомобиле
     """
+    ensure_logging("info")
     parser = VINParser(api_key=api_key)
     return parser.parse_by_vin(vin, use_mock_data=True)  # Используем mock для демонстрации
 
-def parse_multiple_vins(vin_list: List[str], api_key: str = None, output_format: str = "excel") -> List[Dict]:
+def parse_multiple_vins(
+    vin_list: Iterable[str],
+    api_key: str = None,
+    output_format="excel",
+    workers: int = 1,
+    gibdd_workers: int = None,
+    browser_pool_size: int = 0,
+    store_path: str = None,
+    resume: bool = False,
+    keep_results: bool = True,
+    html_report: Optional[str] = "batch",
+    metrics_path: str = None,
+    use_mock_data: bool = True,
+    get_additional: bool = True
+) -> List[Dict]:
     """
     Парсинг нескольких VIN-кодов
     
     Args:
-        vin_list: Список VIN-кодов
+        vin_list: VIN-коды (список или поток, например iter_vins)
         api_key: API ключ для ГИБДД
-        output_format: Формат сохранения результатов
+        output_format: Формат или список форматов сводки (excel/xlsx, csv,
+            jsonl, parquet); каждый результат записывается сразу
+        workers: Количество параллельных потоков (браузеров)
+        gibdd_workers: Количество потоков для запросов к ГИБДД
+        browser_pool_size: Размер общего пула браузеров (0 - без пула)
+        store_path: Файл SQLite для сохранения результатов (None - не сохранять)
+        resume: Пропускать VIN, уже обработанные в store_path
+        keep_results: Возвращать результаты (False - память не растет с размером пакета)
+        html_report: HTML-отчеты: batch - один сводный отчет на пакет,
+            files - отдельный файл на каждый VIN, None - без отчетов
+        metrics_path: Файл метрик (.prom - формат Prometheus, иначе JSON)
+        use_mock_data: Тестовый ответ ГИБДД вместо запроса к GIBDD_API_URL
+        get_additional: Собирать дополнительную информацию (ДТП, пробег, ограничения)
     """
+    ensure_logging("warning")
     parser = VINParser(api_key=api_key)
-    results = []
-    total = len(vin_list)
+    total = len(vin_list) if hasattr(vin_list, "__len__") else "?"
     
-    print(f"\n🚀 Начинаем парсинг {total} VIN-кодов...")
+    log.info("🚀 Начинаем парсинг %s VIN-кодов (потоков: %s)...", total, workers)
+
+    formats = [output_format] if isinstance(output_format, str) else list(output_format or [])
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    sinks = open_sinks(formats, os.path.join("output", f"vin_batch_results_{timestamp}"))
+    stats = {"processed": 0, "errors": 0, "reviews": 0}
+    stats_lock = threading.Lock()
     
-    for idx, vin in enumerate(vin_list, 1):
-        print(f"\n[{idx}/{total}] Обработка VIN: {vin}")
-        result = parser.parse_by_vin(vin, use_mock_data=True)
-        results.append(result)
-        
+    batch_report = None
+    reports = None
+    if html_report == "batch":
+        batch_report = BatchReportWriter(os.path.join("output", f"vin_batch_report_{timestamp}"))
+    elif html_report == "files":
+        reports = HtmlReportWriter("output")
+    elif html_report is not None:
+        raise ValueError(f"Неподдерживаемый вид HTML-отчета: {html_report}")
+
+    def on_result(idx: int, result: Dict) -> None:
         # Экспорт отчета
-        if not result.get("error"):
-            parser.export_report(result, format="html")
-        
-        # Задержка между запросами
-        if idx < total:
-            time.sleep(2)
+        if batch_report:
+            batch_report.write(result)
+        elif reports and not result.get("error"):
+            reports.write(result)
+
+        with stats_lock:
+            stats["processed"] += 1
+            if result.get("error"):
+                stats["errors"] += 1
+            else:
+                stats["reviews"] += result.get("summary", {}).get("reviews_found", 0)
+
+        for sink in sinks:
+            sink.write(result)
     
-    # Сохранение общих результатов
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    store = ResultStore(store_path) if store_path else None
+    runner = BatchRunner(
+        parser,
+        workers=workers,
+        gibdd_workers=gibdd_workers,
+        store=store,
+        resume=resume,
+        progress=True,
+        get_additional=get_additional,
+        use_mock_data=use_mock_data
+    )
+
+    pool = None
+    if browser_pool_size:
+        pool = BrowserPool(browser_pool_size).start()
+        set_browser_pool(pool)
+
+    try:
+        results = runner.run(vin_list, on_result=on_result, keep_results=keep_results)
+    finally:
+        for sink in sinks:
+            sink.close()
+        if batch_report:
+            batch_report.close()
+        if store:
+            store.close()
+        if pool:
+            set_browser_pool(None)
+            pool.close()
     
-    if output_format == "excel":
-        # Подготовка данных для Excel
-        export_data = []
-        for result in results:
-            if not result.get("error"):
-                summary = result.get("summary", {})
-                export_data.append({
-                    "VIN": result["vin"],
-                    "Автомобиль": summary.get("full_name", ""),
-                    "Год": summary.get("year", ""),
-                    "Цвет": summary.get("color", ""),
-                    "Двигатель": summary.get("engine", ""),
-                    "Владельцев": summary.get("owners_count", 0),
-                    "Отзывов найдено": summary.get("reviews_found", 0),
-                    "ДТП": summary.get("additional_info", {}).get("accidents", ""),
-                    "Пробег": summary.get("additional_info", {}).get("mileage", "")
-                })
-        
-        filename = f"vin_batch_results_{timestamp}"
-        bt.write_excel(export_data, filename)
-        print(f"\n✅ Результаты сохранены в {filename}.xlsx")
+    for sink in sinks:
+        for filename in getattr(sink, "files", None) or [sink.path]:
+            print(f"\n✅ Результаты сохранены в {filename}")
+    if batch_report:
+        print(f"\n✅ Сводный отчет: {batch_report.html_path}")
     
     # Статистика
     print(f"\n📊 Статистика обработки:")
-    print(f"  Всего VIN обработано: {total}")
-    print(f"  Успешно: {len([r for r in results if not r.get('error')])}")
-    print(f"  С ошибками: {len([r for r in results if r.get('error')])}")
-    
-    total_reviews = sum(r.get('summary', {}).get('reviews_found', 0) for r in results if not r.get('error'))
-    print(f"  Всего найдено отзывов: {total_reviews}")
+    print(f"  Всего VIN обработано: {stats['processed']}")
+    print(f"  Успешно: {stats['processed'] - stats['errors']}")
+    print(f"  С ошибками: {stats['errors']}")
+    print(f"  Всего найдено отзывов: {stats['reviews']}")
+    if runner.skipped:
+        print(f"  Пропущено уже обработанных: {runner.skipped}")
+    if runner.rejected:
+        print(f"  Отсеяно без запроса ГИБДД: {runner.rejected}")
+    print_dedup_stats()
+    print_wait_stats()
+    if metrics_path:
+        METRICS.write(metrics_path)
+        print(f"\n📈 Метрики сохранены в {metrics_path}")
     
     return results
 
 # ==================== ГЛАВНАЯ ФУНКЦИЯ ====================
 
 def main():
-    """Parse VIN codes from a JSON file provided via command line."""
+    """Parse VIN codes from a file (JSON, JSONL, CSV, text) or stdin provided via command line."""
+
+    if sys.argv[1:2] == ["cache"]:
+        cache_main(sys.argv[2:])
+        return
 
     arg_parser = argparse.ArgumentParser(description="VIN parser")
-    arg_parser.add_argument("vin_file", help="Path to JSON file with VIN list")
+    arg_parser.add_argument("vin_file", help="Path to VIN list (.json, .jsonl, .csv or text, one VIN per line); '-' reads stdin")
+    arg_parser.add_argument("--input-format", choices=["json", "jsonl", "csv", "txt"], default=None, help="VIN file format (defaults to the file extension; stdin defaults to jsonl/text lines)")
+    arg_parser.add_argument("--strict-wmi", action="store_true", help="Skip VINs whose manufacturer code (first 3 characters) is not in vehicle_mappings.json")
+    arg_parser.add_argument("--vin-column", default="vin", help="CSV column / JSONL key holding the VIN")
+    arg_parser.add_argument("--workers", type=int, default=1, help="Number of parallel workers (browsers)")
+    arg_parser.add_argument("--gibdd-workers", type=int, default=None, help="Number of parallel GIBDD requests (defaults to --workers)")
+    arg_parser.add_argument("--queue-size", type=int, default=None, help="Bounded queue size between pipeline stages (defaults to 2 * workers)")
+    arg_parser.add_argument("--browser-pool", type=int, default=0, help="Launch this many browsers up front and share them between workers (0 - one browser per decorated function)")
+    arg_parser.add_argument("--browser-max-pages", type=int, default=200, help="Restart a pooled browser after this many page loads")
+    arg_parser.add_argument("--browser-max-memory-mb", type=float, default=None, help="Restart a pooled browser when the RSS of Chrome and its child processes exceeds this size")
+    arg_parser.add_argument("--browser-only", action="store_true", help="Always scrape review and journal listings in the browser (disable the HTTP fast path)")
+    arg_parser.add_argument(
+        "--output",
+        action="append",
+        default=[],
+        choices=sorted(SINKS),
+        help="Stream a results file to output/ as each VIN completes (repeatable): jsonl (full results), csv, parquet, xlsx (summary rows)"
+    )
+    arg_parser.add_argument("--speculative", action="store_true", help="Start scraping reviews for the model guessed from earlier VINs with the same prefix while the GIBDD request is in flight")
+    arg_parser.add_argument("--metrics", default=None, metavar="PATH", help="Write stage, source, navigation and cache timings to PATH (.prom - Prometheus text format, otherwise JSON)")
+    arg_parser.add_argument("--html-report", choices=["batch", "files", "none"], default="none", help="HTML reports: batch - one viewer page plus data file for the whole run, files - one file per VIN")
+    arg_parser.add_argument("--store", default="output/vin_results.sqlite3", help="SQLite file where every result is persisted as soon as it completes")
+    arg_parser.add_argument("--resume", action="store_true", help="Skip VINs that already completed successfully in --store")
+    arg_parser.add_argument("--refresh-older-than", default=None, metavar="DURATION", help="With --resume, re-fetch stored results older than this (e.g. 12h, 7d); implies --resume")
+    arg_parser.add_argument(
+        "--cache-ttl",
+        action="append",
+        default=[],
+        metavar="FUNCTION=DURATION",
+        help="Cache TTL per function, e.g. get_gibdd_data=6h or scrape_model_reviews=30d"
+    )
+    arg_parser.add_argument(
+        "--rate",
+        action="append",
+        default=[],
+        metavar="DOMAIN=RATE[:BURST]",
+        help="Request rate limit per domain, e.g. drom.ru=0.5:2 (domains: drom.ru, drive2.ru, gibdd)"
+    )
+    arg_parser.add_argument("--gibdd-only", action="store_true", help="Only fetch GIBDD data (no scraping) and save it to output/")
+    arg_parser.add_argument("--gibdd-batch-size", type=int, default=1, help="VINs per GIBDD request, if the API supports batching")
+    arg_parser.add_argument("--api-key", default=None, help="GIBDD API key")
+    arg_parser.add_argument("--gibdd-live", action="store_true", help="Query the GIBDD API for every VIN instead of the built-in demo response")
+    arg_parser.add_argument("--gibdd-url", default=None, help="GIBDD API endpoint (defaults to $VIN_PARSER_GIBDD_URL or the built-in URL)")
+    arg_parser.add_argument(
+        "--site-url",
+        action="append",
+        default=[],
+        metavar="DOMAIN=URL",
+        help="Base URL for a scraped site, e.g. drom.ru=http://127.0.0.1:8001 (domains: drom.ru, drive2.ru)"
+    )
+    arg_parser.add_argument("--skip-additional-info", action="store_true", help="Skip the additional info stage (accidents, mileage, restrictions)")
+    archive_group = arg_parser.add_mutually_exclusive_group()
+    archive_group.add_argument("--record", default=None, metavar="DIR", help="Record every GIBDD response and Drom/Drive2 page into a content-addressed archive in DIR (bypasses the cache)")
+    archive_group.add_argument("--replay", default=None, metavar="DIR", help="Serve GIBDD responses and pages from an archive recorded with --record: no network, no browser")
+    arg_parser.add_argument("--log-level", choices=["debug", "info", "warning", "error"], default="warning", help="Per-VIN log verbosity (written to stderr; a progress line is always shown)")
+    arg_parser.add_argument("--log-format", choices=["text", "json"], default="text", help="Log format: text - readable lines (prefixed with the VIN when --workers > 1), json - one JSON object per line with vin/stage fields")
     args = arg_parser.parse_args()
 
-    vin_list = load_vins(args.vin_file)
-    parser = VINParser()
+    setup_logging(args.log_level, args.log_format, prefix_vin=args.workers > 1)
 
-    total = len(vin_list)
-    for idx, vin in enumerate(vin_list, 1):
-        print(f"\n[{idx}/{total}] Обработка VIN: {vin}")
-        result = parser.parse_by_vin(
-            vin=vin,
-            search_reviews=True,
-            get_additional=True,
-            max_reviews=20,
-            use_mock_data=True,
+    for spec in args.rate:
+        SCHEDULER.configure(*parse_rate_spec(spec))
+
+    if args.gibdd_url:
+        global GIBDD_API_URL
+        GIBDD_API_URL = args.gibdd_url
+    for spec in args.site_url:
+        domain, _, url = spec.partition("=")
+        if domain.strip() not in SITE_URLS or not url:
+            arg_parser.error(f"invalid --site-url '{spec}', expected DOMAIN=URL with DOMAIN in {', '.join(SITE_URLS)}")
+        SITE_URLS[domain.strip()] = url.strip()
+
+    for spec in args.cache_ttl:
+        func_name, _, duration = spec.partition("=")
+        RESULT_CACHE.ttls[func_name.strip()] = parse_duration(duration)
+
+    if args.browser_only:
+        global HTTP_FAST_PATH
+        HTTP_FAST_PATH = False
+
+    if args.record or args.replay:
+        set_archive(NetworkArchive(args.record or args.replay, "record" if args.record else "replay"))
+
+    VIN_DECODER.strict_wmi = args.strict_wmi
+    vin_list = iter_vins(args.vin_file, column=args.vin_column, input_format=args.input_format)
+
+    if args.gibdd_only:
+        responses = fetch_gibdd_batch(
+            (vin for vin in vin_list if VIN_DECODER.decode(vin).valid),
+            api_key=args.api_key,
+            concurrency=args.gibdd_workers or 10,
+            batch_size=args.gibdd_batch_size
         )
+        filename = f"gibdd_batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        bt.write_json([{"vin": vin, "gibdd_data": response} for vin, response in responses.items()], filename)
+        found = len([r for r in responses.values() if r and r.get("success")])
+        print(f"\n✅ ГИБДД: получено {found} из {len(responses)}, сохранено в {filename}.json")
+        print_archive_stats()
+        return
+
+    parser = VINParser(api_key=args.api_key)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    sinks = open_sinks(args.output, os.path.join("output", f"vin_batch_results_{timestamp}"))
+    if args.html_report == "batch":
+        sinks.append(BatchReportWriter(os.path.join("output", f"vin_batch_report_{timestamp}")))
+    reports = HtmlReportWriter("output") if args.html_report == "files" else None
 
+    def on_result(idx: int, result: Dict) -> None:
         if result.get("error"):
-            print(f"  ❌ Ошибка: {result['error']}")
+            log.warning("❌ %s: %s", result.get("vin"), result["error"])
+        elif reports:
+            reports.write(result)
+        for sink in sinks:
+            sink.write(result)
+
+    store = ResultStore(args.store)
+    runner = BatchRunner(
+        parser,
+        workers=args.workers,
+        gibdd_workers=args.gibdd_workers,
+        queue_size=args.queue_size,
+        store=store,
+        resume=args.resume or args.refresh_older_than is not None,
+        refresh_older_than=parse_duration(args.refresh_older_than) if args.refresh_older_than else None,
+        speculative=args.speculative,
+        progress=True,
+        search_reviews=True,
+        get_additional=not args.skip_additional_info,
+        max_reviews=20,
+        use_mock_data=not args.gibdd_live,
+    )
+    pool = None
+    if args.browser_pool:
+        pool = BrowserPool(args.browser_pool, args.browser_max_pages, args.browser_max_memory_mb).start()
+        set_browser_pool(pool)
+
+    try:
+        runner.run(vin_list, on_result=on_result, keep_results=False)
+    finally:
+        if runner.speculator:
+            runner.speculator.close()
+        for sink in sinks:
+            sink.close()
+        store.close()
+        if pool:
+            set_browser_pool(None)
+            pool.close()
 
+    if runner.skipped:
+        print(f"\n⏭️ Пропущено уже обработанных VIN: {runner.skipped}")
+    if runner.rejected:
+        print(f"\n🚫 Отсеяно неверных VIN (без запроса ГИБДД): {runner.rejected}")
+    print_dedup_stats()
+    if runner.speculator:
+        speculator = runner.speculator
+        print(f"\n🔮 Предзагрузка: запущено {speculator.started}, подтверждено {speculator.confirmed}, отброшено {speculator.discarded}")
+    print_wait_stats()
+    print_archive_stats()
+    if args.metrics:
+        METRICS.write(args.metrics)
+        print(f"\n📈 Метрики сохранены в {args.metrics}")
     print("\n✅ Готово!")
 
 # ==================== ЗАПУСК ====================